@@ -1,33 +1,83 @@
-from flask import Flask, redirect, url_for
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
-from flask_bcrypt import Bcrypt
-from flask_cors import CORS
+import threading
 from config.config import Config
-import os
 
-# Initialize Flask app
-app = Flask(__name__, template_folder='../templates', static_folder='../static')
-app.config.from_object(Config)
+# Flask and the extensions are imported on first use (see __getattr__), so
+# scripts that only need a service such as llm_service start quickly.
+EXTENSIONS = ('db', 'bcrypt', 'login_manager', 'cors')
 
-# Initialize extensions
-db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
-login_manager = LoginManager(app)
-cors = CORS(app, supports_credentials=True, resources={r"/api/*": {"origins": "*"}})
+_default_app = None
+_default_app_lock = threading.Lock()
 
-# Configure login manager
-login_manager.login_view = 'login'
-login_manager.init_app(app)
 
-# Import routes after app initialization to avoid circular imports
-from app.routes import auth, main, api
-from app.models import models
+def create_app(config=Config):
+    """
+    Build a Flask app with its extensions and routes
 
-@login_manager.user_loader
-def load_user(user_id):
-    return models.Users.query.get(int(user_id))
+    Args:
+        config: Settings object loaded into app.config (Config by default)
 
-@login_manager.unauthorized_handler
-def unauthorized():
-    return redirect(url_for('login')) 
\ No newline at end of file
+    Returns:
+        Flask: The configured application
+    """
+    from flask import Flask
+    from app.extensions import db, bcrypt, login_manager, cors, apps
+    from app.utils.sqlite import apply_sqlite_pragmas, engine_options
+    from app.utils.assets import init_assets
+    from app.utils.compression import init_compression
+    from app.utils.metrics import init_metrics
+
+    app = Flask(__name__, template_folder='../templates', static_folder='../static')
+    app.config.from_object(config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'],
+                                                             app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+
+    db.init_app(app)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+    cors.init_app(app, supports_credentials=True, resources={r"/api/*": {"origins": "*"}})
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS', {}))
+
+    from app.routes import auth, main, api
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(main.bp)
+    app.register_blueprint(api.bp)
+    with app.app_context():
+        _prepare_schema(app)
+    init_assets(app)
+    init_compression(app)
+    init_metrics(app)
+
+    apps.add(app)
+    return app
+
+
+def _prepare_schema(app):
+    # Every model must be registered before create_all(); the routes import them
+    from app.extensions import db
+    from app.migrations import ensure_schema, check_schema
+
+    if app.config.get('MIGRATE_ON_START', True):
+        ensure_schema(db.engine, create_tables=db.create_all)
+    else:
+        check_schema(db.engine)
+
+
+def get_app():
+    """The process-wide app built from Config, created on first use"""
+    global _default_app
+    if _default_app is None:
+        with _default_app_lock:
+            if _default_app is None:
+                _default_app = create_app()
+    return _default_app
+
+
+def __getattr__(name):
+    # Keeps "from app import db" and "from app import app" working
+    if name in EXTENSIONS:
+        from app import extensions
+        return getattr(extensions, name)
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,47 @@
+import os
+import weakref
+from flask import redirect, url_for
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager
+from flask_bcrypt import Bcrypt
+from flask_cors import CORS
+from config.config import Config
+
+# Bound to an app by create_app()
+db = SQLAlchemy()
+bcrypt = Bcrypt()
+login_manager = LoginManager()
+cors = CORS()
+
+# Apps whose engines are disposed in forked children
+apps = weakref.WeakSet()
+
+# Configure login manager
+login_manager.login_view = 'auth.login'
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    from app.models.models import Users
+    from app.services.user_cache import user_cache
+
+    if Config.USER_CACHE_ENABLED:
+        return user_cache.load(int(user_id))
+    return Users.query.get(int(user_id))
+
+
+@login_manager.unauthorized_handler
+def unauthorized():
+    return redirect(url_for('auth.login'))
+
+
+def _dispose_engines_after_fork():
+    # Pooled connections opened before fork must not be shared with the parent
+    for app in list(apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engines_after_fork)
@@ -0,0 +1,109 @@
+"""
+Versioned schema migrations
+
+Each module named mNNNN_<name>.py defines VERSION, DESCRIPTION and
+upgrade(connection). Applied versions are recorded in the
+schema_migrations table, so running the migrations again only applies
+the new ones and existing databases are upgraded in place.
+"""
+
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy import text
+
+MODULE_PATTERN = re.compile(r'^m(\d{4})_\w+$')
+
+
+class SchemaOutdated(RuntimeError):
+    """The database is behind the migrations this code needs"""
+
+
+def load_migrations() -> list:
+    """Migration modules of this package, ordered by version"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        if MODULE_PATTERN.match(module_info.name):
+            migrations.append(importlib.import_module(f"{__name__}.{module_info.name}"))
+    migrations.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+def applied_versions(connection) -> set:
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'version INTEGER PRIMARY KEY, '
+        'description TEXT NOT NULL, '
+        'applied_at TEXT NOT NULL)'
+    ))
+    return {row[0] for row in connection.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def run_migrations(engine) -> list:
+    """
+    Apply every pending migration, each in its own transaction
+
+    Returns:
+        list: (version, description) of the migrations applied now
+    """
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+
+    applied = []
+    for migration in load_migrations():
+        if migration.VERSION in done:
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(
+                text('INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)'),
+                {'v': migration.VERSION, 'd': migration.DESCRIPTION, 't': datetime.utcnow().isoformat()}
+            )
+        applied.append((migration.VERSION, migration.DESCRIPTION))
+    return applied
+
+
+def current_version(engine) -> int:
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    return max(done) if done else 0
+
+
+def ensure_schema(engine, create_tables: Optional[Callable] = None) -> list:
+    """
+    Bring the database up to date when the app starts
+
+    Missing tables are created and pending migrations applied. Workers
+    starting together take turns on the single-flight file lock; the ones
+    after the first find nothing left to do.
+
+    Returns:
+        list: (version, description) of the migrations applied now
+    """
+    from app.services.single_flight import single_flight
+
+    def work():
+        if create_tables:
+            create_tables()
+        applied = run_migrations(engine)
+        for version, description in applied:
+            print(f"🔧 Applied migration {version:04d}: {description}")
+        return applied
+
+    return single_flight.do('schema', work)
+
+
+def check_schema(engine):
+    """Raise SchemaOutdated if any migration is pending"""
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    pending = [migration.VERSION for migration in load_migrations() if migration.VERSION not in done]
+    if pending:
+        raise SchemaOutdated(f"Database schema is at version {max(done) if done else 0}, pending migrations: "
+                             f"{', '.join(f'{version:04d}' for version in pending)}. "
+                             f"Run python3 init_db.py or start with MIGRATE_ON_START=1.")
@@ -0,0 +1,19 @@
+"""Index the foreign keys filtered on every page load"""
+
+VERSION = 1
+DESCRIPTION = 'Add hot-path indexes on courses, lessons and learning_paths'
+
+# Names match what db.create_all() generates from the models, so fresh and
+# upgraded databases end up with the same schema. The composite lessons
+# index also serves plain course_id lookups.
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_courses_learning_path_id ON courses (learning_path_id)',
+    'CREATE INDEX IF NOT EXISTS ix_learning_paths_user_id ON learning_paths (user_id)',
+    'CREATE INDEX IF NOT EXISTS ix_lessons_course_id_id ON lessons (course_id, id)',
+]
+
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql('ANALYZE')
@@ -0,0 +1,53 @@
+"""Move lesson bodies into the compressed, content-addressed lesson_blobs table"""
+
+from datetime import datetime
+from app.services.content_store import blob_hash, encode
+from config.config import Config
+
+VERSION = 2
+DESCRIPTION = 'Store lesson bodies as deduplicated, compressed blobs'
+
+BATCH_SIZE = 200
+
+
+def upgrade(connection):
+    connection.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS lesson_blobs ('
+        'hash VARCHAR(64) NOT NULL PRIMARY KEY, '
+        'codec VARCHAR(10) NOT NULL, '
+        'data BLOB NOT NULL, '
+        'size INTEGER NOT NULL, '
+        'refcount INTEGER NOT NULL, '
+        'created_at DATETIME NOT NULL)'
+    )
+    columns = {row[1] for row in connection.exec_driver_sql('PRAGMA table_info(lessons)')}
+    if 'content_hash' not in columns:
+        connection.exec_driver_sql(
+            'ALTER TABLE lessons ADD COLUMN content_hash VARCHAR(64) REFERENCES lesson_blobs (hash)'
+        )
+    connection.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_lessons_content_hash ON lessons (content_hash)')
+
+    while True:
+        rows = connection.exec_driver_sql(
+            "SELECT id, content FROM lessons WHERE content IS NOT NULL AND content != '' "
+            "AND content_hash IS NULL LIMIT ?", (BATCH_SIZE,)
+        ).fetchall()
+        if not rows:
+            break
+        for lesson_id, content in rows:
+            digest = blob_hash(content)
+            updated = connection.exec_driver_sql(
+                'UPDATE lesson_blobs SET refcount = refcount + 1 WHERE hash = ?', (digest,)
+            ).rowcount
+            if not updated:
+                codec, data = encode(content, Config.CONTENT_STORE_CODEC)
+                connection.exec_driver_sql(
+                    'INSERT INTO lesson_blobs (hash, codec, data, size, refcount, created_at) '
+                    'VALUES (?, ?, ?, ?, 1, ?)',
+                    (digest, codec, data, len(content.encode('utf-8')), str(datetime.utcnow()))
+                )
+            connection.exec_driver_sql(
+                'UPDATE lessons SET content_hash = ?, content = NULL WHERE id = ?', (digest, lesson_id)
+            )
+    # Empty bodies were never real content
+    connection.exec_driver_sql("UPDATE lessons SET content = NULL WHERE content = ''")
@@ -0,0 +1,37 @@
+"""Store a sanitized HTML rendering next to each lesson blob"""
+
+from app.services.content_store import decode, encode
+from app.utils.rendering import render_markdown, RENDERER_VERSION
+from config.config import Config
+
+VERSION = 3
+DESCRIPTION = 'Render lesson bodies to sanitized HTML once, stored with the blob'
+
+BATCH_SIZE = 200
+
+
+def upgrade(connection):
+    columns = {row[1] for row in connection.exec_driver_sql('PRAGMA table_info(lesson_blobs)')}
+    for name, definition in (('html_codec', 'VARCHAR(10)'), ('html', 'BLOB'), ('html_version', 'INTEGER')):
+        if name not in columns:
+            connection.exec_driver_sql(f'ALTER TABLE lesson_blobs ADD COLUMN {name} {definition}')
+
+    # Without markdown/nh3 installed, blobs are rendered on first request instead
+    last_hash = ''
+    while True:
+        rows = connection.exec_driver_sql(
+            'SELECT hash, codec, data FROM lesson_blobs WHERE html IS NULL AND hash > ? ORDER BY hash LIMIT ?',
+            (last_hash, BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for digest, codec, data in rows:
+            last_hash = digest
+            html = render_markdown(decode(codec, data))
+            if html is None:
+                return
+            html_codec, html_data = encode(html, Config.CONTENT_STORE_CODEC)
+            connection.exec_driver_sql(
+                'UPDATE lesson_blobs SET html_codec = ?, html = ?, html_version = ? WHERE hash = ?',
+                (html_codec, html_data, RENDERER_VERSION, digest)
+            )
@@ -0,0 +1,12 @@
+"""Version counters that invalidate cached page fragments across processes"""
+
+VERSION = 4
+DESCRIPTION = 'Add cache_versions for the course and learning path fragment cache'
+
+
+def upgrade(connection):
+    connection.exec_driver_sql(
+        'CREATE TABLE IF NOT EXISTS cache_versions ('
+        'key VARCHAR(64) NOT NULL PRIMARY KEY, '
+        'version INTEGER NOT NULL)'
+    )
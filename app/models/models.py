@@ -1,4 +1,6 @@
+from datetime import datetime
 from flask_login import UserMixin
+from sqlalchemy import event
 from app import db
 
 class Users(db.Model, UserMixin):
@@ -14,20 +16,88 @@ class LearningPaths(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
 class Courses(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    learning_path_id = db.Column(db.Integer, db.ForeignKey('learning_paths.id'), nullable=True)
+    learning_path_id = db.Column(db.Integer, db.ForeignKey('learning_paths.id'), nullable=True, index=True)
     learning_path = db.relationship('LearningPaths', backref='courses')
 
 class Lessons(db.Model):
+    __table_args__ = (db.Index('ix_lessons_course_id_id', 'course_id', 'id'),)
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.Text, nullable=True)
+    # Bodies live compressed in lesson_blobs; the old column only holds rows
+    # written before the content store, until migration 0002 moves them
+    legacy_content = db.deferred(db.Column('content', db.Text, nullable=True))
+    content_hash = db.Column(db.String(64), db.ForeignKey('lesson_blobs.hash'), nullable=True, index=True)
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=True)
     course = db.relationship('Courses', backref=db.backref('lessons', lazy=True))
-    completed = db.Column(db.Boolean, default=0, nullable=False) 
\ No newline at end of file
+    completed = db.Column(db.Boolean, default=0, nullable=False)
+
+    @property
+    def content(self):
+        from app.services.content_store import content_store
+        if self.content_hash:
+            return content_store.get(self.content_hash)
+        return self.legacy_content
+
+    @content.setter
+    def content(self, value):
+        from app.services.content_store import content_store
+        previous = self.content_hash
+        self.content_hash = content_store.put(value) if value else None
+        self.legacy_content = None
+        if previous:
+            content_store.release(previous)
+
+class LessonBlobs(db.Model):
+    hash = db.Column(db.String(64), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    # Sanitized HTML rendering of the body, compressed like data
+    html_codec = db.Column(db.String(10), nullable=True)
+    html = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    html_version = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+@event.listens_for(Lessons, 'after_delete')
+def release_lesson_blob(mapper, connection, target):
+    # Unreferenced blobs are removed by ContentStore.collect_garbage()
+    if target.content_hash:
+        blobs = LessonBlobs.__table__
+        connection.execute(blobs.update().where(blobs.c.hash == target.content_hash)
+                           .values(refcount=blobs.c.refcount - 1))
+
+class Jobs(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LessonChunks(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    terms = db.Column(db.Text, nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+
+class CacheVersions(db.Model):
+    # Version counters of cached page fragments, shared by all worker processes
+    key = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
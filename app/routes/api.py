@@ -1,53 +1,43 @@
-from flask import jsonify, request
+import json
+from flask import Blueprint, jsonify, request, Response, stream_with_context, url_for
 from flask_login import login_required, current_user
-from app import app, db
-from app.models.models import LearningPaths, Courses, Lessons
-from app.utils.helpers import parse_prompt
+from app import db
+from app.models.models import Lessons, Jobs, LearningPaths, Courses
+from app.services import generation
 from app.services.llm_service import llm_service
+from app.services.job_queue import job_queue, job_to_dict
+from app.services.content_store import content_store
+from app.services.fragment_cache import fragment_cache
+from app.services.retrieval import lesson_context
 
-@app.route('/api/generate_learningpath', methods=['POST'])
+bp = Blueprint('api', __name__)
+
+def wants_async(request_data):
+    """True when the client asked for the work to run in the background"""
+    return bool(request_data.get('async')) or 'respond-async' in request.headers.get('Prefer', '')
+
+def enqueue_response(kind, payload):
+    job = job_queue.enqueue(kind, payload, user_id=current_user.id)
+    status_url = url_for('api.job_status', job_id=job.id)
+    return jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url}), 202, {'Location': status_url}
+
+@bp.route('/api/generate_learningpath', methods=['POST'])
 @login_required
 def generate_learning_path():
     try:
         request_data = request.get_json()
         lp_title = request_data.get('text')
 
-        prompt_template = """
-        You are creating a personalized learning path for a user interested in {lp_title}. 
-        Please provide the courses names only, ordered based on difficulty and correct ordering in the learning path, no another text in the string, only the courses names:
-
-        ## **Generate Output**:
-        Format the output to list only the names of the recommended courses under the header Personalized Learning Path: [Learning Path Name].
-        Ensure the output adheres strictly to the format provided, without including any descriptive text, comments, or conversational elements.
-
-        ## **Output Format:**
-        ```
-        # Personalized Learning Path: [Learning Path Name]
-        1. [Course Name 1]
-        2. [Course Name 2]
-        3. (repeat as necessary for additional courses)
-        ```
-        """
-
-        prompt = prompt_template.format(lp_title=lp_title)
-        response_llm = llm_service.generate_response(prompt)
-        courses_titles = parse_prompt(response_llm)
-        
-        new_path = LearningPaths(title=lp_title, user_id=current_user.id)
-        db.session.add(new_path)
-        db.session.commit()
-
-        for course in courses_titles:
-            new_course = Courses(title=course, learning_path_id=new_path.id)
-            db.session.add(new_course)
-            db.session.commit()
+        if wants_async(request_data):
+            return enqueue_response('generate_learning_path', {'user_id': current_user.id, 'lp_title': lp_title})
 
-        return jsonify({'id': new_path.id}), 200
+        path_id = generation.generate_learning_path(current_user.id, lp_title)
+        return jsonify({'id': path_id}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/generate_lessons', methods=['POST'])
+@bp.route('/api/generate_lessons', methods=['POST'])
 @login_required
 def generate_lessons():
     try:
@@ -55,44 +45,38 @@ def generate_lessons():
         course_title = request_data.get('course_title')
         course_id = request_data.get('course_id')
 
-        existing_lesson = Lessons.query.filter_by(course_id=course_id).first()
-        if existing_lesson:
-            return jsonify({'id': course_id, 'course_title': course_title}), 201
+        if wants_async(request_data):
+            return enqueue_response('generate_lessons', {'course_id': course_id, 'course_title': course_title, 'user_id': current_user.id})
 
-        learning_paths = current_user.learning_paths
-        lesson_prompt_template = """
-        # Generating a Personalized Lessons 
-        You are creating a course for a user interested in learning about {course_title}, This course from this learning paths {learning_paths}. 
-        Please provide proper number of lesson titles that would be suitable for this course, and no other text, just lessons tiles, each prefixed with a number, don't write anything else.
-
-        ## **Generate Output**:
-        Format the output to list only the names of the recommended lessons title from course {course_title} under the header Personalized Lessons Of Course: {course_title}.
-        Ensure the output adheres strictly to the format provided, without including any descriptive text, comments, or conversational elements.
-
-        ## **Output Format:**
-        ```
-        # Personalized Learning Path: [Course Name]
-        1. [Lesson Name 1]
-        2. [Lesson Name 2]
-        3. (repeat as necessary for additional Lessons)
-        ```
-        """
-
-        prompt = lesson_prompt_template.format(course_title=course_title, learning_paths=learning_paths)
-        response_llm = llm_service.generate_response(prompt)
-        lesson_titles = parse_prompt(response_llm)
-
-        for lesson_title in lesson_titles:
-            new_lesson = Lessons(title=lesson_title, course_id=course_id)
-            db.session.add(new_lesson)
-            db.session.commit()
+        created = generation.generate_lessons(course_id, course_title, current_user.id)
+        if not created:
+            return jsonify({'id': course_id, 'course_title': course_title}), 201
 
         return jsonify({'id': course_id, 'course_title': course_title}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/generate_content', methods=['POST'])
+@bp.route('/api/generate_path_lessons', methods=['POST'])
+@login_required
+def generate_path_lessons():
+    try:
+        request_data = request.get_json()
+        path_id = request_data.get('path_id')
+
+        path = db.session.get(LearningPaths, path_id)
+        if path is None or path.user_id != current_user.id:
+            return jsonify({'message': 'Learning path not found'}), 404
+
+        if wants_async(request_data):
+            return enqueue_response('generate_path_lessons', {'path_id': path_id, 'user_id': current_user.id})
+
+        return jsonify(generation.generate_path_lessons(path_id, current_user.id)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/generate_content', methods=['POST'])
 @login_required
 def generate_content():
     request_data = request.get_json()
@@ -100,55 +84,86 @@ def generate_content():
     course_title = request_data.get('course_title')
     lesson_id = request_data.get('lesson_id')
 
-    existing_content = Lessons.query.filter_by(id=lesson_id).first().content
-    if existing_content:
-        return jsonify({'content': existing_content}), 200
-
-    content_prompt_template = f"""
-    Lesson: {lesson_title}"
-
-    Lesson Overview:
-    In this lesson, we will delve into the key topics related to "{lesson_title}" in "{course_title}", Please provide detailed content covering the following aspects within the course "{course_title}":
+    if wants_async(request_data):
+        return enqueue_response('generate_content', {'lesson_id': lesson_id, 'lesson_title': lesson_title, 'course_title': course_title})
 
-    Key Topics to Cover:
-    1. 
-    2. 
-    3. 
-
-    **Examples and Explanations:**
-    - Please include illustrative examples to clarify the concepts.
-    - Provide detailed explanations to ensure comprehension.
-
-    **Exercises:**
-    - Develop exercises or problems related to the lesson topics.
-    - Include solutions or hints where applicable.
+    content = generation.generate_lesson_content(lesson_id, lesson_title, course_title)
+    if content is None:
+        return jsonify({'message': 'Lesson not found'}), 404
+    return jsonify({'content': content, 'html': generation.lesson_html(lesson_id)}), 200
 
-    **Additional Notes:**
-    Feel free to add any additional insights or details that would enhance this lesson.
-    
-    **Instructions:**
-    - Do not use (Here Markdown) or (Here XYZ) or any form of conversations just give me the content without any additional conversations   
-    - Design a Markdown template focusing on individual lessons within a course.
-    """
+@bp.route('/api/generate_content/stream', methods=['POST'])
+@login_required
+def generate_content_stream():
+    request_data = request.get_json()
+    lesson_title = request_data.get('lesson_title')
+    course_title = request_data.get('course_title')
+    lesson_id = request_data.get('lesson_id')
 
-    response_llm = llm_service.generate_response(content_prompt_template, max_length=1000)
-    response_llm = response_llm.replace("```html", "").replace("```", "").strip()
-    
-    current_lesson = Lessons.query.get(lesson_id)
-    if current_lesson:
-        current_lesson.content = response_llm
-        db.session.commit()
-        return jsonify({'content': response_llm}), 200
-    else:
+    if not Lessons.query.get(lesson_id):
         return jsonify({'message': 'Lesson not found'}), 404
 
-@app.route('/api/generate_reply', methods=['POST'])
+    def events():
+        chunks = []
+        try:
+            for chunk in generation.stream_lesson_content(lesson_id, lesson_title, course_title):
+                chunks.append(chunk)
+                yield f"event: chunk\ndata: {json.dumps({'text': chunk})}\n\n"
+            content = ''.join(chunks).replace("```html", "").replace("```", "").strip()
+            html = generation.lesson_html(lesson_id)
+            yield f"event: done\ndata: {json.dumps({'content': content, 'html': html})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=headers)
+
+@bp.route('/api/lessons/<int:lesson_id>/content', methods=['GET'])
+@login_required
+def lesson_content(lesson_id):
+    # Generated content never changes under the same hash, so browsers revalidate
+    # with If-None-Match and a repeat open is one primary key lookup and a 304
+    content_hash = generation.lesson_content_hash(lesson_id)
+    if content_hash is None:
+        return jsonify({'message': 'Lesson content not found'}), 404
+
+    etag = content_store.etag(content_hash)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({'id': lesson_id,
+                            'content': content_store.get(content_hash),
+                            'html': content_store.get_html(content_hash)})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@bp.route('/api/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    job = Jobs.query.get(job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({'message': 'Job not found'}), 404
+    # Workers start lazily; make sure jobs left from a previous run get picked up
+    job_queue.start()
+    return jsonify(job_to_dict(job)), 200
+
+@bp.route('/api/courses/<int:course_id>/progress', methods=['GET'])
+@login_required
+def course_progress(course_id):
+    owned = (db.session.query(Courses.id).join(LearningPaths, Courses.learning_path_id == LearningPaths.id)
+             .filter(Courses.id == course_id, LearningPaths.user_id == current_user.id).first())
+    if owned is None:
+        return jsonify({'message': 'Course not found'}), 404
+    return jsonify(generation.course_progress(course_id)), 200
+
+@bp.route('/api/generate_reply', methods=['POST'])
 @login_required
 def generate_reply():
     request_data = request.get_json()
     user_input = request_data.get('user_input')
     lesson_id = request_data.get('lesson_id')
-    content = Lessons.query.get(lesson_id).content
+    content = lesson_context(lesson_id, user_input)
 
     context_template = f"""
     You are a learning assistant designed to provide accurate and helpful information. 
@@ -170,7 +185,7 @@ def generate_reply():
     response_llm = llm_service.generate_response(context_template, max_length=100)
     return jsonify({'reply': response_llm}), 200
 
-@app.route('/api/mark_completed', methods=['POST'])
+@bp.route('/api/mark_completed', methods=['POST'])
 @login_required
 def mark_completed():
     request_data = request.get_json()
@@ -179,5 +194,6 @@ def mark_completed():
     current_lesson = Lessons.query.get(lesson_id)
     if current_lesson:
         current_lesson.completed = 1
+        fragment_cache.bump('course', [current_lesson.course_id])
         db.session.commit()
         return jsonify({'message': f"lesson {lesson_id} completed"}), 200 
\ No newline at end of file
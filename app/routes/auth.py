@@ -1,28 +1,41 @@
-from flask import render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required
 from werkzeug.utils import secure_filename
-from app import app, db, bcrypt
+from app import db
 from app.models.models import Users
+from app.services.password_hasher import password_hasher, HasherBusy
 from app.forms.forms import LoginForm, RegisterForm
 from app.utils.helpers import login_required_redirect_dashboard, allowed_file
 import os
 
-@app.route('/login', methods=['GET', 'POST'])
+bp = Blueprint('auth', __name__)
+
+@bp.route('/login', methods=['GET', 'POST'])
 @login_required_redirect_dashboard
 def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = Users.query.filter_by(username=form.username.data).first()
-        if user and bcrypt.check_password_hash(user.password, form.password.data):
-            login_user(user)
-            return redirect(url_for('dashboard'))
+        try:
+            if user and password_hasher.check(user.password, form.password.data):
+                if password_hasher.needs_rehash(user.password):
+                    # BCRYPT_LOG_ROUNDS changed since this hash was made
+                    user.password = password_hasher.hash(form.password.data)
+                    db.session.commit()
+                login_user(user)
+                return redirect(url_for('main.dashboard'))
+        except HasherBusy:
+            return render_template('login.html', form=form), 503, {'Retry-After': '1'}
     return render_template('login.html', form=form)
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     form = RegisterForm()
     if form.validate_on_submit():
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        try:
+            hashed_password = password_hasher.hash(form.password.data)
+        except HasherBusy:
+            return render_template('register.html', form=form), 503, {'Retry-After': '1'}
         new_user = Users(
             username=form.username.data,
             password=hashed_password,
@@ -31,11 +44,11 @@ def register():
         )
         db.session.add(new_user)
         db.session.commit()
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
     return render_template('register.html', form=form)
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('login')) 
\ No newline at end of file
+    return redirect(url_for('auth.login')) 
\ No newline at end of file
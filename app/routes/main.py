@@ -1,46 +1,60 @@
-from flask import render_template
+from flask import Blueprint, render_template
 from flask_login import login_required, current_user
-from app import app
 from app.models.models import LearningPaths, Courses, Lessons
+from app.services.fragment_cache import fragment_cache
 
-@app.context_processor
+bp = Blueprint('main', __name__)
+
+@bp.app_context_processor
 def inject_user_id():
     if current_user.is_authenticated:
         return {'userId': current_user.id}
     else:
         return {'userId': None}
 
-@app.route('/')
+@bp.route('/')
 def home():
     return render_template('home.html')
 
-@app.route('/dashboard', methods=['GET', 'POST'])
+@bp.route('/dashboard', methods=['GET', 'POST'])
 @login_required
 def dashboard():
     learning_paths = current_user.learning_paths
     return render_template('dashboard.html', name=current_user.name, learning_paths=learning_paths)
 
-@app.route('/profile', methods=['GET', 'POST'])
+@bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
     return render_template('profile.html')
 
-@app.route('/liked', methods=['GET', 'POST'])
+@bp.route('/liked', methods=['GET', 'POST'])
 @login_required
 def liked():
     return render_template('liked.html')
 
-@app.route('/learningpath/<int:path_id>', methods=['GET', 'POST'])
+@bp.route('/learningpath/<int:path_id>', methods=['GET', 'POST'])
 @login_required
 def learningpath(path_id):
-    courses = Courses.query.filter_by(learning_path_id=path_id).all()
-    course_titles = [{'id':course.id, 'title': course.title} for course in courses]
-    return render_template('learningpath.html', courses=course_titles)
+    def render():
+        courses = Courses.query.filter_by(learning_path_id=path_id).all()
+        course_titles = [{'id':course.id, 'title': course.title} for course in courses]
+        return render_template('learningpath_courses.html', courses=course_titles)
+
+    courses_html = fragment_cache.get_or_render('learningpath', path_id, current_user.id, render)
+    return render_template('learningpath.html', courses_html=courses_html)
 
-@app.route('/course/<int:course_id>/<path:course_title>', methods=['GET', 'POST'])
+@bp.route('/course/<int:course_id>/<path:course_title>', methods=['GET', 'POST'])
 @login_required
 def course(course_id, course_title):
     decoded_course_title = course_title.replace('-', ' ')
-    lessons = Lessons.query.filter_by(course_id=course_id).all()
-    lessons_titles = [{'id':lesson.id, 'title': lesson.title, 'completed': lesson.completed} for lesson in lessons]
-    return render_template('course.html', lessons=lessons_titles, course_title=decoded_course_title) 
\ No newline at end of file
+
+    def render():
+        lessons = (Lessons.query.with_entities(Lessons.id, Lessons.title, Lessons.completed,
+                                               Lessons.content_hash.isnot(None).label('generated'))
+                   .filter_by(course_id=course_id).order_by(Lessons.id).all())
+        lessons_titles = [{'id':lesson.id, 'title': lesson.title, 'completed': lesson.completed,
+                           'generated': lesson.generated} for lesson in lessons]
+        return render_template('course_lessons.html', lessons=lessons_titles)
+
+    lessons_html = fragment_cache.get_or_render('course', course_id, current_user.id, render)
+    return render_template('course.html', lessons_html=lessons_html, course_title=decoded_course_title, course_id=course_id)
\ No newline at end of file
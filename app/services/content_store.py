@@ -0,0 +1,208 @@
+import hashlib
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from config.config import Config
+from app import db
+from app.models.models import LessonBlobs
+from app.utils.rendering import render_markdown, rendering_available, RENDERER_VERSION
+
+try:
+    import zstandard
+except ImportError:  # Optional; blobs are written with zlib instead
+    zstandard = None
+
+
+def blob_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def encode(text: str, codec: str, level: int = Config.CONTENT_STORE_LEVEL) -> Tuple[str, bytes]:
+    """
+    Compress a lesson body with the given codec
+
+    Returns:
+        tuple: (codec actually used, data); 'none' when compression does not pay off
+    """
+    raw = text.encode('utf-8')
+    if codec == 'zstd' and zstandard is None:
+        codec = 'zlib'
+    if codec == 'zstd':
+        data = zstandard.ZstdCompressor(level=level).compress(raw)
+    elif codec == 'zlib':
+        data = zlib.compress(raw, level)
+    else:
+        return 'none', raw
+    if len(data) >= len(raw):
+        return 'none', raw
+    return codec, data
+
+
+def decode(codec: str, data: bytes) -> str:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Lesson blob is zstd-compressed but zstandard is not installed")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == 'zlib':
+        data = zlib.decompress(data)
+    return data.decode('utf-8')
+
+
+class ContentStore:
+    """
+    Content-addressed, compressed storage for lesson bodies
+
+    Blobs are keyed by the SHA-256 of the text, so identical lessons of
+    different users share one row. Each referencing lesson holds one count;
+    blobs whose count dropped to zero are removed by collect_garbage().
+    put() and release() only stage changes in the current session, the
+    caller commits them together with the lesson.
+
+    New bodies are also rendered to sanitized HTML once, stored next to the
+    markdown, so every lesson sharing the blob is served without re-rendering.
+    """
+
+    def __init__(self, codec: str = Config.CONTENT_STORE_CODEC, level: int = Config.CONTENT_STORE_LEVEL):
+        if codec == 'zstd' and zstandard is None:
+            print("zstandard is not installed, compressing lesson bodies with zlib")
+            codec = 'zlib'
+        self.codec = codec
+        self.level = level
+        self._lock = threading.Lock()
+        self._reads = 0
+        self._decode_seconds = 0.0
+        self._renders = 0
+        self._render_seconds = 0.0
+
+    def put(self, text: str) -> str:
+        """Store a body (or add a reference to an identical one) and return its hash"""
+        digest = blob_hash(text)
+        if self._add_reference(digest):
+            return digest
+
+        codec, data = encode(text, self.codec, self.level)
+        html_codec, html, html_version = self._render(text)
+        try:
+            with db.session.begin_nested():
+                db.session.add(LessonBlobs(hash=digest, codec=codec, data=data,
+                                           size=len(text.encode('utf-8')), refcount=1,
+                                           html_codec=html_codec, html=html, html_version=html_version))
+        except IntegrityError:
+            # Another writer stored the same body in the meantime
+            self._add_reference(digest)
+        return digest
+
+    def release(self, digest: str):
+        """Drop one reference to a blob"""
+        db.session.execute(update(LessonBlobs).where(LessonBlobs.hash == digest)
+                           .values(refcount=LessonBlobs.refcount - 1))
+
+    def get(self, digest: str) -> Optional[str]:
+        """Decompressed body of a blob, or None if it does not exist"""
+        row = (db.session.query(LessonBlobs.codec, LessonBlobs.data)
+               .filter(LessonBlobs.hash == digest).first())
+        if row is None:
+            return None
+
+        started = time.perf_counter()
+        text = decode(row.codec, row.data)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._reads += 1
+            self._decode_seconds += elapsed
+        return text
+
+    def get_html(self, digest: str) -> Optional[str]:
+        """
+        Sanitized HTML of a blob, rendered and stored on first use
+
+        Returns:
+            str: The HTML, or None if the blob does not exist or rendering is unavailable
+        """
+        row = (db.session.query(LessonBlobs.codec, LessonBlobs.data, LessonBlobs.html_codec,
+                                LessonBlobs.html, LessonBlobs.html_version)
+               .filter(LessonBlobs.hash == digest).first())
+        if row is None:
+            return None
+        if row.html is not None and row.html_version == RENDERER_VERSION:
+            return decode(row.html_codec, row.html)
+
+        # Stored before rendering existed, or with older rules
+        html_codec, html, html_version = self._render(decode(row.codec, row.data))
+        if html is None:
+            return None
+        blobs = LessonBlobs.__table__
+        with db.engine.begin() as connection:
+            connection.execute(update(blobs).where(blobs.c.hash == digest)
+                               .values(html_codec=html_codec, html=html, html_version=html_version))
+        return decode(html_codec, html)
+
+    def etag(self, digest: str) -> str:
+        """
+        Strong validator for a blob served with its HTML
+
+        The body is fixed by the hash; the HTML also by the renderer version.
+        """
+        return f"{digest}-r{RENDERER_VERSION}" if rendering_available() else digest
+
+    def collect_garbage(self) -> int:
+        """
+        Delete blobs no lesson references anymore
+
+        Returns:
+            int: Number of blobs removed
+        """
+        removed = LessonBlobs.query.filter(LessonBlobs.refcount <= 0).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+    def get_stats(self) -> dict:
+        """Storage saved by dedup and compression, and the decode cost per read"""
+        blobs, references, stored_bytes, unique_bytes, logical_bytes = db.session.query(
+            func.count(LessonBlobs.hash),
+            func.coalesce(func.sum(LessonBlobs.refcount), 0),
+            func.coalesce(func.sum(func.length(LessonBlobs.data)), 0),
+            func.coalesce(func.sum(LessonBlobs.size), 0),
+            func.coalesce(func.sum(LessonBlobs.size * LessonBlobs.refcount), 0),
+        ).one()
+        with self._lock:
+            reads, decode_seconds = self._reads, self._decode_seconds
+            renders, render_seconds = self._renders, self._render_seconds
+        return {
+            'codec': self.codec,
+            'blobs': blobs,
+            'references': references,
+            'logical_bytes': logical_bytes,
+            'unique_bytes': unique_bytes,
+            'stored_bytes': stored_bytes,
+            'saved_bytes': logical_bytes - stored_bytes,
+            'saved_ratio': round(1 - stored_bytes / logical_bytes, 4) if logical_bytes else 0.0,
+            'reads': reads,
+            'avg_decode_ms': round(1000 * decode_seconds / reads, 4) if reads else 0.0,
+            'renders': renders,
+            'avg_render_ms': round(1000 * render_seconds / renders, 4) if renders else 0.0,
+        }
+
+    def _render(self, text: str) -> Tuple[Optional[str], Optional[bytes], Optional[int]]:
+        started = time.perf_counter()
+        html = render_markdown(text)
+        if html is None:
+            return None, None, None
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._renders += 1
+            self._render_seconds += elapsed
+        codec, data = encode(html, self.codec, self.level)
+        return codec, data, RENDERER_VERSION
+
+    def _add_reference(self, digest: str) -> bool:
+        result = db.session.execute(update(LessonBlobs).where(LessonBlobs.hash == digest)
+                                    .values(refcount=LessonBlobs.refcount + 1))
+        return result.rowcount > 0
+
+
+# Global instance
+content_store = ContentStore()
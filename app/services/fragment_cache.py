@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+from markupsafe import Markup
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from config.config import Config
+from app import db
+from app.models.models import CacheVersions
+
+
+class FragmentCache:
+    """
+    Rendered page fragments keyed by user, entity and the entity's version
+
+    The course sidebar and the learning path grid only change when lessons
+    or courses are written. Those writes call bump() in their transaction,
+    which moves the entity's counter in cache_versions on. Every worker
+    process reads the counter, so all of them stop serving the old fragment
+    at once. A hit costs one primary key lookup and no rendering. Entries
+    are evicted least recently used first once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = Config.FRAGMENT_CACHE_MAX_BYTES,
+                 enabled: bool = Config.FRAGMENT_CACHE_ENABLED):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'bumps': 0,
+        }
+
+    def get_or_render(self, kind: str, entity_id: int, user_id: int, render: Callable[[], str]) -> Markup:
+        """
+        Cached fragment, rendered (queries included) only on a miss
+
+        Args:
+            kind (str): Fragment type, e.g. 'course' or 'learningpath'
+            entity_id (int): Id of the course/learning path shown
+            user_id (int): Viewer; fragments are never shared between users
+            render: Builds the HTML; called without holding any lock
+        """
+        if not self.enabled:
+            return Markup(render())
+
+        key = (user_id, kind, entity_id, self.version(kind, entity_id))
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return Markup(html)
+            self._stats['misses'] += 1
+
+        html = str(render())
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = html
+                self._bytes += len(html)
+                while self._bytes > self.max_bytes and self._entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+                    self._stats['evictions'] += 1
+        return Markup(html)
+
+    def version(self, kind: str, entity_id: int) -> int:
+        key = f"{kind}:{entity_id}"
+        return db.session.query(CacheVersions.version).filter(CacheVersions.key == key).scalar() or 0
+
+    def bump(self, kind: str, entity_ids: Iterable[int]):
+        """
+        Invalidate the fragments of some entities
+
+        Only stages the change in the current session; it takes effect when
+        the caller commits its write, so readers never cache the old data
+        under the new version.
+        """
+        for entity_id in set(entity_ids):
+            key = f"{kind}:{entity_id}"
+            result = db.session.execute(update(CacheVersions).where(CacheVersions.key == key)
+                                        .values(version=CacheVersions.version + 1))
+            if result.rowcount == 0:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(CacheVersions(key=key, version=1))
+                except IntegrityError:
+                    # Another writer created the counter in the meantime
+                    db.session.execute(update(CacheVersions).where(CacheVersions.key == key)
+                                       .values(version=CacheVersions.version + 1))
+            with self._lock:
+                self._stats['bumps'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# Global instance
+fragment_cache = FragmentCache()
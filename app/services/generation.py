@@ -0,0 +1,360 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+from flask import current_app
+from app import db
+from app.models.models import LearningPaths, Courses, Lessons, Jobs
+from app.utils.helpers import parse_prompt, parse_batched_prompt
+from app.services.llm_service import llm_service
+from app.services.single_flight import single_flight
+from app.services.job_queue import job_queue, QUEUED, RUNNING
+from app.services.retrieval import index_lesson
+from app.services.content_store import content_store
+from app.services.fragment_cache import fragment_cache
+from app.services.persistence import save_learning_path_tree, save_course_lessons
+from config.config import Config
+
+LEARNING_PATH_PROMPT = """
+        You are creating a personalized learning path for a user interested in {lp_title}.
+        Please provide the courses names only, ordered based on difficulty and correct ordering in the learning path, no another text in the string, only the courses names:
+
+        ## **Generate Output**:
+        Format the output to list only the names of the recommended courses under the header Personalized Learning Path: [Learning Path Name].
+        Ensure the output adheres strictly to the format provided, without including any descriptive text, comments, or conversational elements.
+
+        ## **Output Format:**
+        ```
+        # Personalized Learning Path: [Learning Path Name]
+        1. [Course Name 1]
+        2. [Course Name 2]
+        3. (repeat as necessary for additional courses)
+        ```
+        """
+
+LESSONS_PROMPT = """
+        # Generating a Personalized Lessons
+        You are creating a course for a user interested in learning about {course_title}, This course from this learning paths {learning_paths}.
+        Please provide proper number of lesson titles that would be suitable for this course, and no other text, just lessons tiles, each prefixed with a number, don't write anything else.
+
+        ## **Generate Output**:
+        Format the output to list only the names of the recommended lessons title from course {course_title} under the header Personalized Lessons Of Course: {course_title}.
+        Ensure the output adheres strictly to the format provided, without including any descriptive text, comments, or conversational elements.
+
+        ## **Output Format:**
+        ```
+        # Personalized Learning Path: [Course Name]
+        1. [Lesson Name 1]
+        2. [Lesson Name 2]
+        3. (repeat as necessary for additional Lessons)
+        ```
+        """
+
+BATCHED_LESSONS_PROMPT = """
+        # Generating Personalized Lessons For A Whole Learning Path
+        You are creating the courses of the learning path "{lp_title}". For every course listed below, provide a proper number of lesson titles suitable for that course, and no other text.
+
+        ## **Courses:**
+{course_list}
+
+        ## **Generate Output**:
+        Write one section per course, in the same order, starting with a header that repeats the course number and name exactly.
+        Under each header list only the lesson titles, each prefixed with a number.
+        Ensure the output adheres strictly to the format provided, without including any descriptive text, comments, or conversational elements.
+
+        ## **Output Format:**
+        ```
+        ## Course 1: [Course Name 1]
+        1. [Lesson Name 1]
+        2. [Lesson Name 2]
+        ## Course 2: [Course Name 2]
+        1. [Lesson Name 1]
+        2. (repeat as necessary for additional Lessons and Courses)
+        ```
+        """
+
+CONTENT_PROMPT = """
+    Lesson: {lesson_title}"
+
+    Lesson Overview:
+    In this lesson, we will delve into the key topics related to "{lesson_title}" in "{course_title}", Please provide detailed content covering the following aspects within the course "{course_title}":
+
+    Key Topics to Cover:
+    1.
+    2.
+    3.
+
+    **Examples and Explanations:**
+    - Please include illustrative examples to clarify the concepts.
+    - Provide detailed explanations to ensure comprehension.
+
+    **Exercises:**
+    - Develop exercises or problems related to the lesson topics.
+    - Include solutions or hints where applicable.
+
+    **Additional Notes:**
+    Feel free to add any additional insights or details that would enhance this lesson.
+
+    **Instructions:**
+    - Do not use (Here Markdown) or (Here XYZ) or any form of conversations just give me the content without any additional conversations
+    - Design a Markdown template focusing on individual lessons within a course.
+    """
+
+
+def generate_learning_path(user_id: int, lp_title: str) -> int:
+    """Generate a learning path and its courses, returning the new path id"""
+    prompt = LEARNING_PATH_PROMPT.format(lp_title=lp_title)
+    response_llm = llm_service.generate_response(prompt)
+    courses_titles = parse_prompt(response_llm)
+
+    path_id = save_learning_path_tree(user_id, lp_title, [(course, []) for course in courses_titles])
+
+    if Config.BATCHED_LESSON_GENERATION and courses_titles:
+        job_queue.enqueue('generate_path_lessons', {'path_id': path_id, 'user_id': user_id}, user_id=user_id)
+
+    return path_id
+
+
+def generate_lessons(course_id: int, course_title: str, user_id: int) -> bool:
+    """
+    Generate the lessons of a course once, even under concurrent requests
+
+    Returns:
+        bool: True if lessons were created, False if the course already had lessons
+    """
+    def work():
+        existing_lesson = db.session.query(Lessons.id).filter_by(course_id=course_id).first()
+        if existing_lesson:
+            return False
+
+        learning_paths = LearningPaths.query.filter_by(user_id=user_id).all()
+        prompt = LESSONS_PROMPT.format(course_title=course_title, learning_paths=learning_paths)
+        response_llm = llm_service.generate_response(prompt)
+        lesson_titles = parse_prompt(response_llm)
+
+        _save_lessons(course_id, course_title, lesson_titles, user_id)
+        return True
+
+    return single_flight.do(f"course:{course_id}", work)
+
+
+def generate_path_lessons(path_id: int, user_id: int) -> dict:
+    """
+    Generate the lessons of every course of a learning path in one LLM call
+
+    The response is split per course; only courses whose section could not
+    be parsed fall back to their own generate_lessons call.
+
+    Returns:
+        dict: Course ids split into "batched" and "fallback", or None when
+        the path does not exist or belongs to another user
+    """
+    path = db.session.get(LearningPaths, path_id)
+    if path is None or path.user_id != user_id:
+        return None
+
+    courses = Courses.query.filter_by(learning_path_id=path_id).order_by(Courses.id).all()
+    with_lessons = {course_id for (course_id,) in db.session.query(Lessons.course_id)
+                    .filter(Lessons.course_id.in_([course.id for course in courses])).distinct()}
+    courses = [(course.id, course.title) for course in courses if course.id not in with_lessons]
+    if not courses:
+        return {'batched': [], 'fallback': []}
+
+    course_list = '\n'.join(f"        {index}. {title}" for index, (_, title) in enumerate(courses, 1))
+    prompt = BATCHED_LESSONS_PROMPT.format(lp_title=path.title, course_list=course_list)
+    response_llm = llm_service.generate_response(prompt, max_length=Config.BATCHED_LESSONS_MAX_LENGTH)
+    lessons_by_course = parse_batched_prompt(response_llm, [title for _, title in courses])
+
+    batched, fallback = [], []
+    for index, (course_id, course_title) in enumerate(courses):
+        lesson_titles = lessons_by_course.get(index)
+        if lesson_titles:
+            def work(course_id=course_id, course_title=course_title, lesson_titles=lesson_titles):
+                if db.session.query(Lessons.id).filter_by(course_id=course_id).first():
+                    return False
+                _save_lessons(course_id, course_title, lesson_titles, user_id)
+                return True
+            single_flight.do(f"course:{course_id}", work)
+            batched.append(course_id)
+        else:
+            generate_lessons(course_id, course_title, user_id)
+            fallback.append(course_id)
+
+    return {'batched': batched, 'fallback': fallback}
+
+
+def _save_lessons(course_id: int, course_title: str, lesson_titles: list, user_id: int):
+    save_course_lessons({course_id: lesson_titles})
+
+    if Config.PREGENERATE_LESSON_CONTENT and lesson_titles:
+        job_queue.enqueue('pregenerate_course', {'course_id': course_id, 'course_title': course_title}, user_id=user_id)
+
+
+def generate_lesson_content(lesson_id: int, lesson_title: str, course_title: str) -> Optional[str]:
+    """
+    Return the content of a lesson, generating and saving it on first use
+
+    Concurrent requests for the same lesson share a single LLM call.
+
+    Returns:
+        str: The lesson content, or None if the lesson does not exist
+    """
+    def work():
+        # Re-read the row: another worker may have filled it while we waited
+        lesson = db.session.get(Lessons, lesson_id, populate_existing=True)
+        if lesson is None:
+            return None
+        if lesson.content:
+            return lesson.content
+
+        prompt = CONTENT_PROMPT.format(lesson_title=lesson_title, course_title=course_title)
+        response_llm = llm_service.generate_response(prompt, max_length=1000)
+        response_llm = response_llm.replace("```html", "").replace("```", "").strip()
+
+        _save_content(lesson, response_llm)
+        return response_llm
+
+    return single_flight.do(f"lesson:{lesson_id}", work)
+
+
+def lesson_content_hash(lesson_id: int) -> Optional[str]:
+    """Hash of a lesson's content blob, None if the lesson does not exist or has no content yet"""
+    return db.session.query(Lessons.content_hash).filter(Lessons.id == lesson_id).scalar()
+
+
+def lesson_html(lesson_id: int) -> Optional[str]:
+    """Sanitized HTML of a lesson's content, None if it has none or rendering is unavailable"""
+    content_hash = lesson_content_hash(lesson_id)
+    if not content_hash:
+        return None
+    return content_store.get_html(content_hash)
+
+
+def stream_lesson_content(lesson_id: int, lesson_title: str, course_title: str) -> Iterator[str]:
+    """
+    Stream the content of a lesson while it is generated, then save it
+
+    Existing content, or content another request is already generating,
+    is returned as a single chunk. The stream holds the lesson's
+    single-flight key, so concurrent requests in any worker wait for it
+    instead of calling the LLM again. Content is only saved when the stream
+    completes; an interrupted stream raises StreamInterrupted and leaves the
+    lesson without content.
+
+    Yields:
+        str: Pieces of the lesson content
+    """
+    lesson = db.session.get(Lessons, lesson_id)
+    if lesson is None:
+        return
+    if lesson.content:
+        yield lesson.content
+        return
+
+    with single_flight.lead(f"lesson:{lesson_id}") as call:
+        if call is None:
+            # Another request of this process is generating it; wait for its result
+            content = generate_lesson_content(lesson_id, lesson_title, course_title)
+            if content:
+                yield content
+            return
+
+        # Another worker may have generated it while we waited for the lock
+        lesson = db.session.get(Lessons, lesson_id, populate_existing=True)
+        if lesson is None:
+            return
+        if lesson.content:
+            call.finish(lesson.content)
+            yield lesson.content
+            return
+
+        prompt = CONTENT_PROMPT.format(lesson_title=lesson_title, course_title=course_title)
+        chunks = []
+        for chunk in llm_service.stream_response(prompt, max_length=1000):
+            chunks.append(chunk)
+            yield chunk
+
+        content = ''.join(chunks).replace("```html", "").replace("```", "").strip()
+        _save_content(lesson, content)
+        call.finish(content)
+
+
+def _save_content(lesson: Lessons, content: str):
+    # The chat retrieval index is rebuilt in the same transaction
+    lesson.content = content
+    index_lesson(lesson.id, content)
+    fragment_cache.bump('course', [lesson.course_id])
+    db.session.commit()
+
+
+def pregenerate_course_content(course_id: int, course_title: str,
+                               concurrency: int = Config.PREGENERATE_CONCURRENCY) -> int:
+    """
+    Generate the content of every lesson of a course that has none yet
+
+    Lessons run with bounded parallelism through the single-flight path, so a
+    user opening one of them meanwhile waits on the same call.
+
+    Returns:
+        int: Number of lessons that now have content
+    """
+    pending = (db.session.query(Lessons.id, Lessons.title)
+               .filter(Lessons.course_id == course_id, Lessons.content_hash.is_(None))
+               .order_by(Lessons.id).all())
+    if not pending:
+        return 0
+
+    app = current_app._get_current_object()
+
+    def work(lesson):
+        with app.app_context():
+            return generate_lesson_content(lesson.id, lesson.title, course_title) is not None
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='pregenerate') as executor:
+        return sum(executor.map(work, pending))
+
+
+def course_progress(course_id: int) -> dict:
+    """How many lessons of a course already have content"""
+    lessons = (db.session.query(Lessons.id, Lessons.content_hash.is_(None))
+               .filter(Lessons.course_id == course_id).all())
+    ready_ids = [lesson_id for lesson_id, missing in lessons if not missing]
+    total = len(lessons)
+
+    active_jobs = (Jobs.query.with_entities(Jobs.payload)
+                   .filter(Jobs.kind == 'pregenerate_course', Jobs.status.in_([QUEUED, RUNNING])).all())
+    pregenerating = any(json.loads(payload).get('course_id') == course_id for (payload,) in active_jobs)
+
+    return {
+        'course_id': course_id,
+        'total': total,
+        'ready': len(ready_ids),
+        'percent': round(100 * len(ready_ids) / total) if total else 0,
+        'ready_lesson_ids': ready_ids,
+        'pregenerating': pregenerating,
+    }
+
+
+@job_queue.handler('generate_learning_path')
+def _generate_learning_path_job(user_id: int, lp_title: str) -> dict:
+    return {'id': generate_learning_path(user_id, lp_title)}
+
+
+@job_queue.handler('generate_lessons')
+def _generate_lessons_job(course_id: int, course_title: str, user_id: int) -> dict:
+    created = generate_lessons(course_id, course_title, user_id)
+    return {'id': course_id, 'course_title': course_title, 'created': created}
+
+
+@job_queue.handler('generate_path_lessons')
+def _generate_path_lessons_job(path_id: int, user_id: int) -> dict:
+    return generate_path_lessons(path_id, user_id)
+
+
+@job_queue.handler('generate_content')
+def _generate_content_job(lesson_id: int, lesson_title: str, course_title: str) -> dict:
+    return {'content': generate_lesson_content(lesson_id, lesson_title, course_title)}
+
+
+@job_queue.handler('pregenerate_course')
+def _pregenerate_course_job(course_id: int, course_title: str) -> dict:
+    return {'course_id': course_id, 'generated': pregenerate_course_content(course_id, course_title)}
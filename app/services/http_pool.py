@@ -0,0 +1,165 @@
+import threading
+import time
+import weakref
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from config.config import Config
+
+
+class PoolStats:
+    """Thread-safe counters shared by every connection pool of a transport"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.opened = 0
+        self.reused = 0
+        self.expired = 0
+        self.requests = 0
+        self.idle = 0
+
+    def checkout(self, reused: bool):
+        with self._lock:
+            self.active += 1
+            self.requests += 1
+            if reused:
+                self.reused += 1
+            else:
+                self.opened += 1
+
+    def checkin(self):
+        with self._lock:
+            self.active = max(0, self.active - 1)
+
+    def expire(self):
+        with self._lock:
+            self.expired += 1
+
+    def park(self, idle: set, conn):
+        """A connected connection went back into a pool"""
+        with self._lock:
+            if conn not in idle:
+                idle.add(conn)
+                self.idle += 1
+
+    def unpark(self, idle: set, conn):
+        """A connection left a pool: checked out, or discarded"""
+        with self._lock:
+            if conn in idle:
+                idle.discard(conn)
+                self.idle -= 1
+
+    def unpark_all(self, idle: set):
+        with self._lock:
+            self.idle -= len(idle)
+            idle.clear()
+
+
+class _TrackedPoolMixin:
+    """
+    Counts connection checkouts and idle connections, and drops idle
+    keep-alive connections that are older than the configured keep-alive
+    lifetime
+    """
+
+    stats: PoolStats = None
+    keepalive: float = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._idle = set()  # Connected connections waiting in this pool
+        # urllib3 drops evicted pools without close(); their connections go with them
+        weakref.finalize(self, self.stats.unpark_all, self._idle)
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        self.stats.unpark(self._idle, conn)
+        released_at = getattr(conn, '_masari_released_at', None)
+        if released_at is not None and self.keepalive and time.monotonic() - released_at > self.keepalive:
+            conn.close()
+            self.stats.expire()
+        is_connected = getattr(conn, 'is_connected', None)
+        self.stats.checkout(reused=bool(is_connected))
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._masari_released_at = time.monotonic()
+            if conn.sock is not None:
+                self.stats.park(self._idle, conn)
+        self.stats.checkin()
+        super()._put_conn(conn)
+        if conn is not None and conn.sock is None:
+            # Closed instead of pooled: the pool was full or closed
+            self.stats.unpark(self._idle, conn)
+
+    def close(self):
+        super().close()
+        self.stats.unpark_all(self._idle)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pool manager builds tracked connection pools"""
+
+    def __init__(self, stats: PoolStats, keepalive: float, **kwargs):
+        attrs = {'stats': stats, 'keepalive': keepalive}
+        self._pool_classes = {
+            'http': type('TrackedHTTPConnectionPool', (_TrackedPoolMixin, HTTPConnectionPool), attrs),
+            'https': type('TrackedHTTPSConnectionPool', (_TrackedPoolMixin, HTTPSConnectionPool), attrs),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+
+class PooledTransport:
+    """
+    Shared keep-alive HTTP transport for outgoing LLM calls
+
+    One requests.Session is shared by all threads; connections to each host
+    are pooled and reused instead of paying a TCP+TLS handshake per call.
+    """
+
+    def __init__(self,
+                 pool_connections: int = Config.LLM_POOL_CONNECTIONS,
+                 pool_maxsize: int = Config.LLM_POOL_MAXSIZE,
+                 pool_block: bool = Config.LLM_POOL_BLOCK,
+                 connect_timeout: float = Config.LLM_CONNECT_TIMEOUT,
+                 read_timeout: float = Config.LLM_READ_TIMEOUT,
+                 keepalive: float = Config.LLM_KEEPALIVE_SECONDS):
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = PoolStats()
+        self.pool_maxsize = pool_maxsize
+        self._adapter = _PooledAdapter(
+            self.stats,
+            keepalive,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+    def post(self, url: str, timeout: Optional[tuple] = None, **kwargs) -> requests.Response:
+        """POST through the shared pool, using the configured timeouts by default"""
+        return self.session.post(url, timeout=timeout or self.timeout, **kwargs)
+
+    def get_stats(self) -> dict:
+        """Return a snapshot of connection pool usage"""
+        return {
+            'active': self.stats.active,
+            'idle': self.stats.idle,
+            'reused': self.stats.reused,
+            'opened': self.stats.opened,
+            'expired': self.stats.expired,
+            'requests': self.stats.requests,
+            'max_per_host': self.pool_maxsize,
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,195 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from flask import current_app
+from sqlalchemy import update
+from config.config import Config
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class JobQueue:
+    """
+    In-process background job queue backed by the jobs table
+
+    Jobs are claimed with a conditional UPDATE, so several worker processes
+    can poll the same table without running a job twice. Failed jobs are
+    retried with exponential backoff until max_attempts is reached.
+    """
+
+    def __init__(self,
+                 workers: int = Config.JOB_WORKERS,
+                 max_attempts: int = Config.JOB_MAX_ATTEMPTS,
+                 retry_backoff: float = Config.JOB_RETRY_BACKOFF,
+                 poll_interval: float = Config.JOB_POLL_INTERVAL,
+                 stale_after: float = Config.JOB_STALE_AFTER):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._handlers = {}
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def handler(self, kind: str) -> Callable:
+        """Decorator registering the function that runs jobs of this kind"""
+        def register(fn):
+            self._handlers[kind] = fn
+            return fn
+        return register
+
+    def enqueue(self, kind: str, payload: dict, user_id: Optional[int] = None):
+        """
+        Persist a job and wake a worker
+
+        Args:
+            kind (str): Registered handler name
+            payload (dict): Keyword arguments for the handler
+            user_id (int): Owner of the job, checked by the status endpoint
+
+        Returns:
+            Jobs: The queued job row
+        """
+        from app import db
+        from app.models.models import Jobs
+
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = Jobs(kind=kind, payload=json.dumps(payload), status=QUEUED,
+                   max_attempts=self.max_attempts, user_id=user_id)
+        db.session.add(job)
+        db.session.commit()
+
+        self.start()
+        self._wakeup.set()
+        return job
+
+    def start(self, app=None):
+        """Start the worker threads once per process, for the given or the current app"""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if self._threads or self.workers <= 0:
+                return
+            app = app or current_app._get_current_object()
+            self._stopping.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, args=(app,), name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5):
+        """Ask the worker threads to exit after their current job"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_pending(self) -> int:
+        """Run queued jobs in the calling thread until none is due; returns how many ran"""
+        count = 0
+        while self._run_one():
+            count += 1
+        return count
+
+    def _worker(self, app):
+        with app.app_context():
+            self._requeue_stale()
+
+        while not self._stopping.is_set():
+            try:
+                with app.app_context():
+                    ran = self._run_one()
+            except Exception as e:
+                print(f"Job worker error: {e}")
+                ran = False
+            if not ran:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _claim(self):
+        from app import db
+        from app.models.models import Jobs
+
+        now = datetime.utcnow()
+        candidates = (Jobs.query.with_entities(Jobs.id)
+                      .filter(Jobs.status == QUEUED, Jobs.run_after <= now)
+                      .order_by(Jobs.id).limit(self.workers + 1).all())
+        for (job_id,) in candidates:
+            claimed = db.session.execute(
+                update(Jobs)
+                .where(Jobs.id == job_id, Jobs.status == QUEUED)
+                .values(status=RUNNING, attempts=Jobs.attempts + 1, updated_at=now)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(Jobs, job_id, populate_existing=True)
+        return None
+
+    def _run_one(self) -> bool:
+        from app import db
+
+        job = self._claim()
+        if job is None:
+            return False
+
+        handler = self._handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind: {job.kind}")
+            result = handler(**json.loads(job.payload))
+            job.result = json.dumps(result)
+            job.error = None
+            job.status = SUCCEEDED
+        except Exception as e:
+            db.session.rollback()
+            job.error = str(e)
+            if job.attempts < job.max_attempts and handler is not None:
+                delay = self.retry_backoff * (2 ** (job.attempts - 1))
+                job.status = QUEUED
+                job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            else:
+                job.status = FAILED
+            print(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed: {e}")
+        db.session.commit()
+        return True
+
+    def _requeue_stale(self):
+        # Jobs left running by a worker process that died are queued again
+        from app import db
+        from app.models.models import Jobs
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        db.session.execute(
+            update(Jobs)
+            .where(Jobs.status == RUNNING, Jobs.updated_at < cutoff)
+            .values(status=QUEUED, run_after=datetime.utcnow())
+        )
+        db.session.commit()
+
+
+def job_to_dict(job) -> dict:
+    """Public representation of a job for the status endpoint"""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+# Global instance
+job_queue = JobQueue()
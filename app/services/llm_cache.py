@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from config.config import Config
+
+
+class LLMCache:
+    """
+    Prompt -> completion cache for LLM responses
+
+    Entries live in an in-process LRU with a TTL and are written through to a
+    SQLite table, so they survive restarts and are shared by every worker
+    process pointing at the same file. Expired and least recently used rows
+    are removed every evict_every writes, so the table can briefly hold a
+    few more than disk_max_entries rows.
+    """
+
+    def __init__(self,
+                 path: str = Config.LLM_CACHE_PATH,
+                 max_entries: int = Config.LLM_CACHE_MAX_ENTRIES,
+                 disk_max_entries: int = Config.LLM_CACHE_DISK_MAX_ENTRIES,
+                 ttl: float = Config.LLM_CACHE_TTL,
+                 evict_every: int = Config.LLM_CACHE_DISK_EVICT_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self.ttl = ttl
+        self.evict_every = max(1, evict_every)
+        self._writes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            'hits': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'disk_evictions': 0,
+        }
+        self._disk_ready = False
+
+    @staticmethod
+    def make_key(prompt: str, model: str, parameters: dict) -> str:
+        """Hash the whitespace-normalized prompt together with model and parameters"""
+        normalized_prompt = ' '.join(prompt.split())
+        raw = json.dumps([normalized_prompt, model, parameters], sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, prompt: str, model: str, parameters: dict) -> Optional[str]:
+        """Return a cached completion, or None on a miss"""
+        key = self.make_key(prompt, model, parameters)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._stats['memory_hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+
+        row = self._disk_get(key, now)
+        with self._lock:
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            self._stats['disk_hits'] += 1
+            self._remember(key, row[0], row[1])
+        return row[0]
+
+    def set(self, prompt: str, model: str, parameters: dict, value: str):
+        """Store a completion in memory and on disk"""
+        key = self.make_key(prompt, model, parameters)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+        self._disk_set(key, value, expires_at)
+
+    def clear(self):
+        """Drop every entry from memory and disk"""
+        with self._lock:
+            self._entries.clear()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM llm_cache')
+        except sqlite3.Error as e:
+            print(f"LLM cache clear error: {e}")
+
+    def get_stats(self) -> dict:
+        """Return hit/miss/eviction counters and current sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        try:
+            stats['disk_entries'] = self._connection().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        except sqlite3.Error:
+            stats['disk_entries'] = None
+        return stats
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        # Caller holds self._lock
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        if not self._disk_ready:
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS llm_cache ('
+                    'key TEXT PRIMARY KEY, '
+                    'value TEXT NOT NULL, '
+                    'expires_at REAL NOT NULL, '
+                    'last_access REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)')
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_cache_expires_at ON llm_cache (expires_at)')
+            self._disk_ready = True
+        return conn
+
+    def _disk_get(self, key: str, now: float):
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT value, expires_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            with conn:
+                if row[1] <= now:
+                    conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                    with self._lock:
+                        self._stats['expirations'] += 1
+                    return None
+                conn.execute('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+            return row
+        except sqlite3.Error as e:
+            print(f"LLM cache read error: {e}")
+            return None
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            # On the first write of the process and every evict_every writes after it
+            evict = self._writes % self.evict_every == 0
+            self._writes += 1
+        try:
+            conn = self._connection()
+            now = time.time()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                    (key, value, expires_at, now)
+                )
+            if evict:
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"LLM cache write error: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired rows, then the least recently used ones above disk_max_entries"""
+        with conn:
+            conn.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,))
+            overflow = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] - self.disk_max_entries
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM llm_cache WHERE key IN '
+                    '(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)',
+                    (overflow,)
+                )
+                with self._lock:
+                    self._stats['disk_evictions'] += overflow
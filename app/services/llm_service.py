@@ -1,24 +1,31 @@
-import requests
-import json
-from typing import Optional
+import os
+import time
+from typing import Iterator, Optional
 from config.config import Config
+from app.services.http_pool import PooledTransport
+from app.services.llm_cache import LLMCache
+from app.services.providers import build_providers
+from app.utils.lazy import LazyService
+from app.utils.metrics import record_llm_call
 
 class LLMService:
     """
     Service for interacting with free online LLMs
-    Currently using HuggingFace Inference API with a free model
+
+    Calls are routed between the providers enabled in Config.LLM_PROVIDERS
+    (HuggingFace Inference API, an OpenAI-compatible server) with the
+    rule-based generator as the last resort.
     """
     
     def __init__(self):
-        # Using HuggingFace Inference API with a free model
-        # You can get a free API key from https://huggingface.co/settings/tokens
-        self.api_url = f"https://api-inference.huggingface.co/models/{Config.HUGGINGFACE_MODEL}"
-        self.headers = {
-            "Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"
-        }
-        
-        # Fallback to a simple text generation service if HuggingFace is not available
-        self.fallback_url = "https://api.text-generator.io/v1/generate"
+        # Shared keep-alive connection pool, reused by every request thread
+        self.transport = PooledTransport()
+
+        # Prompt -> completion cache shared across restarts and workers
+        self.cache = LLMCache() if Config.LLM_CACHE_ENABLED else None
+
+        # Latency-aware router over the configured providers
+        self.router = build_providers(self.transport, self._fallback_generate)
     
     def generate_response(self, prompt: str, max_length: int = 500) -> str:
         """
@@ -31,33 +38,114 @@ class LLMService:
         Returns:
             str: Generated response
         """
+        started = time.perf_counter()
+        parameters = self._parameters(max_length)
+
+        cached = self._cached(prompt, parameters)
+        if cached is not None:
+            record_llm_call('generate', 'cached', started)
+            return cached
+
         try:
-            # Try HuggingFace API first
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_length": max_length,
-                    "temperature": 0.7,
-                    "do_sample": True
-                }
-            }
-            
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if isinstance(result, list) and len(result) > 0:
-                    return result[0].get('generated_text', '')
-                elif isinstance(result, dict):
-                    return result.get('generated_text', '')
-            
-            # Fallback to simple text generation
-            return self._fallback_generate(prompt, max_length)
-            
+            response = self.router.generate(prompt, parameters, on_success=self._remember(prompt, parameters))
+            record_llm_call('generate', 'ok', started)
+            return response
         except Exception as e:
             print(f"Error generating response: {e}")
-            return self._fallback_generate(prompt, max_length)
-    
+            response = self._fallback_generate(prompt, max_length)
+            record_llm_call('generate', 'fallback', started)
+            return response
+
+    def stream_response(self, prompt: str, max_length: int = 500) -> Iterator[str]:
+        """
+        Generate a response as a stream of text chunks
+
+        Tokens are relayed as the selected provider produces them. Cached
+        prompts are replayed in one chunk and the fallback is split by line.
+
+        Args:
+            prompt (str): The input prompt
+            max_length (int): Maximum length of the response
+
+        Yields:
+            str: Pieces of the generated response, in order
+
+        Raises:
+            StreamInterrupted: The provider failed after part of the response was sent
+        """
+        started = time.perf_counter()
+        parameters = self._parameters(max_length)
+
+        cached = self._cached(prompt, parameters)
+        if cached is not None:
+            record_llm_call('stream', 'cached', started, first_chunk=time.perf_counter())
+            yield cached
+            return
+
+        first_chunk, result = None, 'aborted'  # Left as aborted when the client goes away mid-stream
+        try:
+            for chunk in self.router.stream(prompt, parameters, on_success=self._remember(prompt, parameters)):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter()
+                yield chunk
+            result = 'ok'
+        except Exception:
+            result = 'error'
+            raise
+        finally:
+            record_llm_call('stream', result, started, first_chunk=first_chunk)
+
+    def _parameters(self, max_length: int) -> dict:
+        return {
+            "max_length": max_length,
+            "temperature": 0.7,
+            "do_sample": True
+        }
+
+    def _cached(self, prompt: str, parameters: dict) -> Optional[str]:
+        if not self.cache:
+            return None
+        for provider in self.router.providers:
+            cached = self.cache.get(prompt, provider.model, parameters)
+            if cached is not None:
+                return cached
+        return None
+
+    def _remember(self, prompt: str, parameters: dict):
+        # Only real model output is cached, never the rule-based fallback
+        def on_success(provider, text):
+            if self.cache and text:
+                self.cache.set(prompt, provider.model, parameters, text)
+        return on_success
+
+    def pool_stats(self) -> dict:
+        """
+        Connection pool statistics for the LLM transport
+
+        Returns:
+            dict: active, idle and reused connection counts
+        """
+        return self.transport.get_stats()
+
+    def backend_stats(self) -> dict:
+        """
+        Per-provider breaker, latency and routing statistics
+
+        Returns:
+            dict: breaker state and latency percentiles per provider, and the
+            router's latency/error windows per prompt class
+        """
+        return self.router.get_stats()
+
+    def cache_stats(self) -> dict:
+        """
+        Response cache statistics
+
+        Returns:
+            dict: hit, miss and eviction counters, or {} when caching is disabled
+        """
+        return self.cache.get_stats() if self.cache else {}
+
     def _fallback_generate(self, prompt: str, max_length: int) -> str:
         """
         Fallback method using a simple text generation approach
@@ -142,5 +230,7 @@ A comprehensive overview of {topic} with practical applications.
                 return words[i + 1].capitalize()
         return "the subject"
 
-# Global instance
-llm_service = LLMService() 
\ No newline at end of file
+# Global instance, built on first use
+llm_service = LazyService(LLMService)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=llm_service.reset)
@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import bcrypt
+from config.config import Config
+
+
+class HasherBusy(Exception):
+    """Raised when a hash can't be done now (queue full, timeout, pool restarting); the caller should answer 503"""
+
+
+def _hash(password: bytes, log_rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=log_rounds))
+
+
+def _check(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing off the request threads
+
+    Hashes run in a small process pool, so a burst of logins uses its own
+    cores instead of holding up other requests of the worker. At most
+    max_pending hashes may be queued or running; beyond that HasherBusy is
+    raised instead of letting requests pile up. A hash that times out keeps
+    its slot until it has really finished. With workers=0 hashing runs
+    inline on the calling thread.
+    """
+
+    def __init__(self,
+                 workers: int = Config.PASSWORD_HASH_WORKERS,
+                 max_pending: int = Config.PASSWORD_HASH_MAX_PENDING,
+                 log_rounds: int = Config.BCRYPT_LOG_ROUNDS,
+                 timeout: float = Config.PASSWORD_HASH_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.log_rounds = log_rounds
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            'hashes': 0,
+            'checks': 0,
+            'rejected': 0,
+            'seconds': 0.0,
+        }
+
+    def hash(self, password: str) -> str:
+        """bcrypt hash of a password at the configured cost"""
+        result = self._run(_hash, password.encode('utf-8'), self.log_rounds)
+        return result.decode('utf-8')
+
+    def check(self, password_hash: str, password: str) -> bool:
+        """Whether a password matches a stored hash; malformed hashes never match"""
+        try:
+            return self._run(_check, password.encode('utf-8'), password_hash.encode('utf-8'))
+        except ValueError:
+            return False
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if a hash was made with a different cost than the configured one"""
+        return self.log_rounds_of(password_hash) != self.log_rounds
+
+    @staticmethod
+    def log_rounds_of(password_hash: str) -> Optional[int]:
+        # $2b$12$<salt+hash>
+        parts = password_hash.split('$')
+        if len(parts) < 4 or not parts[2].isdigit():
+            return None
+        return int(parts[2])
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+        operations = stats['hashes'] + stats['checks']
+        stats['avg_ms'] = round(1000 * stats.pop('seconds') / operations, 2) if operations else 0.0
+        stats['workers'] = self.workers
+        stats['log_rounds'] = self.log_rounds
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def reset_after_fork(self):
+        # The parent's pool processes belong to the parent
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise HasherBusy(f"{self._pending} password hashes already pending")
+            self._pending += 1
+
+        started = time.monotonic()
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._release(fn, started)
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._release(fn, started)
+            self._discard(executor)
+            raise HasherBusy("Password hashing pool is restarting")
+        # The slot is freed when the hash is done, not when we stop waiting for it
+        future.add_done_callback(lambda _: self._release(fn, started))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy(f"Password hash took longer than {self.timeout}s")
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise HasherBusy("Password hashing pool is restarting")
+
+    def _release(self, fn, started: float):
+        with self._lock:
+            self._pending -= 1
+            self._stats['hashes' if fn is _hash else 'checks'] += 1
+            self._stats['seconds'] += time.monotonic() - started
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        # A pool process died; the next call starts a new pool
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Workers run job and flusher threads, so the pool must not be forked from them.
+                # The fork server only imports this module (and bcrypt), not the app.
+                context = None
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload([__name__])
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+
+# Global instance
+password_hasher = PasswordHasher()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=password_hasher.reset_after_fork)
@@ -0,0 +1,74 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import insert
+from app import db
+from app.models.models import LearningPaths, Courses, Lessons
+from app.services.fragment_cache import fragment_cache
+
+
+def save_learning_path_tree(user_id: int, title: str,
+                            courses: Sequence[Tuple[str, List[str]]],
+                            description: Optional[str] = None) -> int:
+    """
+    Insert a learning path with its courses and their lessons in one transaction
+
+    Courses and lessons are written with executemany-style bulk INSERTs, so a
+    whole tree costs one commit. Either everything is saved or nothing is.
+
+    Args:
+        user_id (int): Owner of the path
+        title (str): Learning path title
+        courses: (course title, lesson titles) pairs, in path order
+        description (str): Optional path description
+
+    Returns:
+        int: The new learning path id
+    """
+    try:
+        path_id = db.session.execute(
+            insert(LearningPaths).returning(LearningPaths.id),
+            [{'title': title, 'description': description, 'user_id': user_id}]
+        ).scalar_one()
+
+        course_ids = []
+        if courses:
+            course_ids = db.session.execute(
+                insert(Courses).returning(Courses.id, sort_by_parameter_order=True),
+                [{'title': course_title, 'learning_path_id': path_id, 'user_id': user_id}
+                 for course_title, _ in courses]
+            ).scalars().all()
+
+        lesson_rows = [{'title': lesson_title, 'course_id': course_id, 'completed': False}
+                       for course_id, (_, lesson_titles) in zip(course_ids, courses)
+                       for lesson_title in lesson_titles]
+        if lesson_rows:
+            db.session.execute(insert(Lessons), lesson_rows)
+
+        fragment_cache.bump('learningpath', [path_id])
+        fragment_cache.bump('course', course_ids)
+        db.session.commit()
+        return path_id
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def save_course_lessons(lessons_by_course: Dict[int, List[str]]) -> int:
+    """
+    Insert the lessons of one or more courses in one transaction
+
+    Returns:
+        int: Number of lessons inserted
+    """
+    rows = [{'title': lesson_title, 'course_id': course_id, 'completed': False}
+            for course_id, lesson_titles in lessons_by_course.items()
+            for lesson_title in lesson_titles]
+    if not rows:
+        return 0
+    try:
+        db.session.execute(insert(Lessons), rows)
+        fragment_cache.bump('course', lessons_by_course)
+        db.session.commit()
+        return len(rows)
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,364 @@
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Iterator, List, Optional
+from config.config import Config
+from app.services.http_pool import PooledTransport
+from app.services.resilience import ResilientCaller, CircuitOpenError
+
+CHAT = 'chat'
+CONTENT = 'content'
+
+
+class StreamInterrupted(Exception):
+    """A provider failed after part of its answer was already streamed"""
+
+
+class ProvidersUnavailable(Exception):
+    """Every remote provider failed or has its breaker open"""
+
+
+class LLMProvider(ABC):
+    """
+    One LLM backend the router can send a prompt to
+
+    generate() and stream() raise on any failure so the router can record it
+    and move on to the next provider.
+    """
+
+    name = 'provider'
+    model = ''
+    resilient = True  # Calls go through a ResilientCaller (deadline, breaker, hedging)
+
+    def __init__(self):
+        self.caller = ResilientCaller(self.name) if self.resilient else None
+
+    @abstractmethod
+    def generate(self, prompt: str, parameters: dict) -> str:
+        ...
+
+    def stream(self, prompt: str, parameters: dict, read_timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Answer in chunks as they arrive
+
+        read_timeout bounds the wait for the response and for each chunk,
+        so a backend that stalls is cut off instead of holding the stream.
+        Providers without token streaming answer in one chunk.
+        """
+        yield self.generate(prompt, parameters)
+
+
+def _stream_timeout(transport: PooledTransport, read_timeout: Optional[float]) -> Optional[tuple]:
+    # (connect, read) for transport.post(); None keeps the transport defaults
+    if read_timeout is None:
+        return None
+    connect_timeout, default_read_timeout = transport.timeout
+    return connect_timeout, min(default_read_timeout, read_timeout)
+
+
+class HuggingFaceProvider(LLMProvider):
+    """HuggingFace Inference API"""
+
+    name = 'huggingface'
+
+    def __init__(self, transport: PooledTransport):
+        super().__init__()
+        self.transport = transport
+        self.model = Config.HUGGINGFACE_MODEL
+        # You can get a free API key from https://huggingface.co/settings/tokens
+        self.api_url = f"https://api-inference.huggingface.co/models/{self.model}"
+        self.headers = {
+            "Authorization": f"Bearer {Config.HUGGINGFACE_API_KEY}"
+        }
+
+    def generate(self, prompt: str, parameters: dict) -> str:
+        payload = {
+            "inputs": prompt,
+            # Text generation echoes the prompt before the completion by default
+            "parameters": {**parameters, "return_full_text": False}
+        }
+        response = self.transport.post(self.api_url, headers=self.headers, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"HuggingFace returned HTTP {response.status_code}")
+
+        result = response.json()
+        if isinstance(result, list) and len(result) > 0:
+            text = result[0].get('generated_text', '')
+        elif isinstance(result, dict):
+            text = result.get('generated_text', '')
+        else:
+            raise RuntimeError("Unexpected HuggingFace response")
+        # Some models ignore return_full_text
+        return text[len(prompt):] if text.startswith(prompt) else text
+
+    def stream(self, prompt: str, parameters: dict, read_timeout: Optional[float] = None) -> Iterator[str]:
+        payload = {
+            "inputs": prompt,
+            "parameters": {**parameters, "return_full_text": False},
+            "stream": True
+        }
+        with self.transport.post(self.api_url, headers=self.headers, json=payload, stream=True,
+                                 timeout=_stream_timeout(self.transport, read_timeout)) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"HuggingFace returned HTTP {response.status_code}")
+            # Event streams often omit the charset; iter_lines would yield bytes
+            response.encoding = response.encoding or 'utf-8'
+            finished = False
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                event = json.loads(line[len('data:'):].strip())
+                # The last event carries the full text
+                finished = event.get('generated_text') is not None
+                token = event.get('token') or {}
+                if token.get('special'):
+                    continue
+                if token.get('text'):
+                    yield token['text']
+            if not finished:
+                raise RuntimeError("HuggingFace stream ended early")
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any server speaking the OpenAI chat completions API (vLLM, llama.cpp, Ollama, ...)"""
+
+    name = 'openai'
+
+    def __init__(self, transport: PooledTransport):
+        super().__init__()
+        self.transport = transport
+        self.model = Config.OPENAI_COMPAT_MODEL
+        self.api_url = f"{Config.OPENAI_COMPAT_BASE_URL.rstrip('/')}/chat/completions"
+        self.headers = {}
+        if Config.OPENAI_COMPAT_API_KEY:
+            self.headers["Authorization"] = f"Bearer {Config.OPENAI_COMPAT_API_KEY}"
+
+    def _payload(self, prompt: str, parameters: dict, stream: bool) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": parameters.get("max_length"),
+            "temperature": parameters.get("temperature"),
+            "stream": stream
+        }
+
+    def generate(self, prompt: str, parameters: dict) -> str:
+        response = self.transport.post(self.api_url, headers=self.headers, json=self._payload(prompt, parameters, False))
+        if response.status_code != 200:
+            raise RuntimeError(f"{self.name} returned HTTP {response.status_code}")
+        return response.json()["choices"][0]["message"]["content"] or ''
+
+    def stream(self, prompt: str, parameters: dict, read_timeout: Optional[float] = None) -> Iterator[str]:
+        payload = self._payload(prompt, parameters, True)
+        with self.transport.post(self.api_url, headers=self.headers, json=payload, stream=True,
+                                 timeout=_stream_timeout(self.transport, read_timeout)) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"{self.name} returned HTTP {response.status_code}")
+            response.encoding = response.encoding or 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    return
+                delta = json.loads(data)["choices"][0].get("delta") or {}
+                if delta.get("content"):
+                    yield delta["content"]
+            raise RuntimeError(f"{self.name} stream ended early")
+
+
+class FallbackProvider(LLMProvider):
+    """Rule-based generation; never fails, always the last resort"""
+
+    name = 'fallback'
+    model = 'rule-based'
+    resilient = False  # Local and never fails
+
+    def __init__(self, generate_fn: Callable[[str, int], str]):
+        super().__init__()
+        self.generate_fn = generate_fn
+
+    def generate(self, prompt: str, parameters: dict) -> str:
+        return self.generate_fn(prompt, parameters.get("max_length", 500))
+
+    def stream(self, prompt: str, parameters: dict, read_timeout: Optional[float] = None) -> Iterator[str]:
+        for line in self.generate(prompt, parameters).splitlines(keepends=True):
+            yield line
+
+
+class _Window:
+    """Moving window of (latency, ok) observations for one provider and prompt class"""
+
+    def __init__(self, size: int):
+        self.samples = deque(maxlen=size)
+
+    def add(self, latency: float, ok: bool):
+        self.samples.append((latency, ok))
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def median_latency(self) -> float:
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        return latencies[len(latencies) // 2] if latencies else 0.0
+
+
+class ProviderRouter:
+    """
+    Picks a provider per call from observed latency and error rate
+
+    Each prompt class (short chat vs. long content) keeps its own moving
+    window per provider. Providers are ranked by median latency inflated by
+    their error rate; untried providers and a small exploration share of
+    calls keep the windows fresh. When every remote provider failed or has
+    its breaker open, generate() raises ProvidersUnavailable and stream()
+    continues with the fallback provider.
+    """
+
+    def __init__(self, providers: List[LLMProvider], fallback: FallbackProvider,
+                 window: int = Config.LLM_ROUTER_WINDOW,
+                 explore_rate: float = Config.LLM_ROUTER_EXPLORE_RATE,
+                 error_penalty: float = Config.LLM_ROUTER_ERROR_PENALTY,
+                 chat_max_length: int = Config.LLM_ROUTER_CHAT_MAX_LENGTH):
+        self.providers = providers
+        self.fallback = fallback
+        self.explore_rate = explore_rate
+        self.error_penalty = error_penalty
+        self.chat_max_length = chat_max_length
+        self._windows = {(provider.name, prompt_class): _Window(window)
+                         for provider in providers for prompt_class in (CHAT, CONTENT)}
+        self._lock = threading.Lock()
+
+    def classify(self, max_length: int) -> str:
+        return CHAT if max_length <= self.chat_max_length else CONTENT
+
+    def ranked(self, prompt_class: str) -> List[LLMProvider]:
+        """Remote providers in the order they should be tried for this class"""
+        with self._lock:
+            def score(indexed):
+                position, provider = indexed
+                window = self._windows[(provider.name, prompt_class)]
+                if not window.samples:
+                    return (0, 0.0, position)
+                # A provider that only failed so far is treated as slow as its deadline
+                latency = window.median_latency() or provider.caller.deadline
+                return (1, latency * (1 + self.error_penalty * window.error_rate()), position)
+
+            order = [provider for _, provider in sorted(enumerate(self.providers), key=score)]
+        if len(order) > 1 and random.random() < self.explore_rate:
+            explored = random.choice(order[1:])
+            order.remove(explored)
+            order.insert(0, explored)
+        return order
+
+    def record(self, provider: LLMProvider, prompt_class: str, latency: float, ok: bool):
+        with self._lock:
+            self._windows[(provider.name, prompt_class)].add(latency, ok)
+
+    def generate(self, prompt: str, parameters: dict, on_success: Callable = None) -> str:
+        prompt_class = self.classify(parameters.get("max_length", 0))
+        for provider in self.ranked(prompt_class):
+            started = time.monotonic()
+            try:
+                text = provider.caller.call(lambda: provider.generate(prompt, parameters))
+            except CircuitOpenError:
+                continue
+            except Exception as e:
+                self.record(provider, prompt_class, time.monotonic() - started, False)
+                print(f"Error generating response with {provider.name}: {e}")
+                continue
+            self.record(provider, prompt_class, time.monotonic() - started, True)
+            if on_success:
+                on_success(provider, text)
+            return text
+        # The caller answers with the fallback and records that it did
+        raise ProvidersUnavailable(f"No provider answered ({len(self.providers)} tried or circuit open)")
+
+    def stream(self, prompt: str, parameters: dict, on_success: Callable = None) -> Iterator[str]:
+        prompt_class = self.classify(parameters.get("max_length", 0))
+        for provider in self.ranked(prompt_class):
+            breaker = provider.caller.breaker
+            if not breaker.allow():
+                continue
+            started = time.monotonic()
+            first_chunk_latency = None
+            chunks = []
+            settled = False
+            # The read timeout cuts off a backend that goes silent; the check below one that trickles
+            stream = provider.stream(prompt, parameters, read_timeout=provider.caller.deadline)
+            try:
+                for chunk in stream:
+                    if time.monotonic() - started > provider.caller.deadline:
+                        raise TimeoutError(f"Stream exceeded {provider.caller.deadline:.1f}s deadline")
+                    if first_chunk_latency is None:
+                        first_chunk_latency = time.monotonic() - started
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                settled = True
+                breaker.record_failure()
+                self.record(provider, prompt_class, time.monotonic() - started, False)
+                print(f"Error streaming response with {provider.name}: {e}")
+                if chunks:
+                    # Part of the answer already reached the client; it must not look complete
+                    raise StreamInterrupted(f"{provider.name} failed after {len(chunks)} chunks: {e}") from e
+                continue
+            else:
+                settled = True
+                # A long answer is not a slow backend: the breaker judges the time to the first chunk
+                breaker.record_success(first_chunk_latency if first_chunk_latency is not None
+                                       else time.monotonic() - started)
+                self.record(provider, prompt_class, time.monotonic() - started, True)
+                if on_success:
+                    on_success(provider, ''.join(chunks))
+                return
+            finally:
+                stream.close()
+                if not settled:
+                    # Closed by the consumer (GeneratorExit): no verdict, but the half-open probe is free again
+                    breaker.release()
+
+        yield from self.fallback.stream(prompt, parameters)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            windows = {
+                f"{name}:{prompt_class}": {
+                    'calls': len(window.samples),
+                    'error_rate': round(window.error_rate(), 4),
+                    'median_latency': round(window.median_latency(), 4),
+                }
+                for (name, prompt_class), window in self._windows.items()
+            }
+        return {
+            'providers': {provider.name: provider.caller.get_stats() for provider in self.providers},
+            'windows': windows,
+        }
+
+
+def build_providers(transport: PooledTransport, fallback_fn: Callable[[str, int], str]) -> ProviderRouter:
+    """Create the router for the providers enabled in Config"""
+    available = {
+        'huggingface': HuggingFaceProvider,
+        'openai': OpenAICompatibleProvider,
+    }
+    names = [name.strip() for name in Config.LLM_PROVIDERS.split(',') if name.strip()]
+    # LLM_SERVICE_TYPE names the preferred provider; 'fallback' disables remote calls
+    if Config.LLM_SERVICE_TYPE == 'fallback':
+        names = []
+    elif Config.LLM_SERVICE_TYPE in names:
+        names.remove(Config.LLM_SERVICE_TYPE)
+        names.insert(0, Config.LLM_SERVICE_TYPE)
+
+    providers = []
+    for name in names:
+        if name in available:
+            providers.append(available[name](transport))
+        elif name != 'fallback':
+            print(f"Unknown LLM provider in LLM_PROVIDERS: {name}")
+    return ProviderRouter(providers, FallbackProvider(fallback_fn))
@@ -0,0 +1,218 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+from config.config import Config
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call does not finish before its deadline"""
+
+
+class LatencyTracker:
+    """Moving window of call latencies"""
+
+    def __init__(self, window: int = Config.LLM_LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(percent / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for an unreliable backend
+
+    The breaker opens after failure_threshold consecutive failures or slow
+    calls (slower than latency_threshold). While open every call is refused.
+    After reset_timeout it half-opens and lets a single probe through: a
+    successful probe closes it again, a failed one re-opens it.
+    """
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = Config.LLM_BREAKER_FAILURE_THRESHOLD,
+                 latency_threshold: float = Config.LLM_BREAKER_LATENCY_THRESHOLD,
+                 reset_timeout: float = Config.LLM_BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.trip_count = 0
+        self.transitions = deque(maxlen=50)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a call may go to the backend now"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._probe_in_flight = False
+            if self.latency_threshold and latency > self.latency_threshold:
+                self._record_failure_locked()
+                return
+            self._failures = 0
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._probe_in_flight = False
+            self._record_failure_locked()
+
+    def release(self):
+        """End a call without an outcome (e.g. the client went away); frees the half-open probe"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'trip_count': self.trip_count,
+                'consecutive_failures': self._failures,
+                'transitions': list(self.transitions),
+            }
+
+    def _record_failure_locked(self):
+        self._failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self.trip_count += 1
+            self._transition(OPEN)
+
+    def _transition(self, state: str):
+        previous, self.state = self.state, state
+        self.transitions.append({'from': previous, 'to': state, 'at': time.time()})
+        print(f"Circuit breaker {self.name}: {previous} -> {state}")
+
+
+class ResilientCaller:
+    """
+    Runs backend calls with a deadline, a circuit breaker and optional hedging
+
+    With hedging on, a second identical attempt is started when the first has
+    not answered after the observed p95 latency; the first result wins.
+    """
+
+    def __init__(self,
+                 name: str,
+                 deadline: float = Config.LLM_DEADLINE_SECONDS,
+                 hedge: bool = Config.LLM_HEDGE_ENABLED,
+                 hedge_percentile: float = Config.LLM_HEDGE_PERCENTILE,
+                 hedge_min_delay: float = Config.LLM_HEDGE_MIN_DELAY,
+                 max_workers: int = Config.LLM_CALL_WORKERS):
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyTracker()
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-call")
+
+    def call(self, fn: Callable, deadline: Optional[float] = None):
+        """
+        Call fn under the breaker and deadline
+
+        Raises:
+            CircuitOpenError: The breaker refused the call
+            DeadlineExceeded: No attempt finished in time
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.breaker.name} circuit is open")
+
+        started = time.monotonic()
+        try:
+            result = self._run(fn, deadline or self.deadline, started)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        elapsed = time.monotonic() - started
+        self.latency.add(elapsed)
+        self.breaker.record_success(elapsed)
+        return result
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latency) < 20:
+            return None
+        return max(self.hedge_min_delay, self.latency.percentile(self.hedge_percentile))
+
+    def get_stats(self) -> dict:
+        stats = self.breaker.get_stats()
+        stats.update({
+            'p50_latency': self.latency.percentile(50),
+            'p95_latency': self.latency.percentile(95),
+            'hedged_calls': self.hedged_calls,
+            'hedge_wins': self.hedge_wins,
+            'deadline_exceeded': self.deadline_exceeded,
+        })
+        return stats
+
+    def _run(self, fn: Callable, deadline: float, started: float):
+        attempts = [self._executor.submit(fn)]
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is not None and hedge_delay < deadline:
+            done, _ = wait(attempts, timeout=hedge_delay)
+            if not done:
+                self.hedged_calls += 1
+                attempts.append(self._executor.submit(fn))
+
+        pending = set(attempts)
+        error = None
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not attempts[0]:
+                        self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+
+        if error is not None and not pending:
+            raise error
+        self.deadline_exceeded += 1
+        raise DeadlineExceeded(f"No response within {deadline:.1f}s")
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from typing import List
+from app import db
+from app.models.models import Lessons, LessonChunks
+from config.config import Config
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'which',
+    'who', 'why', 'with', 'you', 'your', 'can', 'do', 'does', 'i', 'we', 'will',
+}
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def chunk_text(content: str, max_words: int = Config.RETRIEVAL_CHUNK_WORDS) -> List[str]:
+    """
+    Split lesson markdown into chunks of roughly max_words words
+
+    Paragraphs are kept whole where possible and a markdown header always
+    starts a new chunk, so each chunk stays about a single topic.
+    """
+    paragraphs = [paragraph.strip() for paragraph in re.split(r'\n\s*\n', content) if paragraph.strip()]
+    chunks, current, current_words = [], [], 0
+
+    for paragraph in paragraphs:
+        words = len(paragraph.split())
+        starts_section = paragraph.startswith('#')
+        if current and (starts_section or current_words + words > max_words):
+            chunks.append('\n\n'.join(current))
+            current, current_words = [], 0
+
+        if words > max_words:
+            # A single oversized paragraph is cut on word boundaries
+            tokens = paragraph.split()
+            for start in range(0, len(tokens), max_words):
+                chunks.append(' '.join(tokens[start:start + max_words]))
+            continue
+
+        current.append(paragraph)
+        current_words += words
+
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def index_lesson(lesson_id: int, content: str) -> bool:
+    """
+    Rebuild the chunk index of a lesson if its content changed
+
+    The caller commits the session.
+
+    Returns:
+        bool: True if the index was rebuilt
+    """
+    digest = content_hash(content or '')
+    indexed = (db.session.query(LessonChunks.content_hash)
+               .filter(LessonChunks.lesson_id == lesson_id).first())
+    if indexed is not None and indexed[0] == digest:
+        return False
+
+    LessonChunks.query.filter_by(lesson_id=lesson_id).delete(synchronize_session=False)
+    for position, text in enumerate(chunk_text(content or '')):
+        tokens = tokenize(text)
+        db.session.add(LessonChunks(
+            lesson_id=lesson_id,
+            position=position,
+            text=text,
+            terms=json.dumps(Counter(tokens)),
+            length=len(tokens),
+            content_hash=digest,
+        ))
+    return True
+
+
+def top_chunks(lesson_id: int, query: str, k: int = Config.RETRIEVAL_TOP_K) -> List[str]:
+    """
+    Return the k chunks of a lesson most relevant to query, in lesson order
+
+    Chunks are ranked with BM25 computed over the chunks of the lesson.
+    Lessons saved before the index existed are indexed on first use.
+    """
+    chunks = (LessonChunks.query.filter_by(lesson_id=lesson_id)
+              .order_by(LessonChunks.position).all())
+    if not chunks:
+        lesson = db.session.get(Lessons, lesson_id)
+        content = lesson.content if lesson else None
+        if not content:
+            return []
+        index_lesson(lesson_id, content)
+        db.session.commit()
+        chunks = (LessonChunks.query.filter_by(lesson_id=lesson_id)
+                  .order_by(LessonChunks.position).all())
+
+    query_terms = set(tokenize(query or ''))
+    if len(chunks) <= k or not query_terms:
+        return [chunk.text for chunk in chunks[:k]]
+
+    terms = [json.loads(chunk.terms) for chunk in chunks]
+    average_length = sum(chunk.length for chunk in chunks) / len(chunks) or 1
+    document_frequency = Counter(term for chunk_terms in terms for term in chunk_terms if term in query_terms)
+
+    scores = []
+    for chunk, chunk_terms in zip(chunks, terms):
+        score = 0.0
+        for term in query_terms:
+            frequency = chunk_terms.get(term, 0)
+            if not frequency:
+                continue
+            idf = math.log(1 + (len(chunks) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            norm = frequency + K1 * (1 - B + B * chunk.length / average_length)
+            score += idf * frequency * (K1 + 1) / norm
+        scores.append(score)
+
+    best = sorted(range(len(chunks)), key=lambda index: (-scores[index], index))[:k]
+    return [chunks[index].text for index in sorted(best)]
+
+
+def lesson_context(lesson_id: int, query: str, k: int = Config.RETRIEVAL_TOP_K) -> str:
+    """The lesson text to put in a chat prompt for this question"""
+    return '\n\n...\n\n'.join(top_chunks(lesson_id, query, k))
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable
+from config.config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process coalescing is available
+    fcntl = None
+
+
+class _Call:
+    """One in-flight call that followers wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished = False
+
+    def finish(self, result):
+        self.result = result
+        self.finished = True
+
+
+class SingleFlight:
+    """
+    Keyed single-flight execution
+
+    Concurrent callers with the same key share one execution of the function.
+    Threads of the same process wait on the leader's result; other processes
+    are serialized through an exclusive file lock per key, so the function
+    should re-check whether its work is already done before doing it. A lock
+    file only exists while its key is held.
+    """
+
+    def __init__(self, lock_dir: str = Config.SINGLE_FLIGHT_LOCK_DIR, timeout: float = Config.SINGLE_FLIGHT_TIMEOUT):
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers of key
+
+        Args:
+            key (str): Identity of the work, e.g. "lesson:42"
+            fn (callable): Work to run; its return value is shared
+
+        Returns:
+            The value returned by the leader's fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if call.event.wait(self.timeout):
+                if call.error is not None:
+                    raise call.error
+                if call.finished:
+                    return call.result
+            # The leader is taking too long or gave up; do the work ourselves under the process lock
+            with self._process_lock(key):
+                return fn()
+
+        try:
+            with self._process_lock(key):
+                call.finish(fn())
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    @contextmanager
+    def lead(self, key: str):
+        """
+        Hold key for a block of work that is not a single function call
+
+        Used for streamed generation: callers of do() with the same key wait
+        for the block, and other processes wait on the file lock. Yields the
+        call, whose finish(result) hands the result to the waiting callers,
+        or None when another caller in this process already holds the key.
+        If the block ends without finish(), e.g. because the client went
+        away, waiting callers do the work themselves.
+        """
+        with self._lock:
+            call = None if key in self._calls else _Call()
+            if call is not None:
+                self._calls[key] = call
+        if call is None:
+            yield None
+            return
+
+        try:
+            with self._process_lock(key):
+                yield call
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self) -> list:
+        """Keys currently being computed in this process"""
+        with self._lock:
+            return list(self._calls)
+
+    @contextmanager
+    def _process_lock(self, key: str):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.lock_dir, exist_ok=True)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        path = os.path.join(self.lock_dir, f"{name}.lock")
+        while True:
+            lock_file = open(path, 'a')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            # The previous holder may have removed the file while we waited for it
+            if current is not None and current.st_ino == os.fstat(lock_file.fileno()).st_ino:
+                break
+            lock_file.close()
+        try:
+            yield
+        finally:
+            # Removed while still locked, so the directory only holds keys in flight
+            os.unlink(path)
+            lock_file.close()
+
+
+# Global instance
+single_flight = SingleFlight()
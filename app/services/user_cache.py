@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import event, func, inspect, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from config.config import Config
+from app import db
+from app.models.models import CacheVersions, Users
+
+# Bumped by bulk UPDATE/DELETE statements on users, which may touch any row
+ALL_USERS_KEY = 'user:*'
+# Session.info key: users written in the session's transaction, None for all users
+PENDING_KEY = 'user_cache_pending'
+
+
+class UserCache:
+    """
+    In-process identity cache in front of the Flask-Login user loader
+
+    Column values of recently seen users are kept in an LRU with a TTL. A hit
+    rebuilds the user and attaches it to the session with merge(load=False),
+    so the request costs no database round trip; relationships such as
+    learning_paths are still loaded lazily when used.
+
+    Every change to a Users row bumps the user's counter in cache_versions,
+    in the same transaction; bulk UPDATE/DELETE statements bump a counter for
+    all users. Entries remember the version they were read under and are
+    ignored once it moved on. A hit re-reads the counters only when its last
+    check is older than version_ttl, so warm hits cost no query; the writing
+    process drops its entries at commit, other processes within version_ttl.
+    Raw SQL writes bypass the ORM events and only show once the entry
+    expires.
+    """
+
+    def __init__(self, max_entries: int = Config.USER_CACHE_MAX_ENTRIES, ttl: float = Config.USER_CACHE_TTL,
+                 version_ttl: float = Config.USER_CACHE_VERSION_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'invalidations': 0,
+            'evictions': 0,
+        }
+        self._columns = [column.key for column in inspect(Users).column_attrs]
+
+    def load(self, user_id: int) -> Optional[Users]:
+        """Return the user for the current session, reading the database only on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[2] > now and now - entry[3] < self.version_ttl:
+                self._entries.move_to_end(user_id)
+                self._stats['hits'] += 1
+                return self._attach(entry[0])
+
+        version = self.version(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                values, entry_version, expires_at, _ = entry
+                if entry_version == version and expires_at > now:
+                    self._entries[user_id] = (values, version, expires_at, now)
+                    self._entries.move_to_end(user_id)
+                    self._stats['hits'] += 1
+                    return self._attach(values)
+                del self._entries[user_id]
+                self._stats['stale'] += 1
+            self._stats['misses'] += 1
+
+        user = db.session.get(Users, user_id)
+        if user is None:
+            return None
+
+        # The version was read first: a row changed since then is stored under
+        # the old version and is not served once the new one is committed
+        values = {key: getattr(user, key) for key in self._columns}
+        with self._lock:
+            self._entries[user_id] = (values, version, now + self.ttl, now)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return user
+
+    def version(self, user_id: int) -> int:
+        """The user's counter plus the all-users counter; both only go up"""
+        return db.session.query(func.coalesce(func.sum(CacheVersions.version), 0)) \
+            .filter(CacheVersions.key.in_([f"user:{user_id}", ALL_USERS_KEY])).scalar()
+
+    def invalidate(self, executor, key: str):
+        """
+        Bump a counter through a Session or Connection
+
+        Takes effect when the caller's transaction commits.
+        """
+        result = executor.execute(update(CacheVersions).where(CacheVersions.key == key)
+                                  .values(version=CacheVersions.version + 1))
+        if result.rowcount == 0:
+            try:
+                with executor.begin_nested():
+                    executor.execute(insert(CacheVersions).values(key=key, version=1))
+            except IntegrityError:
+                # Another writer created the counter in the meantime
+                executor.execute(update(CacheVersions).where(CacheVersions.key == key)
+                                 .values(version=CacheVersions.version + 1))
+        with self._lock:
+            self._stats['invalidations'] += 1
+
+    def forget(self, user_ids=None):
+        """Drop entries of this process right away; None drops all of them"""
+        with self._lock:
+            if user_ids is None:
+                self._entries.clear()
+            for user_id in user_ids or ():
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        self.forget()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _attach(self, values: dict) -> Users:
+        user = Users(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+# Global instance
+user_cache = UserCache()
+
+
+def _forget_on_commit(session, user_id):
+    # Entries this process drops once the write commits, None for all of them
+    if session is None:
+        return
+    pending = session.info.get(PENDING_KEY, set())
+    session.info[PENDING_KEY] = None if pending is None or user_id is None else pending | {user_id}
+
+
+@event.listens_for(Users, 'after_update')
+@event.listens_for(Users, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(connection, f"user:{target.id}")
+    _forget_on_commit(object_session(target), target.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def invalidate_cached_users(orm_execute_state):
+    # update(Users)/delete(Users) statements and Query.update()/delete()
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is inspect(Users):
+        user_cache.invalidate(orm_execute_state.session, ALL_USERS_KEY)
+        _forget_on_commit(orm_execute_state.session, None)
+
+
+@event.listens_for(Session, 'after_commit')
+def forget_committed_users(session):
+    if PENDING_KEY in session.info:
+        user_cache.forget(session.info.pop(PENDING_KEY))
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_pending_users(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from typing import Dict, List, Union
+from config.config import Config
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'static'))
+DIST_DIR = 'dist'  # Under static/, written by build_assets.py
+
+# Third-party files, downloaded once into static/ by `build_assets.py vendor`.
+# The URL is also used in place of a file that has not been vendored yet.
+VENDOR = {
+    'vendor/jquery/jquery.min.js': 'https://code.jquery.com/jquery-3.6.0.min.js',
+    'vendor/franc/franc.min.js': 'https://cdn.jsdelivr.net/npm/franc@4.0.0/franc.min.js',
+    'vendor/showdown/showdown.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/showdown/1.9.1/showdown.min.js',
+    'vendor/bootstrap/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'vendor/sweetalert2/sweetalert2.min.css': 'https://cdn.jsdelivr.net/npm/sweetalert2@10/dist/sweetalert2.min.css',
+    'vendor/sweetalert2/sweetalert2.min.js': 'https://cdn.jsdelivr.net/npm/sweetalert2@10/dist/sweetalert2.min.js',
+    'vendor/fontawesome/css/all.min.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css',
+    'vendor/rubik/rubik.css': 'https://fonts.googleapis.com/css2?family=Rubik:ital,wght@0,300..900;1,300..900&display=swap',
+}
+
+# Bundle name -> files under static/, concatenated in this order
+BUNDLES = {
+    'base.css': [
+        'vendor/rubik/rubik.css',
+        'vendor/sweetalert2/sweetalert2.min.css',
+        'vendor/bootstrap/bootstrap.min.css',
+        'css/general.css',
+        'css/animations.css',
+        'vendor/fontawesome/css/all.min.css',
+    ],
+    # Loaded in <head>: page scripts use jQuery, franc and showdown right away
+    'head.js': [
+        'vendor/jquery/jquery.min.js',
+        'vendor/franc/franc.min.js',
+        'vendor/showdown/showdown.min.js',
+    ],
+    'base.js': [
+        'vendor/bootstrap/bootstrap.bundle.min.js',
+        'vendor/sweetalert2/sweetalert2.min.js',
+        'js/ai-animations.js',
+    ],
+    'home.css': [
+        'vendor/rubik/rubik.css',
+        'vendor/bootstrap/bootstrap.min.css',
+        'css/general.css',
+        'css/home.css',
+        'vendor/fontawesome/css/all.min.css',
+    ],
+    'home.js': ['vendor/bootstrap/bootstrap.bundle.min.js'],
+    'dashboard.css': ['css/dashboard.css'],
+    'dashboard.js': ['js/dashboard.js'],
+    'learningpath.css': ['css/learningpath.css'],
+    'learningpath.js': ['js/learningpath.js'],
+    'course.css': ['css/course.css'],
+    'course.js': ['js/course.js'],
+}
+
+# Copied with a content hash as they are, e.g. images referenced by templates
+FINGERPRINTED_DIRS = ['images']
+
+
+class AssetManifest:
+    """
+    Maps asset names to the fingerprinted files of the last build
+
+    Without a manifest (nothing built yet) or with use_bundles off, the
+    source files are served one by one, so templates work either way. A
+    bundle built while some vendor files were missing maps to a list: its
+    built parts, with the missing files' names in their place.
+    The manifest is re-read when a new build replaces it.
+    """
+
+    def __init__(self, path: str = Config.ASSET_MANIFEST, use_bundles: bool = Config.ASSETS_USE_BUNDLES):
+        self.path = path
+        self.use_bundles = use_bundles
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Union[str, List[str]]] = {}
+        self._mtime = None
+
+    def url(self, name: str) -> str:
+        """URL of a single asset (bundle or file under static/), like url_for('static', ...)"""
+        from flask import url_for
+        built = self.entries().get(name)
+        if built is not None:
+            return url_for('static', filename=built)
+        if name in VENDOR and not os.path.exists(os.path.join(STATIC_DIR, name)):
+            return VENDOR[name]
+        return url_for('static', filename=name)
+
+    def urls(self, bundle: str) -> List[str]:
+        """URLs to include for a bundle: the built file, or its sources when not built"""
+        from flask import url_for
+        built = self.entries().get(bundle)
+        if built is None:
+            return [self.url(source) for source in BUNDLES[bundle]]
+        if isinstance(built, str):
+            return [url_for('static', filename=built)]
+        # Built without some vendor files: those are listed by name between the built parts
+        return [self.url(part) if part in VENDOR else url_for('static', filename=part) for part in built]
+
+    def entries(self) -> Dict[str, Union[str, List[str]]]:
+        if not self.use_bundles:
+            return {}
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return {}
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        with open(self.path) as manifest:
+                            self._entries = json.load(manifest)
+                    except (OSError, ValueError) as e:
+                        print(f"Error reading asset manifest: {e}")
+                        self._entries = {}
+                    self._mtime = mtime
+        return self._entries
+
+
+def init_assets(app, manifest: 'AssetManifest' = None):
+    """Register asset_url()/asset_urls() for templates and long-lived caching of built files"""
+    from flask import request
+    manifest = manifest or asset_manifest
+    app.add_template_global(manifest.url, 'asset_url')
+    app.add_template_global(manifest.urls, 'asset_urls')
+    max_age = app.config.get('ASSETS_MAX_AGE', Config.ASSETS_MAX_AGE)
+
+    @app.after_request
+    def cache_built_assets(response):
+        # Built files never change under the same name, a new build gets new names
+        filename = (request.view_args or {}).get('filename', '')
+        if request.endpoint == 'static' and filename.startswith(DIST_DIR + '/') and response.status_code in (200, 304):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.cache_control.immutable = True
+        return response
+
+
+# Global instance
+asset_manifest = AssetManifest()
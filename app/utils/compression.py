@@ -0,0 +1,301 @@
+import os
+import threading
+import zlib
+from typing import Optional
+from config.config import Config
+
+try:
+    import brotli
+except ImportError:  # Optional; responses are gzipped only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+)
+# Precompressed siblings of static files, as written by build_assets.py
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+# Bodies up to this size are compressed in one go and keep a Content-Length
+BUFFER_MAX_SIZE = 4 * 1024 * 1024
+# Set by the app for every matched request; the request itself is gone once the body is sent
+ROUTE_KEY = 'masari.route'
+
+
+def accepted_encodings(header: str) -> dict:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, parameters = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = parameters.strip().partition('=')
+        if name.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli compression of responses at the WSGI level
+
+    The coding is negotiated from Accept-Encoding (brotli preferred when
+    installed). Bodies under min_size, already encoded responses, ranges and
+    HEAD requests are passed through. Streamed responses are compressed chunk
+    by chunk; Server-Sent Events are flushed after every chunk so events are
+    not held back by the compressor. Static files that have a .br/.gz sibling
+    are served precompressed. Bytes before and after compression are counted
+    per route, see get_stats().
+    """
+
+    def __init__(self, app, static_folder: Optional[str] = None, static_url_path: Optional[str] = None,
+                 min_size: int = Config.COMPRESSION_MIN_SIZE,
+                 level: int = Config.COMPRESSION_LEVEL,
+                 brotli_quality: int = Config.COMPRESSION_BROTLI_QUALITY):
+        self.app = app
+        self.static_folder = static_folder
+        self.static_url_path = static_url_path
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if environ.get('REQUEST_METHOD') == 'HEAD' or 'HTTP_RANGE' in environ:
+            encoding = None
+        original_size = self._use_precompressed(environ)
+
+        response = {}
+
+        def capture(status, headers, exc_info=None):
+            response.update(status=status, headers=headers, exc_info=exc_info)
+
+        body = self.app(environ, capture)
+        status, headers = response['status'], response['headers']
+        content_type = _header(headers, 'Content-Type') or ''
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+        if compressible:
+            _add_vary(headers)
+
+        length = _header(headers, 'Content-Length')
+        if original_size is not None and _header(headers, 'Content-Encoding'):
+            if status.startswith('200'):
+                self._record(environ, original_size, int(length or 0), True)
+            start_response(status, headers, response['exc_info'])
+            return body
+
+        skip = (encoding is None or not compressible or _header(headers, 'Content-Encoding')
+                or 'no-transform' in (_header(headers, 'Cache-Control') or '')
+                or status[:3] in ('204', '206', '304') or status.startswith('1'))
+        if skip or (length is not None and int(length) < self.min_size):
+            if length is not None:
+                self._record(environ, int(length), int(length), False)
+                start_response(status, headers, response['exc_info'])
+                return body
+            start_response(status, headers, response['exc_info'])
+            return _CountingIterator(body, lambda size: self._record(environ, size, size, False))
+
+        _weaken_etag(headers)
+        if length is not None and int(length) <= BUFFER_MAX_SIZE:
+            return self._compress_buffered(environ, start_response, response, body, encoding)
+        return self._compress_stream(environ, start_response, response, body, encoding,
+                                     flush_chunks=content_type.startswith('text/event-stream'))
+
+    def negotiate(self, header: str) -> Optional[str]:
+        """Best coding both sides support, or None for identity"""
+        accepted = accepted_encodings(header)
+        best, best_quality = None, 0.0
+        for coding in self.encodings:
+            quality = accepted.get(coding, accepted.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # 31: gzip container
+        return compressor.compress(data) + compressor.flush()
+
+    def get_stats(self) -> dict:
+        """Bytes before and after compression per route"""
+        with self._lock:
+            routes = {route: dict(stats) for route, stats in self._routes.items()}
+        for stats in routes.values():
+            stats['saved_bytes'] = stats['bytes_in'] - stats['bytes_out']
+            stats['saved_ratio'] = round(1 - stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else 0.0
+        return routes
+
+    def reset_stats(self):
+        with self._lock:
+            self._routes = {}
+
+    def _compress_buffered(self, environ, start_response, response, body, encoding):
+        try:
+            data = b''.join(body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        headers = response['headers']
+        compressed = self.compress(data, encoding)
+        if len(compressed) >= len(data):
+            self._record(environ, len(data), len(data), False)
+            start_response(response['status'], headers, response['exc_info'])
+            return [data]
+
+        _set_header(headers, 'Content-Encoding', encoding)
+        _set_header(headers, 'Content-Length', str(len(compressed)))
+        self._record(environ, len(data), len(compressed), True)
+        start_response(response['status'], headers, response['exc_info'])
+        return [compressed]
+
+    def _compress_stream(self, environ, start_response, response, body, encoding, flush_chunks):
+        headers = response['headers']
+        _set_header(headers, 'Content-Encoding', encoding)
+        _set_header(headers, 'Content-Length', None)
+        start_response(response['status'], headers, response['exc_info'])
+        return _CompressingIterator(body, encoding, self.level, self.brotli_quality, flush_chunks,
+                                    lambda size_in, size_out: self._record(environ, size_in, size_out, True))
+
+    def _use_precompressed(self, environ) -> Optional[int]:
+        # Points the request at file.css.br/.gz; Flask then sets Content-Encoding itself
+        path = environ.get('PATH_INFO', '')
+        prefix = (self.static_url_path or '') + '/'
+        if not self.static_folder or not path.startswith(prefix) or environ.get('REQUEST_METHOD') != 'GET' \
+                or 'HTTP_RANGE' in environ:
+            return None
+        from werkzeug.security import safe_join
+        original = safe_join(self.static_folder, path[len(prefix):])
+        if original is None or not os.path.isfile(original):
+            return None
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        for coding, suffix in PRECOMPRESSED.items():
+            # Serving a .br file does not need the brotli module
+            if accepted.get(coding, accepted.get('*', 0.0)) > 0 and os.path.isfile(original + suffix):
+                environ['PATH_INFO'] = path + suffix
+                return os.path.getsize(original)
+        return None
+
+    def _record(self, environ, size_in: int, size_out: int, compressed: bool):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return
+        route = environ.get(ROUTE_KEY) or '<unmatched>'
+        with self._lock:
+            stats = self._routes.setdefault(route, {'responses': 0, 'compressed': 0, 'bytes_in': 0, 'bytes_out': 0})
+            stats['responses'] += 1
+            stats['compressed'] += int(compressed)
+            stats['bytes_in'] += size_in
+            stats['bytes_out'] += size_out
+
+
+class _CountingIterator:
+    """Passes a body through, reporting its size once it is closed"""
+
+    def __init__(self, body, done):
+        self.body = body
+        self.done = done
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        if hasattr(self.body, 'close'):
+            self.body.close()
+        self.done(self.size)
+
+
+class _CompressingIterator:
+    def __init__(self, body, encoding, level, brotli_quality, flush_chunks, done):
+        self.body = body
+        self.flush_chunks = flush_chunks
+        self.done = done
+        self.size_in = 0
+        self.size_out = 0
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress, self._flush = self.compressor.process, self.compressor.flush
+            self._finish = self.compressor.finish
+        else:
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._compress = self.compressor.compress
+            self._flush = lambda: self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self.compressor.flush
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size_in += len(chunk)
+            data = self._compress(chunk)
+            if self.flush_chunks:
+                data += self._flush()
+            if data:
+                self.size_out += len(data)
+                yield data
+        data = self._finish()
+        self.size_out += len(data)
+        yield data
+
+    def close(self):
+        if hasattr(self.body, 'close'):
+            self.body.close()
+        self.done(self.size_in, self.size_out)
+
+
+def _header(headers, name):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _set_header(headers, name, value):
+    headers[:] = [(key, v) for key, v in headers if key.lower() != name.lower()]
+    if value is not None:
+        headers.append((name, value))
+
+
+def _add_vary(headers):
+    vary = _header(headers, 'Vary')
+    if vary is None:
+        headers.append(('Vary', 'Accept-Encoding'))
+    elif 'accept-encoding' not in vary.lower() and vary.strip() != '*':
+        _set_header(headers, 'Vary', f"{vary}, Accept-Encoding")
+
+
+def _weaken_etag(headers):
+    # The compressed body is not byte-identical to the one the strong ETag names
+    etag = _header(headers, 'ETag')
+    if etag and not etag.startswith('W/'):
+        _set_header(headers, 'ETag', f"W/{etag}")
+
+
+def init_compression(app):
+    """Wrap app.wsgi_app; the middleware is kept in app.extensions['compression']"""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return None
+    middleware = CompressionMiddleware(app.wsgi_app, static_folder=app.static_folder,
+                                       static_url_path=app.static_url_path,
+                                       min_size=app.config.get('COMPRESSION_MIN_SIZE', Config.COMPRESSION_MIN_SIZE),
+                                       level=app.config.get('COMPRESSION_LEVEL', Config.COMPRESSION_LEVEL),
+                                       brotli_quality=app.config.get('COMPRESSION_BROTLI_QUALITY',
+                                                                     Config.COMPRESSION_BROTLI_QUALITY))
+    app.wsgi_app = middleware
+    app.extensions['compression'] = middleware
+
+    @app.before_request
+    def remember_route():
+        from flask import request
+        if request.url_rule is not None:
+            request.environ[ROUTE_KEY] = request.url_rule.rule
+
+    return middleware
@@ -8,6 +8,66 @@ def parse_prompt(input_text):
     courses = re.findall(pattern, input_text, re.MULTILINE)
     return courses
 
+def _normalize_title(title):
+    return re.sub(r'[^a-z0-9]+', ' ', title.lower()).strip()
+
+def _is_placeholder(text):
+    # Template slots such as "[Lesson Name 1]" or "(repeat as necessary ...)"
+    return bool(re.match(r'^\s*(\[[^\]]*\]|\(.*\))\s*$', text))
+
+def parse_batched_prompt(input_text, course_titles):
+    """
+    Split a multi-course response into the lesson titles of each course
+
+    Sections start with a markdown header naming the course, optionally
+    numbered ("## Course 2: Flask Basics"). Inside a section the numbered
+    lines are read with parse_prompt. Template placeholders, e.g. from a
+    prompt the model echoed back, are skipped. Each course takes the first
+    section whose name matches it; the number only tells courses with the
+    same title apart. Courses whose section is missing, misnamed or has no
+    numbered lines are left out of the result.
+
+    Returns:
+        dict: {index in course_titles: [lesson titles]}
+    """
+    header_pattern = re.compile(r'^\s*#{1,6}\s*(?:course\s*(\d+)\s*[:.)\-]?\s*)?(.*?)\s*$', re.IGNORECASE)
+    normalized_titles = [_normalize_title(title) for title in course_titles]
+
+    sections = []
+    current = None
+    for line in input_text.splitlines():
+        match = header_pattern.match(line)
+        if match:
+            current = {'number': match.group(1), 'name': match.group(2), 'lines': []}
+            sections.append(current)
+        elif current is not None:
+            current['lines'].append(line.strip())
+
+    lessons_by_course = {}
+    for section in sections:
+        name = section['name'].strip('*` ')
+        lessons = [lesson for lesson in parse_prompt('\n'.join(section['lines'])) if not _is_placeholder(lesson)]
+        if _is_placeholder(name) or not lessons:
+            continue
+
+        name = _normalize_title(name)
+        number = int(section['number']) - 1 if section['number'] else None
+        # Courses without lessons yet; duplicate titles are told apart by number, then by order.
+        # A section whose name matches no course is dropped rather than assigned by position
+        free = [index for index in range(len(course_titles)) if index not in lessons_by_course]
+        exact = [index for index in free if normalized_titles[index] == name]
+        if number in exact:
+            index = number
+        elif exact:
+            index = exact[0]
+        else:
+            index = next((position for position in free
+                          if name and (name in normalized_titles[position] or normalized_titles[position] in name)),
+                         None)
+        if index is not None:
+            lessons_by_course[index] = lessons
+    return lessons_by_course
+
 def allowed_file(filename):
     from config.config import Config
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
@@ -16,7 +76,7 @@ def login_required_redirect_dashboard(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if current_user.is_authenticated:
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
         else:
             return f(*args, **kwargs)
     return decorated_function 
\ No newline at end of file
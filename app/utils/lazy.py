@@ -0,0 +1,35 @@
+import threading
+from typing import Callable
+
+
+class LazyService:
+    """
+    Stand-in for a global service instance that is built on first use
+
+    Attribute access is forwarded to the instance, so callers keep using the
+    module-level name as before. reset() drops the instance; the next access
+    builds a new one, which is how forked workers get their own sockets and
+    threads instead of the parent's.
+    """
+
+    def __init__(self, factory: Callable):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def reset(self):
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def is_built(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,500 @@
+import atexit
+import hmac
+import ipaddress
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from config.config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: dead workers' files are folded without a lock
+    fcntl = None
+
+from app.utils.compression import ROUTE_KEY
+
+# Seconds; requests include LLM generation and whole SSE streams
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+TEMPLATE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+LLM_BUCKETS = (0.01, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+# A request relayed by a reverse proxy comes from loopback too
+FORWARDED_HEADERS = ('HTTP_FORWARDED', 'HTTP_X_FORWARDED_FOR', 'HTTP_X_REAL_IP')
+
+# name: (type, help, buckets)
+METRICS = {
+    'masari_http_requests_total': ('counter', 'Requests by route, method and status', None),
+    'masari_http_request_duration_seconds': ('histogram', 'Request latency until the body is sent', HTTP_BUCKETS),
+    'masari_http_requests_in_flight': ('gauge', 'Requests being served', None),
+    'masari_db_query_duration_seconds': ('histogram', 'SQL statements by the route that ran them', DB_BUCKETS),
+    'masari_template_render_duration_seconds': ('histogram', 'Jinja render time per template', TEMPLATE_BUCKETS),
+    'masari_llm_call_duration_seconds': ('histogram', 'LLMService calls by operation and result', LLM_BUCKETS),
+    'masari_llm_first_chunk_seconds': ('histogram', 'Time to the first streamed chunk', LLM_BUCKETS),
+    'masari_llm_route_seconds_total': ('counter', 'Time spent in LLMService per route', None),
+    'masari_cache_requests_total': ('counter', 'In-process cache lookups by result', None),
+    'masari_cache_evictions_total': ('counter', 'In-process cache evictions', None),
+    'masari_cache_entries': ('gauge', 'In-process cache entries', None),
+    'masari_password_hash_operations_total': ('counter', 'Password hashing pool operations', None),
+    'masari_password_hash_pending': ('gauge', 'Hashes queued or running', None),
+    'masari_response_bytes_total': ('counter', 'Response bytes before (in) and after (out) compression', None),
+}
+
+ARCHIVE = 'archive.json'
+IN_FLIGHT_KEY = 'masari.in_flight'
+
+
+def current_route() -> str:
+    """Route template of the request being served, '<background>' outside requests"""
+    flask = sys.modules.get('flask')
+    if flask is None or not flask.has_request_context():
+        return '<background>'
+    return flask.request.environ.get(ROUTE_KEY) or '<unmatched>'
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms shared by all worker processes
+
+    Each process keeps its own values in memory and writes them to
+    <directory>/<pid>.json every flush_interval seconds, at exit and before
+    answering a scrape. render() adds up the files of all processes. Counters
+    and histograms of workers that exited are folded into archive.json, so
+    totals don't drop when gunicorn recycles a worker; their gauges are
+    dropped. Collectors registered with add_collector() report service
+    statistics at flush time. Nothing is recorded until init_metrics()
+    enables the registry, and only processes that serve requests write a
+    file, so scripts such as init_db.py leave no trace.
+    """
+
+    def __init__(self, directory: str = Config.METRICS_DIR, flush_interval: float = Config.METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.enabled = False
+        self._collectors = {}
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        # A child starts from zero; the parent keeps reporting its own values
+        self._lock = threading.Lock()
+        self._values = {}
+        self._histograms = {}
+        self._flusher = None
+        self._claimed = False
+
+    def inc(self, name: str, labels: dict, value: float = 1):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name: str, labels: dict, value: float):
+        if not self.enabled:
+            return
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            histogram[0][bisect_left(buckets, value)] += 1
+            histogram[1] += value
+
+    def add_collector(self, name: str, collector):
+        """collector() returns [(metric, labels, value)]; called at every flush, replaces one of the same name"""
+        self._collectors[name] = collector
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[name, list(labels), value] for (name, labels), value in self._values.items()]
+            histograms = [[name, list(labels), list(counts), total]
+                          for (name, labels), (counts, total) in self._histograms.items()]
+        for collector in list(self._collectors.values()):
+            try:
+                values += [[name, sorted(labels.items()), value] for name, labels, value in collector()]
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        return {'pid': os.getpid(), 'values': values, 'histograms': histograms}
+
+    def flush(self):
+        """Write this process's values to its file"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if not self._claimed:
+                # A file under our pid was left by an earlier process that had it
+                with self._directory_lock():
+                    self._fold(os.getpid())
+                self._claimed = True
+            _write_json(self._path(os.getpid()), self.snapshot())
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    def mark_process_dead(self, pid: int):
+        """Fold an exited worker's counters into the archive (gunicorn child_exit)"""
+        try:
+            with self._directory_lock():
+                self._fold(pid)
+        except OSError as e:
+            print(f"Error archiving metrics of process {pid}: {e}")
+
+    def clear_directory(self):
+        """Start from zero, e.g. when a new server starts"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
+
+    def collect(self) -> tuple:
+        """Merged values and histograms of all processes, live or exited"""
+        self.flush()
+        values, histograms = {}, {}
+        with self._directory_lock():
+            for name in sorted(os.listdir(self.directory)):
+                pid = name[:-len('.json')]
+                if name.endswith('.json') and pid.isdigit() and not _alive(int(pid)):
+                    self._fold(int(pid))
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json'):
+                    continue
+                data = _read_json(os.path.join(self.directory, name))
+                live = name != ARCHIVE
+                for metric, labels, value in data.get('values', []):
+                    if live or not _is_gauge(metric):
+                        key = (metric, tuple(map(tuple, labels)))
+                        values[key] = values.get(key, 0) + value
+                _merge_histograms(histograms, data.get('histograms', []))
+        return values, histograms
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        values, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            samples = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+            series = sorted((labels, data) for (metric, labels), data in histograms.items() if metric == name)
+            if not samples and not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+            for labels, (counts, total) in series:
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+    def flush_at_exit(self):
+        if self._flusher is not None:
+            self.flush()
+
+    def _path(self, pid) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def _fold(self, pid: int):
+        # Caller holds the directory lock
+        path = self._path(pid)
+        if not os.path.exists(path):
+            return
+        data = _read_json(path)
+        archive_path = os.path.join(self.directory, ARCHIVE)
+        archive = _read_json(archive_path)
+        values = {(name, tuple(map(tuple, labels))): value for name, labels, value in archive.get('values', [])}
+        for name, labels, value in data.get('values', []):
+            if not _is_gauge(name):
+                key = (name, tuple(map(tuple, labels)))
+                values[key] = values.get(key, 0) + value
+        histograms = {}
+        _merge_histograms(histograms, archive.get('histograms', []))
+        _merge_histograms(histograms, data.get('histograms', []))
+        _write_json(archive_path, {
+            'values': [[name, list(labels), value] for (name, labels), value in values.items()],
+            'histograms': [[name, list(labels), counts, total] for (name, labels), (counts, total) in histograms.items()],
+        })
+        os.remove(path)
+
+    def _directory_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return _FileLock(os.path.join(self.directory, '.lock'))
+
+    def start_flusher(self):
+        """Write this process's file periodically from now on (called once it serves requests)"""
+        if self._flusher is not None or not self.flush_interval:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        flusher = self._flusher
+        while self._flusher is flusher:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def _is_gauge(name: str) -> bool:
+    # Names no longer in METRICS (older files) are kept like counters and not rendered
+    return METRICS.get(name, ('counter',))[0] == 'gauge'
+
+
+def _alive(pid: int) -> bool:
+    if os.name == 'nt':
+        # os.kill() would terminate it; run.py is a single process there
+        return pid == os.getpid()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Exists, owned by someone else
+    return True
+
+
+def _read_json(path) -> dict:
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as handle:
+        json.dump(data, handle)
+    os.replace(temporary, path)
+
+
+def _merge_histograms(histograms: dict, rows: list):
+    for name, labels, counts, total in rows:
+        key = (name, tuple(map(tuple, labels)))
+        merged = histograms.get(key)
+        if merged is None or len(merged[0]) != len(counts):
+            histograms[key] = [list(counts), total]
+        else:
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def record_llm_call(operation: str, result: str, started: float, first_chunk: float = None):
+    """Time an LLMService call that began at time.perf_counter() == started"""
+    if not metrics.enabled:
+        return
+    elapsed = time.perf_counter() - started
+    metrics.observe('masari_llm_call_duration_seconds', {'operation': operation, 'result': result}, elapsed)
+    metrics.inc('masari_llm_route_seconds_total', {'route': current_route()}, elapsed)
+    if first_chunk is not None:
+        metrics.observe('masari_llm_first_chunk_seconds', {'operation': operation}, first_chunk - started)
+
+
+class MetricsMiddleware:
+    """
+    Times every request until its body has been sent, streams included
+
+    The route is only known once Flask has matched the URL, so the in-flight
+    gauge is raised by a before_request hook (see init_metrics) and lowered
+    here when the response is closed.
+    """
+
+    def __init__(self, app, registry: Metrics):
+        self.app = app
+        self.registry = registry
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        self.registry.start_flusher()
+        response = {}
+
+        def capture(status, headers, exc_info=None):
+            response['status'] = status
+            return start_response(status, headers, exc_info)
+
+        try:
+            body = self.app(environ, capture)
+        except Exception:
+            response['status'] = '500'
+            self._done(environ, response, started)
+            raise
+        return _TimedIterator(body, lambda: self._done(environ, response, started))
+
+    def _done(self, environ, response, started):
+        route = environ.get(ROUTE_KEY) or '<unmatched>'
+        method = environ.get('REQUEST_METHOD', '')
+        if environ.pop(IN_FLIGHT_KEY, None):
+            self.registry.inc('masari_http_requests_in_flight', {'route': route}, -1)
+        self.registry.inc('masari_http_requests_total',
+                          {'route': route, 'method': method, 'status': response.get('status', '500')[:3]})
+        self.registry.observe('masari_http_request_duration_seconds', {'route': route, 'method': method},
+                              time.perf_counter() - started)
+
+
+class _TimedIterator:
+    def __init__(self, body, done):
+        self.body = body
+        self.done = done
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.done()
+
+
+def _service_stats(app):
+    # Cumulative counters of the in-process caches and pools, read at flush time
+    from app.services.user_cache import user_cache
+    from app.services.fragment_cache import fragment_cache
+    from app.services.password_hasher import password_hasher
+
+    samples = []
+    for cache, stats in (('user', user_cache.get_stats()), ('fragment', fragment_cache.get_stats())):
+        samples += [
+            ('masari_cache_requests_total', {'cache': cache, 'result': 'hit'}, stats['hits']),
+            ('masari_cache_requests_total', {'cache': cache, 'result': 'miss'}, stats['misses']),
+            ('masari_cache_evictions_total', {'cache': cache}, stats['evictions']),
+            ('masari_cache_entries', {'cache': cache}, stats['entries']),
+        ]
+    stats = password_hasher.get_stats()
+    samples += [('masari_password_hash_operations_total', {'operation': operation}, stats[key])
+                for operation, key in (('hash', 'hashes'), ('check', 'checks'), ('rejected', 'rejected'))]
+    samples.append(('masari_password_hash_pending', {}, stats['pending']))
+    compression = app.extensions.get('compression')
+    if compression is not None:
+        for route, stats in compression.get_stats().items():
+            samples.append(('masari_response_bytes_total', {'route': route, 'stage': 'in'}, stats['bytes_in']))
+            samples.append(('masari_response_bytes_total', {'route': route, 'stage': 'out'}, stats['bytes_out']))
+    return samples
+
+
+def is_local_request(environ) -> bool:
+    """True for a request made on this host, not relayed by a proxy"""
+    if any(header in environ for header in FORWARDED_HEADERS):
+        return False
+    try:
+        address = ipaddress.ip_address(environ.get('REMOTE_ADDR') or '')
+    except ValueError:
+        return False
+    if getattr(address, 'ipv4_mapped', None) is not None:
+        address = address.ipv4_mapped
+    return address.is_loopback
+
+
+def init_metrics(app):
+    """Wrap app.wsgi_app, hook SQLAlchemy and Jinja, and serve GET /metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return None
+    from flask import Response, abort, before_render_template, request, template_rendered
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    metrics.enabled = True
+    metrics.directory = app.config.get('METRICS_DIR', metrics.directory)
+    middleware = MetricsMiddleware(app.wsgi_app, metrics)
+    app.wsgi_app = middleware
+    app.extensions['metrics'] = metrics
+    metrics.add_collector('services', lambda: _service_stats(app))
+
+    @app.before_request
+    def start_request_metrics():
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        request.environ[ROUTE_KEY] = route
+        request.environ[IN_FLIGHT_KEY] = True
+        metrics.inc('masari_http_requests_in_flight', {'route': route})
+
+    def before_render(sender, template, context, **extra):
+        context['_metrics_started'] = time.perf_counter()
+
+    def rendered(sender, template, context, **extra):
+        started = context.get('_metrics_started')
+        if started is not None:
+            metrics.observe('masari_template_render_duration_seconds', {'template': template.name or '<string>'},
+                            time.perf_counter() - started)
+
+    before_render_template.connect(before_render, app, weak=False)
+    template_rendered.connect(rendered, app, weak=False)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    token = app.config.get('METRICS_TOKEN')
+
+    def metrics_view():
+        # Route names, cache sizes and counters are not for the public: without
+        # a token only scrapers on this host are answered
+        if token:
+            if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+                abort(401)
+        elif not is_local_request(request.environ):
+            abort(403)
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8',
+                        headers={'Cache-Control': 'no-store'})
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return middleware
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, which is dropped with it even
+    # when the statement raises and after_cursor_execute never runs
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_started', None)
+    if started is not None:
+        metrics.observe('masari_db_query_duration_seconds', {'route': current_route()},
+                        time.perf_counter() - started)
+
+
+# Global instance
+metrics = Metrics()
+atexit.register(metrics.flush_at_exit)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=metrics.reset_after_fork)
@@ -0,0 +1,63 @@
+import re
+from typing import Optional
+
+try:
+    import markdown
+    import nh3
+except ImportError:  # Optional; without them lessons are rendered in the browser
+    markdown = None
+    nh3 = None
+
+# Bump when the rendering or sanitizing rules change so stored HTML is rebuilt
+RENDERER_VERSION = 1
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 'span',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title'},
+    'ol': {'start'},
+    'td': {'align'},
+    'th': {'align'},
+    'code': {'class'},
+}
+
+LIST_ITEM = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+
+
+def rendering_available() -> bool:
+    return markdown is not None and nh3 is not None
+
+
+def _separate_lists(text: str) -> str:
+    # LLMs start lists right under a paragraph line; Markdown needs a blank line there
+    lines = []
+    previous = ''
+    for line in text.splitlines():
+        if LIST_ITEM.match(line) and previous.strip() and not LIST_ITEM.match(previous):
+            lines.append('')
+        lines.append(line)
+        previous = line
+    return '\n'.join(lines)
+
+
+def render_markdown(text: str) -> Optional[str]:
+    """
+    Convert lesson markdown to sanitized HTML
+
+    Raw HTML in the text is kept only for the allowed tags and attributes;
+    scripts, event handlers and javascript: links are removed.
+
+    Returns:
+        str: The HTML, or None when markdown/nh3 are not installed
+    """
+    if not rendering_available():
+        return None
+    text = text.replace("```html", "").replace("```", "")
+    # Two-space indents are enough to nest lists, as in the browser renderer
+    html = markdown.markdown(_separate_lists(text), extensions=['tables', 'sane_lists'], tab_length=2)
+    return nh3.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES,
+                     link_rel='noopener noreferrer', url_schemes={'http', 'https', 'mailto'})
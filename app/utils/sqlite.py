@@ -0,0 +1,51 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+# QueuePool arguments; in-memory SQLite uses a StaticPool, which rejects them
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def engine_options(uri: str, options: dict) -> dict:
+    """The engine options that apply to the given database URL
+
+    In-memory SQLite databases (sqlite://, sqlite:///:memory:) share one
+    connection through a StaticPool, so the QueuePool sizing is dropped.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite':
+        return dict(options)
+    in_memory = url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+    if not in_memory:
+        return dict(options)
+    return {name: value for name, value in options.items() if name not in QUEUE_POOL_OPTIONS}
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict):
+    """
+    Run the given PRAGMA statements on every new connection of a SQLite engine
+
+    journal_mode=WAL is persistent in the database file; the other pragmas
+    (synchronous, cache_size, mmap_size, temp_store, busy_timeout) only last
+    for the connection, hence the connect hook. Non-SQLite engines are left
+    untouched.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def read_sqlite_pragmas(engine: Engine, names) -> dict:
+    """Current values of the given pragmas on a fresh connection, for diagnostics"""
+    values = {}
+    with engine.connect() as connection:
+        for name in names:
+            values[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return values
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes on the wire per route with response compression
+
+Seeds a throwaway database with a course of long lessons, then requests
+the pages and lesson APIs once per Accept-Encoding (identity, gzip and,
+when installed, brotli) and reports the response sizes, followed by the
+per-route savings the compression middleware counted.
+
+    python3 benchmarks/bench_compression.py [lessons] [body_kb]
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.models import Users, LearningPaths, Courses, Lessons
+from app.services.password_hasher import PasswordHasher
+from app.utils.compression import brotli
+from config.config import Config
+
+
+def seed(lessons, body_kb):
+    user = Users(username='bench', name='Bench',
+                 password=PasswordHasher(workers=0).hash('bench123'))
+    db.session.add(user)
+    db.session.commit()
+    path = LearningPaths(title='Bench path', description='Compression benchmark', user_id=user.id)
+    db.session.add(path)
+    db.session.commit()
+    course = Courses(title='Bench course', description='Long lessons', user_id=user.id, learning_path_id=path.id)
+    db.session.add(course)
+    db.session.commit()
+    body = ('## Section\n\nA paragraph about **the topic**, with a list:\n\n'
+            '- first point\n- second point\n\n' + 'Lorem ipsum dolor sit amet. ' * 30 + '\n\n')
+    body = body * max(1, body_kb * 1024 // len(body))
+    lesson_ids = []
+    for number in range(lessons):
+        lesson = Lessons(title=f"Lesson {number}", course_id=course.id, completed=False)
+        lesson.content = f"# Lesson {number}\n\n{body}"
+        db.session.add(lesson)
+        db.session.commit()
+        lesson_ids.append(lesson.id)
+    return path.id, course.id, lesson_ids
+
+
+def main():
+    lessons = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    body_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            WTF_CSRF_ENABLED = False
+
+        bench_app = create_app(BenchConfig)
+        with bench_app.app_context():
+            db.create_all()
+            path_id, course_id, lesson_ids = seed(lessons, body_kb)
+
+        lesson = {'lesson_id': lesson_ids[0], 'lesson_title': 'Lesson 0', 'course_title': 'Bench course'}
+        requests = [
+            ('GET', '/', None),
+            ('GET', '/dashboard', None),
+            ('GET', f"/learningpath/{path_id}", None),
+            ('GET', f"/course/{course_id}/Bench course", None),
+            ('POST', '/api/generate_content', lesson),
+            ('POST', '/api/generate_content/stream', lesson),
+        ]
+
+        print("🗜️  Benchmark: response compression")
+        print(f"   {lessons} lessons of ~{body_kb} KB, encodings: {', '.join(encodings)}, "
+              f"min size {Config.COMPRESSION_MIN_SIZE} bytes")
+        print("-" * 78)
+        print(f"{'request':<44}" + ''.join(f"{encoding:>12}" for encoding in encodings))
+        middleware = bench_app.extensions['compression']
+        middleware.reset_stats()
+        for method, url, payload in requests:
+            sizes = []
+            for encoding in encodings:
+                client = bench_app.test_client()
+                client.post('/login', data={'username': 'bench', 'password': 'bench123'})
+                headers = {'Accept-Encoding': encoding}
+                response = client.open(url, method=method, json=payload, headers=headers)
+                sizes.append(len(response.get_data()))
+                response.close()  # Streamed bodies are counted when closed
+            print(f"{method + ' ' + url:<44}" + ''.join(f"{size:12d}" for size in sizes))
+
+        print("-" * 78)
+        print(f"{'route':<44}{'responses':>10}{'bytes in':>10}{'on wire':>10}{'saved':>8}")
+        for route, stats in sorted(middleware.get_stats().items()):
+            print(f"{route:<44}{stats['responses']:10d}{stats['bytes_in']:10d}"
+                  f"{stats['bytes_out']:10d}{stats['saved_ratio']:8.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: lesson body storage in the content-addressed blob store
+
+Many users get the same topics, so the same lesson bodies are saved once
+per user. Each codec stores users x topics lessons drawn from a smaller
+set of distinct bodies and reports the bytes saved by dedup and
+compression, together with the decode cost per read.
+
+    python3 benchmarks/bench_content_store.py [users] [topics] [distinct]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from app import db
+from app.models.models import Users, Courses, Lessons
+from app.services.content_store import ContentStore, zstandard
+import app.services.content_store as content_store_module
+
+READS = 500
+WORDS = ['python', 'variables', 'loops', 'functions', 'classes', 'data', 'example', 'the', 'a', 'of',
+         'to', 'and', 'is', 'in', 'you', 'can', 'use', 'list', 'value', 'return']
+
+
+def make_app(path):
+    bench_app = Flask(__name__)
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    db.init_app(bench_app)
+    return bench_app
+
+
+def make_bodies(distinct):
+    rng = random.Random(42)
+    bodies = []
+    for index in range(distinct):
+        sections = []
+        for section in range(6):
+            words = ' '.join(rng.choice(WORDS) for _ in range(120))
+            sections.append(f"## Section {section + 1}\n\n{words}.\n\n```python\nprint({index})\n```")
+        bodies.append(f"# Lesson {index}\n\n" + '\n\n'.join(sections))
+    return bodies
+
+
+def run(codec, users, topics, bodies):
+    store = ContentStore(codec=codec)
+    with tempfile.TemporaryDirectory() as directory:
+        bench_app = make_app(os.path.join(directory, 'bench.db'))
+        with bench_app.app_context():
+            db.create_all()
+            # Lessons write through the global store
+            content_store_module.content_store = store
+            for user_index in range(users):
+                user = Users(username=f"user{user_index}", password='x', name='Bench')
+                db.session.add(user)
+                db.session.flush()
+                course = Courses(title='Course', user_id=user.id)
+                db.session.add(course)
+                db.session.flush()
+                for topic in range(topics):
+                    db.session.add(Lessons(title=f"Topic {topic}", course_id=course.id, completed=False,
+                                           content=bodies[topic % len(bodies)]))
+                db.session.commit()
+
+            lesson_ids = [lesson_id for (lesson_id,) in db.session.query(Lessons.id)]
+            started = time.perf_counter()
+            for lesson_id in random.Random(7).choices(lesson_ids, k=READS):
+                db.session.get(Lessons, lesson_id).content
+                db.session.expunge_all()
+            read_ms = 1000 * (time.perf_counter() - started) / READS
+            stats = store.get_stats()
+
+            db.session.remove()
+            db.engine.dispose()
+
+    print(f"{codec:<6} {stats['blobs']:6} blobs  {stats['logical_bytes'] / 1024:9.0f} KiB -> "
+          f"{stats['stored_bytes'] / 1024:7.0f} KiB ({stats['saved_ratio']:6.1%} saved)   "
+          f"decode {stats['avg_decode_ms']:6.3f} ms   read {read_ms:6.3f} ms")
+
+
+def main():
+    users, topics, distinct = (int(value) for value in (sys.argv[1:] + ['50', '20', '40'][len(sys.argv[1:]):]))
+    bodies = make_bodies(distinct)
+
+    print("🗜️  Benchmark: content-addressed lesson bodies")
+    print(f"   {users} users x {topics} lessons, {distinct} distinct bodies, {READS} reads")
+    print("-" * 100)
+    for codec in ('none', 'zlib', 'zstd'):
+        if codec == 'zstd' and zstandard is None:
+            print("zstd   skipped, zstandard is not installed")
+            continue
+        run(codec, users, topics, bodies)
+
+
+if __name__ == '__main__':
+    main()
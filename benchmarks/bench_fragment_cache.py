@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: course and learning path pages with the fragment cache
+
+Seeds a throwaway database with one learning path of many courses and a
+course of many lessons, then times repeated page requests with the
+fragment cache off (query + full Jinja loop every time) and on (one
+version lookup per hit). Reports the median and p95 per page and the
+number of SQL statements per request.
+
+    python3 benchmarks/bench_fragment_cache.py [courses] [lessons] [requests]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.models import Users, Courses
+from app.services.fragment_cache import fragment_cache
+from app.services.password_hasher import PasswordHasher
+from app.services.persistence import save_learning_path_tree
+from config.config import Config
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def main():
+    courses, lessons, requests = (int(value) for value in
+                                  (sys.argv[1:] + ['30', '200', '300'][len(sys.argv[1:]):]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            WTF_CSRF_ENABLED = False
+
+        bench_app = create_app(BenchConfig)
+        with bench_app.app_context():
+            db.create_all()
+            user = Users(username='bench', name='Bench', password=PasswordHasher(workers=0).hash('bench123'))
+            db.session.add(user)
+            db.session.commit()
+            tree = [(f"Course {c}", [f"Lesson {l} of course {c}" for l in range(lessons if c == 0 else 0)])
+                    for c in range(courses)]
+            path_id = save_learning_path_tree(user.id, 'Bench path', tree)
+            course_id = Courses.query.filter_by(learning_path_id=path_id).order_by(Courses.id).first().id
+
+        statements = []
+        with bench_app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+        client = bench_app.test_client()
+        client.post('/login', data={'username': 'bench', 'password': 'bench123'})
+        pages = [('course', f"/course/{course_id}/Course 0"), ('learningpath', f"/learningpath/{path_id}")]
+
+        print("🧩 Benchmark: fragment cache")
+        print(f"   {courses} courses, {lessons} lessons in the course, {requests} requests per page")
+        print("-" * 70)
+        print(f"{'page':<14}{'cache':<7}{'p50 ms':>10}{'p95 ms':>10}{'SQL/request':>14}")
+        for name, url in pages:
+            for enabled in (False, True):
+                fragment_cache.enabled = enabled
+                fragment_cache.clear()
+                client.get(url)  # Warm up (and fill the cache)
+                timings = []
+                statements.clear()
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    assert client.get(url).status_code == 200
+                    timings.append(time.perf_counter() - started)
+                print(f"{name:<14}{'on' if enabled else 'off':<7}{percentile(timings, 0.5):10.2f}"
+                      f"{percentile(timings, 0.95):10.2f}{len(statements) / requests:14.1f}")
+        print(f"hit rate: {fragment_cache.get_stats()['hit_rate']:.0%}")
+
+
+if __name__ == '__main__':
+    main()
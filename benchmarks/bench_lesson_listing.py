@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: listing the lessons of a course with large bodies
+
+Compares loading full Lessons rows (the old course() query, content
+included) with the deferred-content model and with the narrow column
+query course() now runs. Reports latency and peak Python memory per
+listing.
+
+    python3 benchmarks/bench_lesson_listing.py [courses] [lessons] [body_kb]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import insert
+from sqlalchemy.orm import undefer
+from app import db
+from app.models.models import Users, Courses, Lessons
+
+ROUNDS = 50
+
+
+def make_app(path):
+    bench_app = Flask(__name__)
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    db.init_app(bench_app)
+    return bench_app
+
+
+def seed(courses, lessons, body_kb):
+    user = Users(username='bench', password='x', name='Bench')
+    db.session.add(user)
+    db.session.commit()
+    course_ids = db.session.execute(
+        insert(Courses).returning(Courses.id, sort_by_parameter_order=True),
+        [{'title': f"Course {c}", 'user_id': user.id} for c in range(courses)]
+    ).scalars().all()
+    body = ('## Section\n\n' + 'Lorem ipsum dolor sit amet. ' * 40 + '\n\n') * max(1, body_kb)
+    db.session.execute(insert(Lessons), [
+        {'title': f"Lesson {l}", 'course_id': course_id, 'completed': False, 'legacy_content': body}
+        for course_id in course_ids for l in range(lessons)
+    ])
+    db.session.commit()
+    return course_ids
+
+
+def full_rows(course_id):
+    """The original course() query with content loaded eagerly"""
+    lessons = Lessons.query.options(undefer(Lessons.legacy_content)).filter_by(course_id=course_id).all()
+    return [{'id': lesson.id, 'title': lesson.title, 'completed': lesson.completed} for lesson in lessons]
+
+
+def deferred_rows(course_id):
+    lessons = Lessons.query.filter_by(course_id=course_id).all()
+    return [{'id': lesson.id, 'title': lesson.title, 'completed': lesson.completed} for lesson in lessons]
+
+
+def column_rows(course_id):
+    lessons = (Lessons.query.with_entities(Lessons.id, Lessons.title, Lessons.completed)
+               .filter_by(course_id=course_id).order_by(Lessons.id).all())
+    return [{'id': lesson.id, 'title': lesson.title, 'completed': lesson.completed} for lesson in lessons]
+
+
+def run(label, fn, course_ids):
+    timings, peaks = [], []
+    for round_number in range(ROUNDS):
+        course_id = course_ids[round_number % len(course_ids)]
+        db.session.expunge_all()
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn(course_id)
+        timings.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    timings.sort()
+    median = timings[len(timings) // 2] * 1000
+    peak = max(peaks) / 1024
+    print(f"{label:<26} median {median:7.2f} ms   peak memory {peak:9.1f} KiB")
+    return median
+
+
+def main():
+    courses, lessons, body_kb = (int(value) for value in (sys.argv[1:] + ['10', '30', '20'][len(sys.argv[1:]):]))
+
+    print("📚 Benchmark: course lesson listing")
+    print(f"   {courses} courses x {lessons} lessons, ~{body_kb} KB bodies, {ROUNDS} listings each")
+    print("-" * 70)
+    with tempfile.TemporaryDirectory() as directory:
+        bench_app = make_app(os.path.join(directory, 'bench.db'))
+        with bench_app.app_context():
+            db.create_all()
+            course_ids = seed(courses, lessons, body_kb)
+
+            before = run("full rows (content loaded)", full_rows, course_ids)
+            run("deferred content", deferred_rows, course_ids)
+            after = run("id/title/completed only", column_rows, course_ids)
+
+            db.session.remove()
+            db.engine.dispose()
+    print("-" * 70)
+    print(f"🚀 Speedup: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login throughput at a latency SLO
+
+Client threads verify passwords as fast as they can, inline on the calling
+thread (the old login view) and through the PasswordHasher process pool,
+at increasing concurrency. A probe thread meanwhile runs a small CPU task,
+standing in for the other requests served by the same worker. Reports
+logins/sec, login p95 and probe p95, and the best throughput whose login
+p95 stays within the SLO.
+
+    python3 benchmarks/bench_login.py [slo_ms] [seconds] [log_rounds]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.password_hasher import PasswordHasher, HasherBusy
+from config.config import Config
+
+CONCURRENCY = [1, 2, 4, 8, 16]
+
+
+def p95(values):
+    values = sorted(values)
+    return values[max(0, int(len(values) * 0.95) - 1)] * 1000 if values else 0.0
+
+
+def probe(deadline, latencies):
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        sum(i * i for i in range(2000))
+        latencies.append(time.monotonic() - started)
+        time.sleep(0.005)
+
+
+def run(hasher, password_hash, concurrency, seconds):
+    logins, probes, rejected = [], [], []
+    deadline = time.monotonic() + seconds
+
+    def client():
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                assert hasher.check(password_hash, 'demo123')
+            except HasherBusy:
+                rejected.append(1)
+                continue
+            logins.append(time.monotonic() - started)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    threads.append(threading.Thread(target=probe, args=(deadline, probes)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(logins) / seconds, p95(logins), p95(probes), len(rejected)
+
+
+def main():
+    slo_ms, seconds, log_rounds = (float(value) for value in
+                                   (sys.argv[1:] + ['500', '5', str(Config.BCRYPT_LOG_ROUNDS)][len(sys.argv[1:]):]))
+    log_rounds = int(log_rounds)
+
+    print("🔐 Benchmark: login throughput")
+    print(f"   bcrypt cost {log_rounds}, SLO p95 <= {slo_ms:.0f} ms, {seconds:.0f}s per level, "
+          f"{os.cpu_count()} CPUs, {Config.PASSWORD_HASH_WORKERS} hashing processes")
+    print("-" * 78)
+
+    password_hash = PasswordHasher(workers=0, log_rounds=log_rounds).hash('demo123')
+    for label, workers in (("inline", 0), ("process pool", Config.PASSWORD_HASH_WORKERS)):
+        hasher = PasswordHasher(workers=workers, log_rounds=log_rounds)
+        hasher.check(password_hash, 'demo123')  # Start the pool outside the measurement
+        best = 0.0
+        print(label)
+        for concurrency in CONCURRENCY:
+            rate, login_p95, probe_p95, rejected = run(hasher, password_hash, concurrency, seconds)
+            within = login_p95 <= slo_ms
+            if within:
+                best = max(best, rate)
+            print(f"   {concurrency:3} clients {rate:8.1f} logins/sec   login p95 {login_p95:8.1f} ms   "
+                  f"probe p95 {probe_p95:6.1f} ms   rejected {rejected}{'' if within else '   (over SLO)'}")
+        hasher.shutdown()
+        print(f"   ✅ {best:.1f} logins/sec within the SLO")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of the request metrics and of a /metrics scrape
+
+Times the dashboard page with the metrics middleware and hooks off and on,
+and reports the overhead per request. Then forks worker processes that
+serve a few requests each and stay alive, the way gunicorn workers do, and
+times GET /metrics while it adds up their files.
+
+    python3 benchmarks/bench_metrics.py [requests] [workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models.models import Users
+from app.services.password_hasher import PasswordHasher
+from app.utils.metrics import metrics
+from config.config import Config
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def time_requests(client, url, requests):
+    client.get(url).close()  # Warm up
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url)
+        response.close()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            WTF_CSRF_ENABLED = False
+            METRICS_ENABLED = False
+            METRICS_DIR = os.path.join(directory, 'metrics')
+
+        class MetricsConfig(BenchConfig):
+            METRICS_ENABLED = True
+
+        clients = {}
+        for enabled, config in ((False, BenchConfig), (True, MetricsConfig)):
+            bench_app = create_app(config)
+            with bench_app.app_context():
+                db.create_all()
+                if not Users.query.filter_by(username='bench').first():
+                    db.session.add(Users(username='bench', name='Bench',
+                                         password=PasswordHasher(workers=0).hash('bench123')))
+                    db.session.commit()
+            clients[enabled] = bench_app.test_client()
+            clients[enabled].post('/login', data={'username': 'bench', 'password': 'bench123'}).close()
+
+        print("📈 Benchmark: request metrics")
+        print(f"   {requests} requests per run, {workers} worker processes for the scrape")
+        print("-" * 60)
+        print(f"{'metrics':<10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+        means = {}
+        for enabled, client in clients.items():
+            metrics.enabled = enabled  # SQLAlchemy listeners are global once installed
+            timings = time_requests(client, '/dashboard', requests)
+            means[enabled] = sum(timings) / len(timings)
+            print(f"{'on' if enabled else 'off':<10}{percentile(timings, 0.5):10.3f}"
+                  f"{percentile(timings, 0.95):10.3f}{means[enabled] * 1000:10.3f}")
+        print(f"overhead: {(means[True] - means[False]) * 1e6:.0f} µs per request")
+
+        children = []
+        ready, flushed = os.pipe()
+        release, done = os.pipe()
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                time_requests(client, '/dashboard', 20)
+                metrics.flush()
+                os.write(flushed, b'.')
+                os.read(release, 1)  # Stay alive until the scrapes are done
+                os._exit(0)
+            children.append(pid)
+        for _ in range(workers):
+            os.read(ready, 1)
+
+        scrapes = time_requests(client, '/metrics', 50)
+        size = len(client.get('/metrics').get_data())
+        print(f"/metrics with {workers + 1} processes: p50 {percentile(scrapes, 0.5):.2f} ms, "
+              f"p95 {percentile(scrapes, 0.95):.2f} ms, {size} bytes")
+        os.write(done, b'.' * workers)
+        for pid in children:
+            os.waitpid(pid, 0)
+
+if __name__ == '__main__':
+    main()
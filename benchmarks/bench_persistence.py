@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: saving generated learning path trees
+
+Compares the old per-row commit loop with the single-transaction bulk
+insert of app.services.persistence on a throwaway SQLite file.
+
+    python3 benchmarks/bench_persistence.py [paths] [courses] [lessons]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from app import db
+from app.models.models import Users, LearningPaths, Courses, Lessons
+from app.services.persistence import save_learning_path_tree
+
+
+def make_app(path):
+    bench_app = Flask(__name__)
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    db.init_app(bench_app)
+    return bench_app
+
+
+def per_row_commits(user_id, trees):
+    """The original generate_learningpath/generate_lessons loops"""
+    for title, courses in trees:
+        new_path = LearningPaths(title=title, user_id=user_id)
+        db.session.add(new_path)
+        db.session.commit()
+        for course_title, lesson_titles in courses:
+            new_course = Courses(title=course_title, learning_path_id=new_path.id, user_id=user_id)
+            db.session.add(new_course)
+            db.session.commit()
+            for lesson_title in lesson_titles:
+                new_lesson = Lessons(title=lesson_title, course_id=new_course.id)
+                db.session.add(new_lesson)
+                db.session.commit()
+
+
+def bulk_transactions(user_id, trees):
+    for title, courses in trees:
+        save_learning_path_tree(user_id, title, courses)
+
+
+def run(label, fn, trees, rows):
+    with tempfile.TemporaryDirectory() as directory:
+        bench_app = make_app(os.path.join(directory, 'bench.db'))
+        with bench_app.app_context():
+            db.create_all()
+            user = Users(username='bench', password='x', name='Bench')
+            db.session.add(user)
+            db.session.commit()
+
+            started = time.perf_counter()
+            fn(user.id, trees)
+            elapsed = time.perf_counter() - started
+
+            saved = LearningPaths.query.count() + Courses.query.count() + Lessons.query.count()
+            db.session.remove()
+            db.engine.dispose()
+
+    assert saved == rows, f"{label}: expected {rows} rows, found {saved}"
+    print(f"{label:<22} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/sec")
+    return elapsed
+
+
+def main():
+    paths, courses, lessons = (int(value) for value in (sys.argv[1:] + ['10', '6', '8'][len(sys.argv[1:]):]))
+    trees = [
+        (f"Path {p}", [(f"Course {p}.{c}", [f"Lesson {p}.{c}.{l}" for l in range(lessons)]) for c in range(courses)])
+        for p in range(paths)
+    ]
+    rows = paths * (1 + courses * (1 + lessons))
+
+    print("📦 Benchmark: learning path persistence")
+    print(f"   {paths} paths x {courses} courses x {lessons} lessons = {rows} rows")
+    print("-" * 50)
+    before = run("per-row commits", per_row_commits, trees, rows)
+    after = run("bulk, one transaction", bulk_transactions, trees, rows)
+    print("-" * 50)
+    print(f"🚀 Speedup: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
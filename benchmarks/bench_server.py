@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTTP throughput of a running Masari server
+
+A simple closed-loop load generator: each client thread keeps one
+keep-alive connection and sends requests back to back. Run it once
+against the development server and once against the production launcher,
+with the same arguments:
+
+    python3 run.py                      # terminal 1, then:
+    python3 benchmarks/bench_server.py http://127.0.0.1:5000/ 20 32
+
+    python3 serve.py                    # terminal 1, then:
+    python3 benchmarks/bench_server.py http://127.0.0.1:5000/ 20 32
+
+    python3 benchmarks/bench_server.py [url] [seconds] [clients]
+"""
+
+import sys
+import threading
+import time
+
+import requests
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)] * 1000 if values else 0.0
+
+
+def client(url, deadline, results):
+    session = requests.Session()
+    latencies, errors = [], 0
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            response = session.get(url, timeout=30)
+            response.content
+            if response.status_code >= 400:
+                errors += 1
+                continue
+        except requests.RequestException:
+            errors += 1
+            continue
+        latencies.append(time.monotonic() - started)
+    session.close()
+    results.append((latencies, errors))
+
+
+def main():
+    args = sys.argv[1:] + ['http://127.0.0.1:5000/', '20', '32'][len(sys.argv[1:]):]
+    url, seconds, clients = args[0], float(args[1]), int(args[2])
+
+    print("🌐 Benchmark: server throughput")
+    print(f"   GET {url}, {clients} clients, {seconds:.0f}s")
+    print("-" * 60)
+
+    results = []
+    deadline = time.monotonic() + seconds
+    threads = [threading.Thread(target=client, args=(url, deadline, results)) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = [latency for values, _ in results for latency in values]
+    errors = sum(count for _, count in results)
+    print(f"requests/sec  {len(latencies) / seconds:10.1f}")
+    print(f"p50 latency   {percentile(latencies, 0.50):10.1f} ms")
+    print(f"p95 latency   {percentile(latencies, 0.95):10.1f} ms")
+    print(f"p99 latency   {percentile(latencies, 0.99):10.1f} ms")
+    print(f"errors        {errors:10d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent SQLite reads and writes under both engine profiles
+
+Reader threads run the course() listing query while writer threads flip
+lesson completion flags (mark_completed) and insert lessons (generation).
+The SQLite defaults (rollback journal) are compared with Config.SQLITE_PRAGMAS.
+Both runs wait up to the same busy timeout on a locked database, so the
+difference comes from the journal mode and the other pragmas.
+
+    python3 benchmarks/bench_sqlite.py [seconds] [readers] [writers]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.models import Users, Courses, Lessons
+from app.utils.sqlite import apply_sqlite_pragmas, engine_options, read_sqlite_pragmas
+from config.config import Config
+
+COURSES = 20
+LESSONS_PER_COURSE = 20
+BUSY_TIMEOUT = Config.SQLITE_PRAGMAS.get('busy_timeout', 5000) / 1000  # Seconds, same for both runs
+
+
+def seed(engine):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        user_id = connection.execute(insert(Users).returning(Users.id),
+                                     [{'username': 'bench', 'password': 'x', 'name': 'Bench'}]).scalar_one()
+        course_ids = connection.execute(
+            insert(Courses).returning(Courses.id, sort_by_parameter_order=True),
+            [{'title': f"Course {c}", 'user_id': user_id} for c in range(COURSES)]
+        ).scalars().all()
+        connection.execute(insert(Lessons), [
+            {'title': f"Lesson {l}", 'course_id': course_id, 'completed': False, 'legacy_content': 'x' * 4000}
+            for course_id in course_ids for l in range(LESSONS_PER_COURSE)
+        ])
+    return course_ids
+
+
+def worker(engine, course_ids, kind, deadline, results):
+    latencies, errors = [], 0
+    while time.monotonic() < deadline:
+        course_id = random.choice(course_ids)
+        started = time.monotonic()
+        try:
+            with engine.begin() as connection:
+                if kind == 'read':
+                    connection.execute(select(Lessons.id, Lessons.title, Lessons.completed)
+                                       .where(Lessons.course_id == course_id)).all()
+                elif random.random() < 0.8:
+                    connection.execute(update(Lessons).where(Lessons.course_id == course_id)
+                                       .values(completed=True))
+                else:
+                    connection.execute(insert(Lessons), [{'title': 'New', 'course_id': course_id, 'completed': False}])
+            latencies.append(time.monotonic() - started)
+        except OperationalError:
+            # "database is locked"
+            errors += 1
+    results.append((kind, latencies, errors))
+
+
+def run(label, pragmas, seconds, readers, writers):
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = create_engine(uri, connect_args={'timeout': BUSY_TIMEOUT},
+                               **engine_options(uri, Config.SQLALCHEMY_ENGINE_OPTIONS))
+        apply_sqlite_pragmas(engine, pragmas)
+        course_ids = seed(engine)
+        journal = read_sqlite_pragmas(engine, ['journal_mode'])['journal_mode']
+
+        results = []
+        deadline = time.monotonic() + seconds
+        threads = [threading.Thread(target=worker, args=(engine, course_ids, 'read', deadline, results))
+                   for _ in range(readers)]
+        threads += [threading.Thread(target=worker, args=(engine, course_ids, 'write', deadline, results))
+                    for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(f"{label} (journal_mode={journal})")
+    for kind in ('read', 'write'):
+        latencies = sorted(latency for k, values, _ in results if k == kind for latency in values)
+        errors = sum(e for k, _, e in results if k == kind)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+        print(f"   {kind:<6} {len(latencies) / seconds:9.0f} ops/sec   p95 {p95:7.1f} ms   locked errors {errors}")
+
+
+def main():
+    seconds, readers, writers = (float(value) for value in (sys.argv[1:] + ['5', '8', '4'][len(sys.argv[1:]):]))
+    readers, writers = int(readers), int(writers)
+
+    print("🗄️  Benchmark: concurrent SQLite reads/writes")
+    print(f"   {seconds:.0f}s, {readers} readers, {writers} writers")
+    print("-" * 60)
+    run("SQLite defaults", {}, seconds, readers, writers)
+    run("Config.SQLITE_PRAGMAS", Config.SQLITE_PRAGMAS, seconds, readers, writers)
+
+
+if __name__ == '__main__':
+    main()
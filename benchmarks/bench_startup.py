@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: import/startup time of the entry-point scripts
+
+Each script is imported in a fresh interpreter (its __main__ block does not
+run), which is the cost every process, worker and test run pays before doing
+anything: run.py builds the app, init_db.py and test_llm.py only import what
+they need. Pass a git ref to measure the same scripts at that commit too.
+
+    python3 benchmarks/bench_startup.py [runs] [git-ref]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCRIPTS = ['run', 'init_db', 'test_llm']
+
+
+def measure(tree, module, runs):
+    """Median wall time of `python -c "import <module>"` in the given source tree"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [tree, env.get('PYTHONPATH')]))
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f"import {module}"], cwd=tree, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def export_tree(ref, directory):
+    archive = subprocess.run(['git', 'archive', ref], cwd=ROOT, check=True, stdout=subprocess.PIPE).stdout
+    subprocess.run(['tar', '-x', '-C', directory], input=archive, check=True)
+    # The export shares the working tree's database
+    os.makedirs(os.path.join(directory, 'instance'), exist_ok=True)
+    database = os.path.join(ROOT, 'instance', 'database.db')
+    target = os.path.join(directory, 'instance', 'database.db')
+    if os.path.exists(database) and not os.path.exists(target):
+        os.symlink(database, target)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ref = sys.argv[2] if len(sys.argv) > 2 else None
+
+    print("⏱️  Benchmark: script startup time")
+    print(f"   median of {runs} fresh interpreters per script")
+    print("-" * 50)
+    baseline = {}
+    if ref:
+        with tempfile.TemporaryDirectory() as directory:
+            export_tree(ref, directory)
+            baseline = {script: measure(directory, script, runs) for script in SCRIPTS}
+
+    current = {script: measure(ROOT, script, runs) for script in SCRIPTS}
+    for script in SCRIPTS:
+        line = f"{script + '.py':<12} {current[script]:8.0f} ms"
+        if ref:
+            line += f"   ({ref}: {baseline[script]:6.0f} ms, {baseline[script] / current[script]:.1f}x)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Static asset build for Masari Learning Platform
+
+    python3 build_assets.py            # bundle, minify, fingerprint and precompress into static/dist
+    python3 build_assets.py vendor     # download the third-party files into static/vendor
+    python3 build_assets.py clean      # remove static/dist (pages fall back to the sources)
+
+`vendor` is the only step that needs network access; its output is meant to
+be committed, so builds and the running app never reach out to a CDN. The
+bundles and files are listed in app/utils/assets.py; templates pick the
+built files up through asset_url()/asset_urls() once manifest.json exists.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+from urllib.parse import urljoin, urlsplit
+from app.utils.assets import STATIC_DIR, DIST_DIR, VENDOR, BUNDLES, FINGERPRINTED_DIRS
+from app.utils.compression import PRECOMPRESSED, brotli
+
+MANIFEST = posixpath.join(DIST_DIR, 'manifest.json')
+# Written next to the built file as .gz/.br, served by the compression middleware
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg')
+
+# Google Fonts only serves woff2 to browsers it recognizes
+USER_AGENT = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0 Safari/537.36')
+
+CSS_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.S)
+CSS_URL = re.compile(r'url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^\'")\s]+))\s*\)')
+SOURCE_MAP = re.compile(r'^\s*//[#@] sourceMappingURL=.*$', re.M)
+
+JS_WORD = re.compile(r'[^\s"\'`/]+')
+JS_SPACE = re.compile(r'\s+')
+# A slash after these starts a regular expression, not a division
+JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = re.compile(r'(?:^|[^\w$])(?:return|typeof|case|do|else|in|of|new|delete|void|throw|yield|await)$')
+# Spaces next to these are never needed
+JS_PUNCTUATION = set('{}()[];,:=<>!?&|*.')
+
+
+def minify_css(text):
+    """Drop comments (except /*! licenses) and redundant whitespace, leaving strings alone"""
+    parts = []
+    position = 0
+    for match in CSS_TOKEN.finditer(text):
+        parts.append(_squeeze_css(text[position:match.start()]))
+        token = match.group(0)
+        if not token.startswith('/*') or token.startswith('/*!'):
+            parts.append(token)
+        position = match.end()
+    parts.append(_squeeze_css(text[position:]))
+    return ''.join(parts).strip()
+
+
+def _squeeze_css(chunk):
+    chunk = re.sub(r'\s+', ' ', chunk)
+    chunk = re.sub(r'\s*([{};,>])\s*', r'\1', chunk)
+    chunk = re.sub(r':\s+', ':', chunk)
+    return chunk.replace(';}', '}')
+
+
+def minify_js(text):
+    """
+    Drop comments (except /*! licenses), indentation and blank lines
+
+    Deliberately conservative: line breaks are kept wherever automatic
+    semicolon insertion could depend on them, and strings, template literals
+    and regular expressions are copied unchanged.
+    """
+    out = []
+    pending = None  # Whitespace seen since the last token: None, ' ' or '\n'
+    i, n = 0, len(text)
+
+    def emit(token):
+        nonlocal pending
+        if pending and out:
+            previous, following = out[-1][-1], token[0]
+            if pending == '\n' and previous not in '{;,([' and following not in ')]}':
+                out.append('\n')
+            elif pending == ' ' and previous not in JS_PUNCTUATION and following not in JS_PUNCTUATION:
+                out.append(' ')
+        pending = None
+        out.append(token)
+
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            end = JS_SPACE.match(text, i).end()
+            if pending != '\n':
+                pending = '\n' if '\n' in text[i:end] else ' '
+            i = end
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = n if end < 0 else end
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            if text.startswith('/*!', i):
+                emit(text[i:end])
+            elif pending != '\n':
+                pending = '\n' if '\n' in text[i:end] else ' '
+            i = end
+        elif c in '"\'`':
+            end = _skip_js_string(text, i)
+            emit(text[i:end])
+            i = end
+        elif c == '/':
+            end = _skip_js_regex(text, i) if _regex_allowed(out) else None
+            emit(text[i:end] if end else '/')
+            i = end or i + 1
+        else:
+            end = JS_WORD.match(text, i).end()
+            emit(text[i:end])
+            i = end
+    return ''.join(out).strip()
+
+
+def _regex_allowed(out):
+    if not out:
+        return True
+    tail = ''.join(out[-3:])
+    return tail[-1] in JS_REGEX_AFTER or bool(JS_REGEX_KEYWORDS.search(tail))
+
+
+def _skip_js_string(text, start):
+    # Index after the closing quote; template literals may nest through ${...}
+    quote = text[start]
+    i = start + 1
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if quote == '`' and text.startswith('${', i):
+            depth = 1
+            i += 2
+            while i < len(text) and depth:
+                if text[i] in '"\'`':
+                    i = _skip_js_string(text, i)
+                    continue
+                depth += {'{': 1, '}': -1}.get(text[i], 0)
+                i += 1
+            continue
+        i += 1
+    return i
+
+
+def _skip_js_regex(text, start):
+    # Index after the flags, or None if this slash is not a regex after all
+    i = start + 1
+    in_class = False
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return None
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < len(text) and text[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    return None
+
+
+def fingerprinted(name, data):
+    """dist/ path of a file with its content hash in the name, e.g. dist/base.1a2b3c4d5e6f.css"""
+    stem, extension = posixpath.splitext(name)
+    return posixpath.join(DIST_DIR, f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}")
+
+
+def write_built(path, data):
+    target = os.path.join(STATIC_DIR, path)
+    if os.path.exists(target):  # Same name, same content
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as output:
+        output.write(data)
+    if path.endswith(PRECOMPRESS_EXTENSIONS):
+        precompress(target, data)
+
+
+def precompress(target, data):
+    """Write the .gz (and with brotli installed, .br) sibling when it is smaller"""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    for coding, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(target + PRECOMPRESSED[coding], 'wb') as output:
+                output.write(compressed)
+
+
+def add_file(manifest, name):
+    """Fingerprint a file under static/ as it is"""
+    if name not in manifest:
+        with open(os.path.join(STATIC_DIR, name), 'rb') as source:
+            data = source.read()
+        manifest[name] = fingerprinted(name, data)
+        write_built(manifest[name], data)
+    return manifest[name]
+
+
+def rewrite_css_urls(text, source, manifest):
+    """Point url(...) references of a CSS file at fingerprinted copies, relative to dist/"""
+    def replace(match):
+        reference = next(group for group in match.groups() if group is not None)
+        if reference.startswith(('data:', '#', '/')) or '://' in reference:
+            return match.group(0)
+        path, _, fragment = reference.partition('#')
+        path = path.split('?')[0]
+        name = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        if os.path.isfile(os.path.join(STATIC_DIR, name)):
+            target = add_file(manifest, name)
+        else:
+            print(f"⚠️  {source}: {reference} not found, left unversioned")
+            target = name
+        url = posixpath.relpath(target, DIST_DIR) + (f"#{fragment}" if fragment else '')
+        return f'url("{url}")'
+    return CSS_URL.sub(replace, text)
+
+
+def build_bundle(bundle, sources, manifest):
+    parts = []
+    for source in sources:
+        with open(os.path.join(STATIC_DIR, source), encoding='utf-8') as handle:
+            text = handle.read()
+        if bundle.endswith('.css'):
+            parts.append(minify_css(rewrite_css_urls(text, source, manifest)))
+        elif source.endswith('.min.js'):
+            parts.append(SOURCE_MAP.sub('', text).strip())
+        else:
+            parts.append(minify_js(text))
+    separator = '\n' if bundle.endswith('.css') else '\n;\n'
+    return (separator.join(parts) + '\n').encode('utf-8')
+
+
+def load_manifest():
+    try:
+        with open(os.path.join(STATIC_DIR, MANIFEST)) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def split_bundle(sources):
+    """
+    Runs of sources that can be built, with missing vendor files in between
+
+    A third-party file that has not been vendored yet stays a separate entry
+    (loaded from its CDN), so the stylesheet/script order is kept.
+    """
+    parts, run = [], []
+    for source in sources:
+        if os.path.isfile(os.path.join(STATIC_DIR, source)):
+            run.append(source)
+            continue
+        if run:
+            parts.append(run)
+            run = []
+        parts.append(source)
+    if run:
+        parts.append(run)
+    return parts
+
+
+def built_paths(manifest):
+    """Every dist/ path of a manifest; partial bundles map to a list"""
+    paths = set()
+    for value in manifest.values():
+        paths.update(path for path in ([value] if isinstance(value, str) else value) if path not in VENDOR)
+    return paths
+
+
+def build():
+    missing = sorted({source for sources in BUNDLES.values() for source in sources
+                      if not os.path.isfile(os.path.join(STATIC_DIR, source))})
+    if any(source not in VENDOR for source in missing):
+        print(f"❌ Missing sources: {', '.join(source for source in missing if source not in VENDOR)}")
+        return False
+
+    previous = load_manifest()
+    manifest = {}
+    for directory in FINGERPRINTED_DIRS:
+        for root, _, files in os.walk(os.path.join(STATIC_DIR, directory)):
+            for filename in sorted(files):
+                add_file(manifest, posixpath.relpath(os.path.join(root, filename), STATIC_DIR).replace(os.sep, '/'))
+
+    for bundle, sources in BUNDLES.items():
+        entry = []
+        for part in split_bundle(sources):
+            if isinstance(part, str):
+                entry.append(part)
+                continue
+            data = build_bundle(bundle, part, manifest)
+            path = fingerprinted(bundle, data)
+            write_built(path, data)
+            entry.append(path)
+            source_bytes = sum(os.path.getsize(os.path.join(STATIC_DIR, source)) for source in part)
+            gzipped = os.path.join(STATIC_DIR, path + PRECOMPRESSED['gzip'])
+            gzip_bytes = os.path.getsize(gzipped) if os.path.exists(gzipped) else len(data)
+            print(f"📦 {bundle:<18} {len(part):2d} files {source_bytes:9d} -> {len(data):9d} bytes "
+                  f"({gzip_bytes:8d} gzipped)  {path}")
+        manifest[bundle] = entry[0] if len(entry) == 1 and entry[0] not in VENDOR else entry
+
+    # Replace the manifest in one step so running servers never read half of it
+    target = os.path.join(STATIC_DIR, MANIFEST)
+    with open(target + '.tmp', 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(target + '.tmp', target)
+
+    # Pages rendered from the previous manifest may still be loading its files
+    keep = built_paths(manifest) | built_paths(previous)
+    keep |= {path + suffix for path in keep for suffix in PRECOMPRESSED.values()} | {MANIFEST}
+    removed = prune(keep)
+    print(f"✅ {len(manifest)} assets in {MANIFEST}, {removed} stale files removed")
+    if missing:
+        print(f"⚠️  {len(missing)} third-party files are not vendored and still load from their CDNs; "
+              "run python3 build_assets.py vendor with network access and commit static/vendor/")
+    return True
+
+
+def prune(keep):
+    removed = 0
+    dist = os.path.join(STATIC_DIR, DIST_DIR)
+    for root, _, files in os.walk(dist, topdown=False):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if posixpath.relpath(path, STATIC_DIR).replace(os.sep, '/') not in keep:
+                os.remove(path)
+                removed += 1
+        if root != dist and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def vendor():
+    import requests
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+
+    def download(url, name):
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        target = os.path.join(STATIC_DIR, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as output:
+            output.write(response.content)
+        return response
+
+    for name, url in VENDOR.items():
+        try:
+            response = download(url, name)
+            if name.endswith('.css'):
+                vendor_css_files(name, url, response.text, download)
+            print(f"✅ {name}")
+        except Exception as e:
+            print(f"Error downloading {url}: {e}")
+            return False
+    print(f"📥 Vendored {len(VENDOR)} files into static/vendor, commit them so builds work offline")
+    return True
+
+
+def vendor_css_files(name, url, text, download):
+    """Download fonts/images a stylesheet references and make the references local"""
+    directory = posixpath.dirname(name)
+    downloaded = {}
+
+    def replace(match):
+        reference = next(group for group in match.groups() if group is not None)
+        if reference.startswith(('data:', '#')):
+            return match.group(0)
+        absolute = urljoin(url, reference)
+        path = urlsplit(absolute).path
+        if '://' in reference or reference.startswith('/'):
+            # Hosted elsewhere (fonts.gstatic.com): keep next to the stylesheet
+            local = posixpath.join(directory, 'files', posixpath.basename(path))
+        else:
+            local = posixpath.normpath(posixpath.join(directory, reference.split('#')[0].split('?')[0]))
+        if local not in downloaded:
+            download(absolute.split('#')[0], local)
+            downloaded[local] = absolute
+        fragment = urlsplit(reference).fragment
+        relative = posixpath.relpath(local, directory) + (f"#{fragment}" if fragment else '')
+        return f'url("{relative}")'
+
+    text = CSS_URL.sub(replace, text)
+    with open(os.path.join(STATIC_DIR, name), 'w', encoding='utf-8') as output:
+        output.write(text)
+
+
+def clean():
+    shutil.rmtree(os.path.join(STATIC_DIR, DIST_DIR), ignore_errors=True)
+    print(f"🧹 Removed static/{DIST_DIR}")
+    return True
+
+
+COMMANDS = {
+    'build': build,
+    'vendor': vendor,
+    'clean': clean,
+}
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    if command not in COMMANDS:
+        print(f"Usage: python3 build_assets.py [{'|'.join(COMMANDS)}]")
+        sys.exit(2)
+    sys.exit(0 if COMMANDS[command]() else 1)
+
+
+if __name__ == '__main__':
+    main()
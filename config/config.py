@@ -4,10 +4,29 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
 class Config:
     # Database configuration
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///database.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {  # Pool sizing is dropped for in-memory SQLite (see app.utils.sqlite)
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),  # Connections kept open per process
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),  # Extra connections allowed under burst
+        'pool_timeout': 30,  # Seconds to wait for a free connection
+        'pool_recycle': 3600,
+    }
+    MIGRATE_ON_START = os.environ.get('MIGRATE_ON_START', '1') == '1'  # 0: refuse to start while migrations are pending
+
+    # SQLite engine profile, applied to every new connection ({} keeps SQLite defaults)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # Readers no longer block the writer
+        'synchronous': 'NORMAL',  # Safe with WAL, one fsync per checkpoint instead of per commit
+        'cache_size': -64000,  # Negative means KiB: 64MB page cache per connection
+        'mmap_size': 268435456,  # 256MB memory-mapped reads
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,  # Milliseconds to wait on a locked database instead of failing
+    } if os.environ.get('SQLITE_PROFILE', 'wal') == 'wal' else {}
     
     # Security configuration
     SECRET_KEY = 'My|!w>YD/IT[&iE}?yV#>;}Xf]^7YgLV'
@@ -18,11 +37,120 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
     # LLM Service configuration
-    LLM_SERVICE_TYPE = 'huggingface'  # Options: 'huggingface', 'fallback'
+    LLM_SERVICE_TYPE = os.environ.get('LLM_SERVICE_TYPE', 'huggingface')  # Preferred provider: 'huggingface', 'openai' or 'fallback' (rule-based only)
+    LLM_PROVIDERS = os.environ.get('LLM_PROVIDERS', 'huggingface,fallback')  # Providers the router may use
     HUGGINGFACE_API_KEY = os.environ.get('HUGGINGFACE_API_KEY', 'hf_xxx')
     HUGGINGFACE_MODEL = 'microsoft/DialoGPT-medium'
+    OPENAI_COMPAT_BASE_URL = os.environ.get('OPENAI_COMPAT_BASE_URL', 'http://localhost:8000/v1')  # Any OpenAI-compatible server
+    OPENAI_COMPAT_MODEL = os.environ.get('OPENAI_COMPAT_MODEL', 'local-model')
+    OPENAI_COMPAT_API_KEY = os.environ.get('OPENAI_COMPAT_API_KEY', '')
+
+    # Provider routing
+    LLM_ROUTER_WINDOW = 50  # Recent calls per provider and prompt class used for ranking
+    LLM_ROUTER_EXPLORE_RATE = 0.05  # Share of calls sent to a non-best provider to keep stats fresh
+    LLM_ROUTER_ERROR_PENALTY = 5  # Latency multiplier per unit of error rate
+    LLM_ROUTER_CHAT_MAX_LENGTH = 200  # Calls up to this max_length count as short chat
+
+    # LLM HTTP connection pool configuration
+    LLM_POOL_CONNECTIONS = int(os.environ.get('LLM_POOL_CONNECTIONS', 4))  # Number of per-host pools kept
+    LLM_POOL_MAXSIZE = int(os.environ.get('LLM_POOL_MAXSIZE', 10))  # Max keep-alive connections per host
+    LLM_POOL_BLOCK = os.environ.get('LLM_POOL_BLOCK', '0') == '1'  # 1: wait for a free connection instead of opening an extra one
+    LLM_CONNECT_TIMEOUT = float(os.environ.get('LLM_CONNECT_TIMEOUT', 5))  # Seconds
+    LLM_READ_TIMEOUT = float(os.environ.get('LLM_READ_TIMEOUT', 60))  # Seconds
+    LLM_KEEPALIVE_SECONDS = float(os.environ.get('LLM_KEEPALIVE_SECONDS', 90))  # Idle lifetime of a pooled connection
+
+    # LLM call deadlines, circuit breaker and hedged requests (per provider)
+    LLM_DEADLINE_SECONDS = float(os.environ.get('LLM_DEADLINE_SECONDS', 45))  # Wall-clock limit per generation
+    LLM_BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failed or slow calls before the breaker opens
+    LLM_BREAKER_LATENCY_THRESHOLD = 30  # Seconds; slower successful calls count as failures
+    LLM_BREAKER_RESET_TIMEOUT = 30  # Seconds open before a half-open probe is allowed
+    LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', '0') == '1'
+    LLM_HEDGE_PERCENTILE = 95  # Fire the second attempt after this latency percentile
+    LLM_HEDGE_MIN_DELAY = 1.0  # Seconds; never hedge sooner than this
+    LLM_LATENCY_WINDOW = 200  # Calls kept for latency percentiles
+    LLM_CALL_WORKERS = 16  # Threads running backend attempts
+
+    # LLM response cache configuration
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', '1') == '1'
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join(BASE_DIR, 'instance', 'llm_cache.db'))
+    LLM_CACHE_MAX_ENTRIES = 512  # In-process LRU size
+    LLM_CACHE_DISK_MAX_ENTRIES = 10000  # Rows kept in the SQLite table
+    LLM_CACHE_DISK_EVICT_EVERY = 100  # Writes between two passes over expired and excess rows
+    LLM_CACHE_TTL = 7 * 24 * 3600  # Seconds
+
+    # Single-flight generation locks (shared by worker processes)
+    SINGLE_FLIGHT_LOCK_DIR = os.path.join(BASE_DIR, 'instance', 'locks')
+    SINGLE_FLIGHT_TIMEOUT = 300  # Seconds a follower waits for the leader before running itself
+
+    # Background job queue configuration
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # Worker threads per process, 0 disables them
+    JOB_MAX_ATTEMPTS = 3
+    JOB_RETRY_BACKOFF = 2  # Seconds before the first retry, doubled on each further attempt
+    JOB_POLL_INTERVAL = 1  # Seconds an idle worker sleeps between polls
+    JOB_STALE_AFTER = 600  # Seconds after which a running job is assumed abandoned
+
+    # Lesson content pre-generation for newly created courses
+    PREGENERATE_LESSON_CONTENT = os.environ.get('PREGENERATE_LESSON_CONTENT', '0') == '1'
+    PREGENERATE_CONCURRENCY = 3  # Lessons generated in parallel per course
+
+    # Generate the lessons of all courses of a new path with a single prompt
+    BATCHED_LESSON_GENERATION = os.environ.get('BATCHED_LESSON_GENERATION', '0') == '1'
+    BATCHED_LESSONS_MAX_LENGTH = 2000
+
+    # Chat context retrieval over lesson chunks
+    RETRIEVAL_CHUNK_WORDS = 120  # Approximate words per indexed chunk
+    RETRIEVAL_TOP_K = 3  # Chunks sent with each chat question
+
+    # Password hashing (Flask-Bcrypt reads BCRYPT_LOG_ROUNDS too)
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))  # Stored hashes with another cost are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # Hashing processes, 0 hashes on the request thread
+    PASSWORD_HASH_MAX_PENDING = 32  # Queued or running hashes before logins are turned away with 503
+    PASSWORD_HASH_TIMEOUT = 10  # Seconds
+
+    # Identity cache in front of the Flask-Login user loader
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', '1') == '1'
+    USER_CACHE_MAX_ENTRIES = 10000
+    USER_CACHE_TTL = 300  # Seconds; bounds staleness for raw SQL writes that bypass the ORM
+    USER_CACHE_VERSION_TTL = float(os.environ.get('USER_CACHE_VERSION_TTL', 2))  # Seconds a hit trusts its version before re-reading cache_versions
+
+    # Rendered course sidebar / learning path grid fragments
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))  # Per process, least recently used evicted first
+
+    # Content-addressed lesson body store
+    CONTENT_STORE_CODEC = os.environ.get('CONTENT_STORE_CODEC', 'zlib')  # 'zlib', 'zstd' (needs zstandard) or 'none'
+    CONTENT_STORE_LEVEL = int(os.environ.get('CONTENT_STORE_LEVEL', 6))
+
+    # Static assets built by build_assets.py
+    ASSET_MANIFEST = os.path.join(BASE_DIR, 'static', 'dist', 'manifest.json')
+    ASSETS_USE_BUNDLES = os.environ.get('ASSETS_USE_BUNDLES', '1') == '1'  # 0 serves the source files, e.g. while editing CSS/JS
+    ASSETS_MAX_AGE = 365 * 24 * 3600  # Seconds browsers may cache fingerprinted files
+
+    # Response compression (gzip, plus brotli when installed)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'  # 0 when a reverse proxy compresses
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # Bytes; smaller bodies are sent as they are
+    COMPRESSION_LEVEL = 6  # gzip level
+    COMPRESSION_BROTLI_QUALITY = 5  # 0-11; higher is smaller but slower
+
+    # Request/DB/LLM metrics served at /metrics (Prometheus text format)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(BASE_DIR, 'instance', 'metrics'))  # Per-process files, shared by the workers of one host
+    METRICS_FLUSH_INTERVAL = 5  # Seconds between writes of a worker's values; a scrape sees the others this far behind
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # When set, /metrics requires "Authorization: Bearer <token>"; otherwise only localhost may scrape it
     
     # Application configuration
     DEBUG = True
     HOST = '0.0.0.0'
-    PORT = 5000 
\ No newline at end of file
+    PORT = 5000
+
+    # Production server (gunicorn.conf.py, started by serve.py)
+    SERVER_BIND = os.environ.get('SERVER_BIND', f"{HOST}:{PORT}")
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', min(2 * (os.cpu_count() or 1) + 1, 8)))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 4))  # Threads per worker process
+    SERVER_PRELOAD = os.environ.get('SERVER_PRELOAD', '1') == '1'  # Import the app once in the master before forking
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 1000))  # Recycle a worker after this many requests, 0 never
+    SERVER_MAX_REQUESTS_JITTER = 100  # Spreads recycling so workers don't restart together
+    SERVER_TIMEOUT = 120  # Seconds without a worker heartbeat before it is killed
+    SERVER_GRACEFUL_TIMEOUT = 30  # Seconds in-flight requests get to finish on reload/shutdown
+    SERVER_KEEPALIVE = 5  # Seconds
+    SERVER_PIDFILE = os.path.join(BASE_DIR, 'instance', 'gunicorn.pid')
\ No newline at end of file
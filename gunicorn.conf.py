@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for Masari, taken from Config
+
+    gunicorn -c gunicorn.conf.py      (or: python3 serve.py)
+
+Send SIGHUP to the master (python3 serve.py reload) for a graceful reload:
+new workers are started and old ones finish their in-flight requests.
+"""
+
+from config.config import Config
+from app.utils.metrics import metrics
+
+wsgi_app = 'wsgi:app'
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+# Threaded workers keep serving while a thread waits on the LLM or streams SSE
+worker_class = 'gthread'
+threads = Config.SERVER_THREADS
+# Workers drop the master's pooled DB connections and service clients after fork
+# (os.register_at_fork hooks in app/__init__.py and the services)
+preload_app = Config.SERVER_PRELOAD
+max_requests = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = Config.SERVER_MAX_REQUESTS_JITTER
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT
+keepalive = Config.SERVER_KEEPALIVE
+pidfile = Config.SERVER_PIDFILE
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # Metrics start from zero with each server, not with each worker
+    metrics.clear_directory()
+
+
+def child_exit(server, worker):
+    # Archive an exited worker's counters now and drop its in-flight gauges
+    metrics.mark_process_dead(worker.pid)
@@ -3,11 +3,13 @@
 Database initialization script for Masari Learning Platform
 """
 
-from app import app, db
+from app import create_app, db
 from app.models.models import Users, LearningPaths, Courses, Lessons
+from app.migrations import run_migrations, current_version
 
 def init_database():
     """Initialize the database with all tables"""
+    app = create_app()
     with app.app_context():
         # Create all tables
         db.create_all()
@@ -19,6 +21,19 @@ def init_database():
         tables = inspector.get_table_names()
         print(f"📊 Created tables: {', '.join(tables)}")
 
+        # Bring existing databases up to date (indexes, data fixes, ...)
+        applied = run_migrations(db.engine)
+        for version, description in applied:
+            print(f"🔧 Applied migration {version:04d}: {description}")
+        print(f"📌 Schema version: {current_version(db.engine)}")
+
+        from app.services.content_store import content_store
+        removed = content_store.collect_garbage()
+        stats = content_store.get_stats()
+        print(f"🗜️  Lesson bodies: {stats['references']} lessons, {stats['blobs']} blobs, "
+              f"{stats['logical_bytes']} -> {stats['stored_bytes']} bytes "
+              f"({stats['saved_ratio']:.0%} saved), {removed} unreferenced blobs removed")
+
 if __name__ == '__main__':
     print("🚀 Initializing Masari Learning Platform Database...")
     init_database()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Production launcher for Masari Learning Platform
+
+Runs the app under gunicorn with the SERVER_* settings of Config:
+
+    python3 serve.py            # start in the foreground
+    python3 serve.py reload     # graceful reload of a running server (SIGHUP)
+    python3 serve.py stop       # graceful shutdown (SIGTERM)
+
+run.py stays the development server (single process, debugger, reloader).
+"""
+
+import os
+import signal
+import sys
+from config.config import Config
+
+COMMANDS = {
+    'reload': signal.SIGHUP,
+    'stop': signal.SIGTERM,
+}
+
+
+def signal_master(command):
+    try:
+        with open(Config.SERVER_PIDFILE) as pidfile:
+            pid = int(pidfile.read().strip())
+    except (OSError, ValueError):
+        print(f"❌ No running server found ({Config.SERVER_PIDFILE})")
+        return False
+    os.kill(pid, COMMANDS[command])
+    print(f"✅ Sent {command} to gunicorn master {pid}")
+    return True
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'start'
+    if command in COMMANDS:
+        sys.exit(0 if signal_master(command) else 1)
+    if command != 'start':
+        print(f"Usage: python3 serve.py [start|{'|'.join(COMMANDS)}]")
+        sys.exit(2)
+
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        print("❌ gunicorn is not installed (pip install -r requirements.txt); it is not available on Windows")
+        sys.exit(1)
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    print(f"🚀 Starting Masari on {Config.SERVER_BIND}: {Config.SERVER_WORKERS} workers x "
+          f"{Config.SERVER_THREADS} threads, recycled after ~{Config.SERVER_MAX_REQUESTS} requests")
+    sys.argv = ['gunicorn', '-c', 'gunicorn.conf.py']
+    run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,38 @@
+function renderLessonContent(lessonTitle, lessonId, content, html) {
+    const $contentArea = $('.content-area');
+    // Saved lessons come with sanitized HTML from the server; partial streams are converted here
+    if (!html) {
+        var converter = new showdown.Converter();
+        html = converter.makeHtml(content.replace(/```html/g, '').replace(/```/g, ''));
+    }
+
+    $contentArea.html(html + `<button onClick="markAsCompleted(${lessonId})" style="border-color: transparent; background-color: #0097b2; color: #fff; border-radius: 3px; font-size: 22px;">Mark as completed</button>`);
+    const $lessonTitle = $('.lesson-title');
+    $lessonTitle.text(lessonTitle);
+}
+
+function markLessonReady(lessonId) {
+    $('[data-lesson-id="' + lessonId + '"]').addClass('ready');
+}
+
+function loadLesson(lessonTitle, lessonId) {
+    // Plain GET: the browser keeps the response and revalidates it with If-None-Match
+    $.ajax({
+        url: `/api/lessons/${lessonId}/content`,
+        type: 'GET',
+        dataType: 'json',
+        success: function (data) {
+            $('.chat-widget-body').empty();
+            $('.chat-widget').show();
+            renderLessonContent(lessonTitle, lessonId, data.content, data.html);
+        },
+        error: function (xhr, status, error) {
+            // Not generated after all
+            streamLessons(lessonTitle, lessonId);
+        }
+    });
+}
+
 function generateLessons(lessonTitle, lessonId) {
     $('.chat-widget').hide();
     $('#loader-container').css('display', 'flex');
@@ -11,21 +46,14 @@ function generateLessons(lessonTitle, lessonId) {
             $('.chat-widget').show();
 
             $('#loader-container').hide();
+            markLessonReady(lessonId);
             Swal.fire({
                 icon: 'success',
                 title: 'Lesson generated successfully!',
                 showConfirmButton: false,
                 timer: 1500
             }).then(() => {
-                const content = data.content;
-                const $contentArea = $('.content-area');
-                var converter = new showdown.Converter();
-                var html = converter.makeHtml(content);
-
-                $contentArea.html(html + `<button onClick="markAsCompleted(${lessonId})" style="border-color: transparent; background-color: #0097b2; color: #fff; border-radius: 3px; font-size: 22px;">Mark as completed</button>`);
-                const $lessonTitle = $('.lesson-title');
-                $lessonTitle.text(lessonTitle);
-
+                renderLessonContent(lessonTitle, lessonId, data.content, data.html);
             });
         },
         error: function (xhr, status, error) {
@@ -40,6 +68,128 @@ function generateLessons(lessonTitle, lessonId) {
     });
 }
 
+function streamLessons(lessonTitle, lessonId) {
+    // Browsers without streaming fetch get the blocking endpoint
+    if (!window.fetch || !window.ReadableStream || !window.TextDecoder) {
+        generateLessons(lessonTitle, lessonId);
+        return;
+    }
+
+    $('.chat-widget').hide();
+    $('#loader-container').css('display', 'flex');
+
+    let content = '';
+    let html = null;
+    let received = false;
+    let renderPending = false;
+
+    // Re-render at most once per animation frame while tokens arrive
+    function scheduleRender() {
+        if (renderPending) {
+            return;
+        }
+        renderPending = true;
+        window.requestAnimationFrame(() => {
+            renderPending = false;
+            renderLessonContent(lessonTitle, lessonId, content, html);
+        });
+    }
+
+    function handleEvent(rawEvent) {
+        let eventName = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach((line) => {
+            if (line.startsWith('event:')) {
+                eventName = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                data += line.slice(5).trim();
+            }
+        });
+        if (!data) {
+            return;
+        }
+        const payload = JSON.parse(data);
+        if (eventName === 'chunk') {
+            if (!received) {
+                received = true;
+                $('#loader-container').hide();
+                $('.chat-widget-body').empty();
+                $('.chat-widget').show();
+            }
+            content += payload.text;
+            scheduleRender();
+        } else if (eventName === 'done') {
+            content = payload.content;
+            html = payload.html;
+            markLessonReady(lessonId);
+            scheduleRender();
+        } else if (eventName === 'error') {
+            throw new Error(payload.error);
+        }
+    }
+
+    fetch('/api/generate_content/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+        credentials: 'same-origin',
+        body: JSON.stringify({ lesson_title: lessonTitle, lesson_id: lessonId, course_title: courseTitle, user_id: userId })
+    }).then((response) => {
+        if (!response.ok || !response.body) {
+            throw new Error('Streaming request failed');
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        function read() {
+            return reader.read().then(({ done, value }) => {
+                if (done) {
+                    return;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                let boundary = buffer.indexOf('\n\n');
+                while (boundary !== -1) {
+                    handleEvent(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                    boundary = buffer.indexOf('\n\n');
+                }
+                return read();
+            });
+        }
+        return read();
+    }).catch(() => {
+        $('#loader-container').hide();
+        $('.chat-widget').show();
+        if (!received) {
+            generateLessons(lessonTitle, lessonId);
+            return;
+        }
+        Swal.fire({
+            icon: 'error',
+            title: 'Failed to generate lesson',
+            text: 'Please try again later'
+        });
+    });
+}
+
+function pollCourseProgress() {
+    $.ajax({
+        url: `/api/courses/${courseId}/progress`,
+        type: 'GET',
+        success: function (data) {
+            data.ready_lesson_ids.forEach((lessonId) => {
+                $('[data-lesson-id="' + lessonId + '"]').addClass('ready');
+            });
+            if (!data.pregenerating || data.ready === data.total) {
+                $('.pregenerate-progress').hide();
+                return;
+            }
+            $('.pregenerate-progress').text(`${data.ready} of ${data.total} lessons ready (${data.percent}%)`).show();
+            setTimeout(pollCourseProgress, 3000);
+        }
+    });
+}
+
 function scrollChatToBottom() {
     var chatWidgetBody = $('.chat-widget-body');
     if (chatWidgetBody.length > 0) {
@@ -107,6 +257,8 @@ $(document).ready(function () {
 
     controlChatBotApp();
 
+    pollCourseProgress();
+
     $('.chat-widget').hide();
 
     $('.generate-lesson-content').on('click', function () {
@@ -115,7 +267,11 @@ $(document).ready(function () {
         const lessonId = $(this).data('lesson-id');
         var contentText = $('.content-area').text();
 
-        generateLessons(lessonTitle, lessonId);
+        if ($(this).hasClass('ready')) {
+            loadLesson(lessonTitle, lessonId);
+        } else {
+            streamLessons(lessonTitle, lessonId);
+        }
     });
 
     $('.send-chat').click(function () {
@@ -45,6 +45,9 @@ def test_llm_service():
         except Exception as e:
             print(f"❌ Error: {e}")
     
+    print(f"\n🔌 Connection pool: {llm_service.pool_stats()}")
+    print(f"🗃️  Response cache: {llm_service.cache_stats()}")
+    print(f"🛡️  Backend: {llm_service.backend_stats()}")
     print("\n" + "=" * 50)
     print("🎉 LLM Service test completed!")
 
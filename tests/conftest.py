@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from app import create_app, db
+from config.config import Config
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp_path, 'test.db')}"
+        WTF_CSRF_ENABLED = False
+        METRICS_ENABLED = False
+
+    test_app = create_app(TestConfig)
+    with test_app.app_context():
+        yield test_app
+        db.session.remove()
+    with test_app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Create a user; with a client, log it in through the session cookie"""
+    from app.models.models import Users
+
+    def make(username, client=None):
+        user = Users(username=username, password='x', name=username.title())
+        db.session.add(user)
+        db.session.commit()
+        if client is not None:
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user.id)
+                session['_fresh'] = True
+        return user.id
+    return make
@@ -0,0 +1,58 @@
+from flask import g
+
+from app import db
+from app.models.models import Courses, LearningPaths
+from app.services import generation
+
+
+def add_path(user_id, title='Python', courses=('Basics',)):
+    path = LearningPaths(title=title, user_id=user_id)
+    db.session.add(path)
+    db.session.flush()
+    course_ids = []
+    for course_title in courses:
+        course = Courses(title=course_title, user_id=user_id, learning_path_id=path.id)
+        db.session.add(course)
+        db.session.flush()
+        course_ids.append(course.id)
+    db.session.commit()
+    return path.id, course_ids
+
+
+def test_path_lessons_of_another_user_are_not_found(client, make_user, monkeypatch):
+    owner = make_user('owner')
+    make_user('intruder', client)
+    path_id, _ = add_path(owner)
+    calls = []
+    monkeypatch.setattr(generation.llm_service, 'generate_response', lambda *args, **kwargs: calls.append(args))
+
+    for payload in ({'path_id': path_id}, {'path_id': path_id, 'async': True}):
+        assert client.post('/api/generate_path_lessons', json=payload).status_code == 404
+    assert calls == []
+    assert generation.generate_path_lessons(path_id, owner + 1) is None
+
+
+def test_owner_gets_batched_lessons(client, make_user, monkeypatch):
+    owner = make_user('owner', client)
+    path_id, (course_id,) = add_path(owner)
+    monkeypatch.setattr(generation.llm_service, 'generate_response',
+                        lambda *args, **kwargs: "## Course 1: Basics\n1. Variables\n2. Loops\n")
+    response = client.post('/api/generate_path_lessons', json={'path_id': path_id})
+    assert response.status_code == 200
+    assert response.get_json() == {'batched': [course_id], 'fallback': []}
+
+
+def test_course_progress_is_scoped_to_the_owner(app, client, make_user):
+    owner_client = app.test_client()
+    owner = make_user('owner', owner_client)
+    _, (course_id,) = add_path(owner)
+    make_user('intruder', client)
+    assert client.get(f"/api/courses/{course_id}/progress").status_code == 404
+
+    # The fixture's app context outlives requests, and Flask-Login caches the
+    # loaded user on g
+    g.pop('_login_user', None)
+    response = owner_client.get(f"/api/courses/{course_id}/progress")
+    assert response.status_code == 200
+    assert response.get_json()['course_id'] == course_id
+    assert owner_client.get('/api/courses/9999/progress').status_code == 404
@@ -0,0 +1,59 @@
+import json
+
+from flask import Flask
+
+from app.utils.assets import STATIC_DIR, AssetManifest
+from build_assets import minify_css, minify_js, split_bundle
+
+
+def test_minify_css_drops_comments_and_whitespace():
+    css = "/* layout */\n.card  >  .title {\n    color: red;\n    margin: 0 auto;\n}\n"
+    assert minify_css(css) == ".card>.title{color:red;margin:0 auto}"
+
+
+def test_minify_css_keeps_licenses_and_strings():
+    css = '/*! MIT */\n.icon::before {\n  content: "a  /* b */  c";\n}\n'
+    assert minify_css(css) == '/*! MIT */ .icon::before{content:"a  /* b */  c"}'
+
+
+def test_minify_js_drops_comments_and_indentation():
+    js = "// helper\nfunction add(a, b) {\n    /* sum */\n    return a + b;\n}\n"
+    assert minify_js(js) == "function add(a,b){return a + b;}"
+
+
+def test_minify_js_keeps_line_breaks_for_semicolon_insertion():
+    js = "let a = 1\nlet b = a\n++b\n"
+    assert minify_js(js) == "let a=1\nlet b=a\n++b"
+
+
+def test_minify_js_leaves_strings_templates_and_regexes_alone():
+    js = "const s = 'a // b';\nconst t = `x ${ y  /  2 } z`;\nconst r = /\\/\\/ +/g;\n"
+    assert minify_js(js) == "const s='a // b';const t=`x ${ y  /  2 } z`;const r=/\\/\\/ +/g;"
+
+
+def test_minify_js_keeps_license_comments():
+    assert minify_js("/*! lib v1 */\nvar x = 1;") == "/*! lib v1 */\nvar x=1;"
+
+
+def test_split_bundle_keeps_missing_vendor_files_in_place():
+    sources = ['vendor/rubik/rubik.css', 'css/general.css', 'css/animations.css', 'vendor/fontawesome/css/all.min.css']
+    assert split_bundle(sources) == [
+        'vendor/rubik/rubik.css',
+        ['css/general.css', 'css/animations.css'],
+        'vendor/fontawesome/css/all.min.css',
+    ]
+
+
+def test_partial_bundle_urls(tmp_path):
+    manifest_path = tmp_path / 'manifest.json'
+    manifest_path.write_text(json.dumps({
+        'base.css': ['vendor/bootstrap/bootstrap.min.css', 'dist/base.1a2b3c4d5e6f.css'],
+        'course.css': 'dist/course.1a2b3c4d5e6f.css',
+    }))
+    manifest = AssetManifest(path=str(manifest_path), use_bundles=True)
+    app = Flask(__name__, static_folder=STATIC_DIR)
+    with app.test_request_context():
+        # The CDN URL until static/vendor/ is populated
+        assert manifest.urls('base.css') == [manifest.url('vendor/bootstrap/bootstrap.min.css'),
+                                             '/static/dist/base.1a2b3c4d5e6f.css']
+        assert manifest.urls('course.css') == ['/static/dist/course.1a2b3c4d5e6f.css']
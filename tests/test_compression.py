@@ -0,0 +1,108 @@
+import zlib
+
+from app.utils.compression import CompressionMiddleware
+
+EVENTS = [f"event: chunk\ndata: part {i}\n\n".encode() for i in range(3)]
+
+
+def sse_app(environ, start_response):
+    # Like Flask: headers first, then a lazily produced body
+    start_response('200 OK', [('Content-Type', 'text/event-stream')])
+    return (event for event in EVENTS)
+
+
+def call(middleware, accept_encoding):
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response.update(status=status, headers=dict(headers))
+
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/stream', 'HTTP_ACCEPT_ENCODING': accept_encoding}
+    return middleware(environ, start_response), response
+
+
+def gzip_only(app=sse_app):
+    middleware = CompressionMiddleware(app, min_size=0)
+    middleware.encodings = ('gzip',)
+    return middleware
+
+
+def test_negotiate_prefers_brotli_when_available():
+    middleware = CompressionMiddleware(sse_app)
+    middleware.encodings = ('br', 'gzip')
+    assert middleware.negotiate('gzip, deflate, br') == 'br'
+    assert middleware.negotiate('br;q=0.5, gzip') == 'gzip'
+    assert middleware.negotiate('*') == 'br'
+
+
+def test_negotiate_honours_refusals():
+    middleware = gzip_only()
+    assert middleware.negotiate('') is None
+    assert middleware.negotiate('identity') is None
+    assert middleware.negotiate('gzip;q=0') is None
+    assert middleware.negotiate('*;q=0, GZIP') == 'gzip'
+    assert middleware.negotiate('br') is None
+    assert middleware.negotiate('gzip;q=oops') is None
+
+
+def test_sse_events_are_flushed_one_by_one():
+    body, response = call(gzip_only(), 'gzip')
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    decompressor = zlib.decompressobj(31)
+    chunks = iter(body)
+    for event in EVENTS:
+        # Each event decodes completely before the next one is produced
+        assert decompressor.decompress(next(chunks)) == event
+    assert decompressor.decompress(b''.join(chunks)) == b''
+    assert decompressor.eof
+    body.close()
+
+
+def test_identity_when_not_accepted():
+    body, response = call(gzip_only(), '')
+    assert 'Content-Encoding' not in response['headers']
+    assert b''.join(body) == b''.join(EVENTS)
+    body.close()
+
+
+def json_app(body=b'{"content": "' + b'lesson text ' * 200 + b'"}', status='200 OK', headers=()):
+    def app(environ, start_response):
+        start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body))),
+                                ('ETag', '"abc"'), *headers])
+        return [body]
+    return app
+
+
+def test_compressed_response_gets_a_weak_etag_and_vary():
+    body, response = call(gzip_only(json_app()), 'gzip')
+    headers = response['headers']
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'] == 'W/"abc"'
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert int(headers['Content-Length']) == len(b''.join(body))
+
+
+def test_uncompressed_response_keeps_a_strong_etag_but_varies():
+    _, response = call(gzip_only(json_app()), 'identity')
+    assert response['headers']['ETag'] == '"abc"'
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+
+    middleware = CompressionMiddleware(json_app(b'{}'), min_size=1024)
+    _, response = call(middleware, 'gzip')
+    assert 'Content-Encoding' not in response['headers']
+    assert response['headers']['ETag'] == '"abc"'
+
+
+def test_not_modified_is_passed_through():
+    _, response = call(gzip_only(json_app(b'', status='304 Not Modified')), 'gzip')
+    assert 'Content-Encoding' not in response['headers']
+    assert response['headers']['ETag'] == '"abc"'
+
+
+def test_vary_is_merged_with_existing_values():
+    _, response = call(gzip_only(json_app(headers=[('Vary', 'Cookie')])), 'gzip')
+    assert response['headers']['Vary'] == 'Cookie, Accept-Encoding'
+    _, response = call(gzip_only(json_app(headers=[('Vary', 'accept-encoding')])), 'gzip')
+    assert response['headers']['Vary'] == 'accept-encoding'
+    _, response = call(gzip_only(json_app(headers=[('Vary', '*')])), 'gzip')
+    assert response['headers']['Vary'] == '*'
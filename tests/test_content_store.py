@@ -0,0 +1,71 @@
+import pytest
+
+from app import db
+from app.models.models import LessonBlobs, Lessons
+from app.services.content_store import blob_hash, content_store, decode, encode
+
+BODY = '# Variables\n\n' + 'A variable names a value so later code can refer to it. ' * 40
+
+
+def add_lesson(content, title='Variables'):
+    lesson = Lessons(title=title)
+    lesson.content = content
+    db.session.add(lesson)
+    db.session.commit()
+    return lesson
+
+
+def refcounts():
+    return {blob.hash: blob.refcount for blob in LessonBlobs.query}
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'none'])
+def test_encode_round_trips(codec):
+    used, data = encode(BODY, codec)
+    assert used == codec
+    assert decode(used, data) == BODY
+    if codec == 'zlib':
+        assert len(data) < len(BODY) / 4
+
+
+def test_bodies_that_do_not_shrink_are_stored_raw():
+    text = '# Hi'
+    assert encode(text, 'zlib') == ('none', text.encode('utf-8'))
+
+
+def test_identical_bodies_share_one_blob(app):
+    first = add_lesson(BODY)
+    second = add_lesson(BODY, title='Variables again')
+
+    assert first.content_hash == second.content_hash == blob_hash(BODY)
+    assert refcounts() == {blob_hash(BODY): 2}
+    assert second.content == BODY
+    assert second.legacy_content is None
+
+
+def test_rewritten_and_deleted_lessons_release_their_blob(app):
+    first = add_lesson(BODY)
+    second = add_lesson(BODY, title='Variables again')
+
+    second.content = BODY + 'More.'
+    db.session.commit()
+    assert refcounts() == {blob_hash(BODY): 1, blob_hash(BODY + 'More.'): 1}
+
+    db.session.delete(first)
+    db.session.commit()
+    assert refcounts()[blob_hash(BODY)] == 0
+    assert content_store.collect_garbage() == 1
+    assert list(refcounts()) == [blob_hash(BODY + 'More.')]
+    assert content_store.get(blob_hash(BODY)) is None
+
+
+def test_stats_report_the_bytes_saved(app):
+    add_lesson(BODY)
+    add_lesson(BODY, title='Variables again')
+
+    stats = content_store.get_stats()
+    size = len(BODY.encode('utf-8'))
+    assert (stats['blobs'], stats['references']) == (1, 2)
+    assert (stats['unique_bytes'], stats['logical_bytes']) == (size, 2 * size)
+    assert stats['saved_bytes'] == 2 * size - stats['stored_bytes']
+    assert stats['saved_ratio'] > 0.9
@@ -0,0 +1,64 @@
+from app import db
+from app.services.fragment_cache import FragmentCache
+
+
+class Renderer:
+    def __init__(self, html='<ul>lessons</ul>'):
+        self.html = html
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.html
+
+
+def test_hit_until_bumped(app):
+    cache = FragmentCache(max_bytes=1024, enabled=True)
+    render = Renderer()
+    assert cache.get_or_render('course', 1, 7, render) == render.html
+    assert cache.get_or_render('course', 1, 7, render) == render.html
+    assert render.calls == 1
+
+    cache.bump('course', [1])
+    db.session.commit()
+    cache.get_or_render('course', 1, 7, render)
+    assert render.calls == 2
+    assert cache.version('course', 1) == 1
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_bump_takes_effect_on_commit_only(app):
+    cache = FragmentCache(max_bytes=1024, enabled=True)
+    cache.bump('course', [1])
+    db.session.commit()
+    cache.bump('course', [1, 1])
+    db.session.rollback()
+    assert cache.version('course', 1) == 1
+
+
+def test_fragments_are_per_user_and_entity(app):
+    cache = FragmentCache(max_bytes=1024, enabled=True)
+    render = Renderer()
+    cache.get_or_render('course', 1, 7, render)
+    cache.get_or_render('course', 1, 8, render)
+    cache.get_or_render('course', 2, 7, render)
+    cache.get_or_render('learningpath', 1, 7, render)
+    assert render.calls == 4
+
+
+def test_least_recently_used_is_evicted(app):
+    render = Renderer('x' * 10)
+    cache = FragmentCache(max_bytes=25, enabled=True)
+    cache.get_or_render('course', 1, 7, render)
+    cache.get_or_render('course', 2, 7, render)
+    cache.get_or_render('course', 1, 7, render)  # Course 2 is now the oldest
+    cache.get_or_render('course', 3, 7, render)
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+    assert stats['bytes'] == 20
+
+    cache.get_or_render('course', 1, 7, render)
+    assert render.calls == 3
+    cache.get_or_render('course', 2, 7, render)
+    assert render.calls == 4
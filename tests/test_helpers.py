@@ -0,0 +1,60 @@
+from app.services.generation import BATCHED_LESSONS_PROMPT
+from app.utils.helpers import parse_batched_prompt, parse_prompt
+
+ANSWER = """
+## Course 1: Python Basics
+1. Variables and Types
+2. Control Flow
+## Course 2: Web APIs
+1. HTTP Fundamentals
+2. Building a REST API
+"""
+
+
+def test_parse_prompt_reads_numbered_lines():
+    assert parse_prompt("# Path\n1. First\n2. Second\nnot numbered") == ['First', 'Second']
+
+
+def test_sections_are_keyed_by_course_index():
+    assert parse_batched_prompt(ANSWER, ['Python Basics', 'Web APIs']) == {
+        0: ['Variables and Types', 'Control Flow'],
+        1: ['HTTP Fundamentals', 'Building a REST API'],
+    }
+
+
+def test_echoed_prompt_placeholders_are_ignored():
+    prompt = BATCHED_LESSONS_PROMPT.format(lp_title='Backend', course_list='        1. Python Basics\n        2. Web APIs')
+    assert parse_batched_prompt(prompt + ANSWER, ['Python Basics', 'Web APIs']) == {
+        0: ['Variables and Types', 'Control Flow'],
+        1: ['HTTP Fundamentals', 'Building a REST API'],
+    }
+
+
+def test_placeholder_lines_are_dropped():
+    response = "## Course 1: Python Basics\n1. Variables\n2. [Lesson Name 2]\n3. (repeat as necessary)\n"
+    assert parse_batched_prompt(response, ['Python Basics']) == {0: ['Variables']}
+
+
+def test_duplicate_titles_get_their_own_sections():
+    response = "## Course 1: Practice\n1. Warm-up\n## Course 2: Practice\n1. Final project\n"
+    assert parse_batched_prompt(response, ['Practice', 'Practice']) == {0: ['Warm-up'], 1: ['Final project']}
+
+
+def test_unnumbered_duplicates_are_matched_in_order():
+    response = "## Practice\n1. Warm-up\n## Practice\n1. Final project\n"
+    assert parse_batched_prompt(response, ['Practice', 'Practice']) == {0: ['Warm-up'], 1: ['Final project']}
+
+
+def test_missing_sections_are_left_out():
+    response = "## Course 2: Web APIs\n1. HTTP Fundamentals\n"
+    assert parse_batched_prompt(response, ['Python Basics', 'Web APIs']) == {1: ['HTTP Fundamentals']}
+
+
+def test_misnamed_section_is_not_assigned_by_number():
+    response = "## Course 1: Intro to Python\n1. Setup\n## Course 2: Web APIs\n1. HTTP Fundamentals\n"
+    assert parse_batched_prompt(response, ['Databases', 'Web APIs']) == {1: ['HTTP Fundamentals']}
+
+
+def test_shortened_names_still_match():
+    response = "## Course 1: Python\n1. Setup\n"
+    assert parse_batched_prompt(response, ['Python Basics']) == {0: ['Setup']}
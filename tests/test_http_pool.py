@@ -0,0 +1,51 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.http_pool import PooledTransport
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused_and_counted_idle(url):
+    transport = PooledTransport(keepalive=60)
+    for _ in range(3):
+        assert transport.post(url, data=b'x').content == b'ok'
+    stats = transport.get_stats()
+    assert (stats['opened'], stats['reused'], stats['active'], stats['idle']) == (1, 2, 0, 1)
+    transport.close()
+    assert transport.get_stats()['idle'] == 0
+
+
+def test_full_pool_discards_extra_connections(url):
+    transport = PooledTransport(pool_maxsize=1, keepalive=60)
+    responses = [transport.session.post(url, data=b'x', stream=True) for _ in range(2)]
+    assert transport.get_stats()['active'] == 2
+    for response in responses:
+        response.content
+        response.close()
+    assert transport.get_stats()['idle'] == 1
+    transport.close()
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.models import Jobs
+from app.services.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+
+@pytest.fixture
+def queue(app):
+    queue = JobQueue(workers=0, max_attempts=3, retry_backoff=10)
+    calls = []
+
+    @queue.handler('echo')
+    def echo(value):
+        calls.append(value)
+        return {'value': value}
+
+    @queue.handler('flaky')
+    def flaky(value):
+        calls.append(value)
+        raise RuntimeError('upstream timed out')
+
+    queue.calls = calls
+    return queue
+
+
+def make_due(job):
+    job.run_after = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_job_runs_once_and_stores_its_result(queue):
+    job = queue.enqueue('echo', {'value': 7})
+
+    assert queue.run_pending() == 1
+    assert queue.run_pending() == 0
+    db.session.refresh(job)
+    assert job.status == SUCCEEDED
+    assert job.attempts == 1
+    assert job.result == '{"value": 7}'
+    assert queue.calls == [7]
+
+
+def test_claimed_job_is_not_claimed_again(queue):
+    job = queue.enqueue('echo', {'value': 1})
+    other = JobQueue(workers=0)
+
+    claimed = queue._claim()
+    assert claimed.id == job.id
+    assert claimed.status == RUNNING
+    assert other._claim() is None
+    assert queue._claim() is None
+
+
+def test_failed_job_is_retried_after_backoff(queue):
+    job = queue.enqueue('flaky', {'value': 1})
+    before = datetime.utcnow()
+
+    assert queue.run_pending() == 1
+    db.session.refresh(job)
+    assert job.status == QUEUED
+    assert job.error == 'upstream timed out'
+    assert job.run_after >= before + timedelta(seconds=10)
+    # Not due yet, so nothing runs
+    assert queue.run_pending() == 0
+
+    make_due(job)
+    assert queue.run_pending() == 1
+    db.session.refresh(job)
+    assert job.attempts == 2
+    assert job.run_after >= datetime.utcnow() + timedelta(seconds=19)
+
+
+def test_job_fails_after_max_attempts(queue):
+    job = queue.enqueue('flaky', {'value': 1})
+
+    for _ in range(3):
+        make_due(job)
+        assert queue.run_pending() == 1
+        db.session.refresh(job)
+
+    assert job.status == FAILED
+    assert job.attempts == 3
+    assert queue.calls == [1, 1, 1]
+    make_due(job)
+    assert queue.run_pending() == 0
+
+
+def test_job_without_handler_fails_without_retry(queue):
+    job = Jobs(kind='gone', payload='{}', status=QUEUED, max_attempts=3)
+    db.session.add(job)
+    db.session.commit()
+
+    assert queue.run_pending() == 1
+    db.session.refresh(job)
+    assert job.status == FAILED
+    assert job.attempts == 1
+
+
+def test_unknown_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.enqueue('missing', {})
+    assert Jobs.query.count() == 0
+
+
+def test_stale_running_jobs_are_queued_again(queue):
+    stale = queue.enqueue('echo', {'value': 1})
+    fresh = queue.enqueue('echo', {'value': 2})
+    queue._claim()
+    queue._claim()
+    stale.updated_at = datetime.utcnow() - timedelta(seconds=queue.stale_after + 1)
+    db.session.commit()
+
+    queue._requeue_stale()
+    db.session.refresh(stale)
+    db.session.refresh(fresh)
+    assert stale.status == QUEUED
+    assert fresh.status == RUNNING
+    assert queue.run_pending() == 1
+    assert queue.calls == [1]
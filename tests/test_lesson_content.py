@@ -0,0 +1,66 @@
+import gzip
+
+from app import db
+from app.models.models import Lessons
+from app.services.content_store import content_store
+
+BODY = '# Variables\n\n' + 'A variable names a value so later code can refer to it. ' * 40
+
+
+def add_lesson(content=BODY):
+    lesson = Lessons(title='Variables')
+    if content:
+        lesson.content = content
+    db.session.add(lesson)
+    db.session.commit()
+    return lesson
+
+
+def test_content_is_served_with_a_validator(client, make_user):
+    make_user('learner', client)
+    lesson = add_lesson()
+
+    response = client.get(f"/api/lessons/{lesson.id}/content")
+    assert response.status_code == 200
+    assert response.get_json()['content'] == BODY
+    assert response.headers['ETag'] == f'"{content_store.etag(lesson.content_hash)}"'
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+
+def test_matching_etag_gets_an_empty_304(client, make_user):
+    make_user('learner', client)
+    lesson = add_lesson()
+    etag = client.get(f"/api/lessons/{lesson.id}/content").headers['ETag']
+
+    response = client.get(f"/api/lessons/{lesson.id}/content", headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    lesson.content = BODY + 'Updated.'
+    db.session.commit()
+    assert client.get(f"/api/lessons/{lesson.id}/content", headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_weakened_etag_of_a_compressed_response_still_matches(client, make_user):
+    make_user('learner', client)
+    lesson = add_lesson()
+
+    response = client.get(f"/api/lessons/{lesson.id}/content", headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).startswith(b'{')
+    etag = response.headers['ETag']
+    assert etag == f'W/"{content_store.etag(lesson.content_hash)}"'
+
+    revalidated = client.get(f"/api/lessons/{lesson.id}/content",
+                             headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert 'Content-Encoding' not in revalidated.headers
+
+
+def test_lesson_without_content_is_not_found(client, make_user):
+    make_user('learner', client)
+    lesson = add_lesson(content=None)
+
+    assert client.get(f"/api/lessons/{lesson.id}/content").status_code == 404
+    assert client.get('/api/lessons/9999/content').status_code == 404
@@ -0,0 +1,59 @@
+import sqlite3
+
+from app.services.llm_cache import LLMCache
+
+PARAMETERS = {'max_length': 100}
+
+
+def make_cache(tmp_path, **kwargs):
+    options = {'max_entries': 10, 'disk_max_entries': 100, 'ttl': 60, 'evict_every': 1}
+    options.update(kwargs)
+    return LLMCache(path=str(tmp_path / 'llm_cache.db'), **options)
+
+
+def disk_rows(tmp_path):
+    with sqlite3.connect(str(tmp_path / 'llm_cache.db')) as conn:
+        return conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+
+def test_entries_survive_a_restart(tmp_path):
+    make_cache(tmp_path).set('What is  Python?', 'model', PARAMETERS, 'A language')
+    cache = make_cache(tmp_path)
+    # Whitespace is normalized in the key
+    assert cache.get('What is Python?', 'model', PARAMETERS) == 'A language'
+    assert cache.get('What is Python?', 'model', PARAMETERS) == 'A language'
+    stats = cache.get_stats()
+    assert (stats['disk_hits'], stats['memory_hits']) == (1, 1)
+    assert cache.get('What is Python?', 'other-model', PARAMETERS) is None
+
+
+def test_expired_entries_are_not_served(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('app.services.llm_cache.time.time', lambda: clock[0])
+    make_cache(tmp_path, ttl=10).set('prompt', 'model', PARAMETERS, 'answer')
+    clock[0] += 11
+    cache = make_cache(tmp_path, ttl=10)
+    assert cache.get('prompt', 'model', PARAMETERS) is None
+    assert cache.get_stats()['expirations'] == 1
+    assert disk_rows(tmp_path) == 0
+
+
+def test_disk_is_capped_to_the_most_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr('app.services.llm_cache.time.time', lambda: float(next(clock)))
+    cache = make_cache(tmp_path, max_entries=1, disk_max_entries=3)
+    for number in range(5):
+        cache.set(f"prompt {number}", 'model', PARAMETERS, f"answer {number}")
+    assert disk_rows(tmp_path) == 3
+    assert cache.get_stats()['disk_evictions'] == 2
+    assert make_cache(tmp_path).get('prompt 0', 'model', PARAMETERS) is None
+    assert make_cache(tmp_path).get('prompt 4', 'model', PARAMETERS) == 'answer 4'
+
+
+def test_eviction_runs_every_n_writes(tmp_path):
+    cache = make_cache(tmp_path, max_entries=1, disk_max_entries=2, evict_every=4)
+    for number in range(4):
+        cache.set(f"prompt {number}", 'model', PARAMETERS, 'answer')
+    assert disk_rows(tmp_path) == 4  # Only the first write evicted, with one row in the table
+    cache.set('prompt 4', 'model', PARAMETERS, 'answer')
+    assert disk_rows(tmp_path) == 2
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.utils.metrics import _after_cursor_execute, _before_cursor_execute, is_local_request, metrics
+from config.config import Config
+
+KEY = ('masari_db_query_duration_seconds', (('route', '<background>'),))
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', True)
+    monkeypatch.setattr(metrics, '_histograms', {})
+    engine = create_engine('sqlite://')
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    yield engine
+    engine.dispose()
+
+
+def query_count():
+    histogram = metrics._histograms.get(KEY)
+    return sum(histogram[0]) if histogram else 0
+
+
+def test_query_durations_are_observed(engine):
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        connection.execute(text('SELECT 2'))
+    assert query_count() == 2
+
+
+def test_failed_statements_leave_nothing_behind(engine):
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text('SELECT * FROM missing'))
+        connection.execute(text('SELECT 1'))
+        assert not any(key.startswith('metrics') for key in connection.info)
+    assert query_count() == 1
+
+
+def metrics_app(tmp_path, monkeypatch, token=None):
+    # init_metrics switches on the global instance; monkeypatch restores it
+    monkeypatch.setattr(metrics, 'enabled', False)
+    monkeypatch.setattr(metrics, 'directory', metrics.directory)
+
+    class MetricsConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp_path, 'test.db')}"
+        METRICS_DIR = os.path.join(tmp_path, 'metrics')
+        METRICS_TOKEN = token
+
+    app = create_app(MetricsConfig)
+    yield app.test_client()
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def open_client(tmp_path, monkeypatch):
+    yield from metrics_app(tmp_path, monkeypatch)
+
+
+@pytest.fixture
+def token_client(tmp_path, monkeypatch):
+    yield from metrics_app(tmp_path, monkeypatch, token='s3cret')
+
+
+def test_without_a_token_only_localhost_may_scrape(open_client):
+    response = open_client.get('/metrics')
+    assert response.status_code == 200
+    assert b'masari_http_requests_in_flight' in response.data
+    assert open_client.get('/metrics', environ_base={'REMOTE_ADDR': '::1'}).status_code == 200
+    assert open_client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 403
+
+
+def test_requests_relayed_by_a_proxy_are_refused(open_client):
+    assert open_client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 403
+    assert open_client.get('/metrics', headers={'Forwarded': 'for=203.0.113.7'}).status_code == 403
+
+
+def test_token_is_required_from_everywhere(token_client):
+    assert token_client.get('/metrics').status_code == 401
+    assert token_client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = token_client.get('/metrics', headers={'Authorization': 'Bearer s3cret', 'X-Forwarded-For': '203.0.113.7'},
+                                environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    assert response.status_code == 200
+
+
+def test_is_local_request():
+    assert is_local_request({'REMOTE_ADDR': '127.0.0.1'})
+    assert is_local_request({'REMOTE_ADDR': '::ffff:127.0.0.1'})
+    assert not is_local_request({'REMOTE_ADDR': '10.0.0.5'})
+    assert not is_local_request({'REMOTE_ADDR': ''})
+    assert not is_local_request({'REMOTE_ADDR': '127.0.0.1', 'HTTP_X_REAL_IP': '203.0.113.7'})
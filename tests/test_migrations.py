@@ -0,0 +1,92 @@
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import create_app, db
+from app.migrations import SchemaOutdated, check_schema, load_migrations, run_migrations
+from app.models.models import LessonBlobs, Lessons
+from config.config import Config
+
+# The schema init_db.py created before migrations existed
+LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(20) NOT NULL UNIQUE, password VARCHAR(80) NOT NULL,
+                    name VARCHAR(100) NOT NULL, birthdate DATE, pdf_path VARCHAR(150));
+CREATE TABLE learning_paths (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, description TEXT,
+                             user_id INTEGER NOT NULL REFERENCES users (id));
+CREATE TABLE courses (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, description TEXT,
+                      user_id INTEGER NOT NULL REFERENCES users (id),
+                      learning_path_id INTEGER REFERENCES learning_paths (id));
+CREATE TABLE lessons (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, content TEXT,
+                      course_id INTEGER REFERENCES courses (id), completed BOOLEAN NOT NULL);
+INSERT INTO users VALUES (1, 'learner', 'x', 'Learner', NULL, NULL);
+INSERT INTO learning_paths VALUES (1, 'Python', NULL, 1);
+INSERT INTO courses VALUES (1, 'Basics', NULL, 1, 1);
+INSERT INTO lessons VALUES (1, 'Variables', '# Variables', 1, 0);
+INSERT INTO lessons VALUES (2, 'Variables again', '# Variables', 1, 0);
+INSERT INTO lessons VALUES (3, 'Loops', '# Loops', 1, 1);
+INSERT INTO lessons VALUES (4, 'Empty', '', 1, 0);
+INSERT INTO lessons VALUES (5, 'Pending', NULL, 1, 0);
+"""
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = os.path.join(tmp_path, 'legacy.db')
+    connection = sqlite3.connect(path)
+    connection.executescript(LEGACY_SCHEMA)
+    connection.close()
+    return path
+
+
+def legacy_app(path, migrate):
+    class LegacyConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        METRICS_ENABLED = False
+        MIGRATE_ON_START = migrate
+
+    return create_app(LegacyConfig)
+
+
+def test_migrations_upgrade_a_legacy_database(legacy_db):
+    engine = create_engine(f"sqlite:///{legacy_db}")
+    try:
+        applied = run_migrations(engine)
+        assert [version for version, _ in applied] == [module.VERSION for module in load_migrations()]
+        assert run_migrations(engine) == []
+        check_schema(engine)
+    finally:
+        engine.dispose()
+
+    connection = sqlite3.connect(legacy_db)
+    indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    lesson_columns = {row[1] for row in connection.execute('PRAGMA table_info(lessons)')}
+    rows = connection.execute('SELECT id, content, content_hash FROM lessons ORDER BY id').fetchall()
+    connection.close()
+
+    assert {'ix_courses_learning_path_id', 'ix_learning_paths_user_id', 'ix_lessons_course_id_id',
+            'ix_lessons_content_hash'} <= indexes
+    assert 'content_hash' in lesson_columns
+    assert [content for _, content, _ in rows] == [None] * 5
+    assert rows[0][2] == rows[1][2] != rows[2][2]
+    assert rows[3][2] is None and rows[4][2] is None
+
+
+def test_app_start_migrates_and_keeps_lesson_bodies(legacy_db):
+    app = legacy_app(legacy_db, migrate=True)
+    with app.app_context():
+        try:
+            lessons = Lessons.query.order_by(Lessons.id).all()
+            assert [lesson.content for lesson in lessons] == ['# Variables', '# Variables', '# Loops', None, None]
+            assert [lesson.completed for lesson in lessons] == [False, False, True, False, False]
+            blobs = {blob.hash: blob.refcount for blob in LessonBlobs.query}
+            assert sorted(blobs.values()) == [1, 2]
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+
+def test_app_refuses_a_legacy_database_without_migrating(legacy_db):
+    with pytest.raises(SchemaOutdated, match='schema is at version 0, pending migrations: 0001, '):
+        legacy_app(legacy_db, migrate=False)
@@ -0,0 +1,43 @@
+import os
+import time
+import pytest
+from app.services.password_hasher import HasherBusy, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_pending=4, log_rounds=4, timeout=5)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_check_in_the_pool(hasher):
+    password_hash = hasher.hash('secret')
+    assert hasher.check(password_hash, 'secret')
+    assert not hasher.check(password_hash, 'wrong')
+    assert not hasher.check('not a hash', 'secret')
+    assert hasher.get_stats()['pending'] == 0
+
+
+def test_timeout_is_busy_and_keeps_its_slot(hasher):
+    hasher.timeout = 0.2
+    with pytest.raises(HasherBusy):
+        hasher._run(time.sleep, 1)
+    assert hasher.get_stats()['pending'] == 1
+    deadline = time.monotonic() + 5
+    while hasher.get_stats()['pending'] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert hasher.get_stats()['pending'] == 0
+
+
+def test_broken_pool_is_replaced(hasher):
+    hasher.hash('warm up')
+    with pytest.raises(HasherBusy):
+        hasher._run(os._exit, 1)  # Kills the pool process
+    assert hasher.check(hasher.hash('secret'), 'secret')
+    assert hasher.get_stats()['pending'] == 0
+
+
+def test_inline_hashing_without_workers():
+    hasher = PasswordHasher(workers=0, log_rounds=4)
+    assert hasher.check(hasher.hash('secret'), 'secret')
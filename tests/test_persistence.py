@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.models import Courses, LearningPaths, Lessons
+from app.services.persistence import save_course_lessons, save_learning_path_tree
+
+
+@pytest.fixture
+def commits(app):
+    calls = []
+
+    def count(connection):
+        calls.append(connection)
+
+    event.listen(db.engine, 'commit', count)
+    yield calls
+    event.remove(db.engine, 'commit', count)
+
+
+def test_tree_is_saved_in_order_with_one_commit(make_user, commits):
+    user_id = make_user('learner')
+    commits.clear()
+
+    path_id = save_learning_path_tree(user_id, 'Python', [
+        ('Basics', ['Variables', 'Loops']),
+        ('Advanced', ['Generators']),
+        ('Extras', []),
+    ], description='From zero')
+
+    assert len(commits) == 1
+    path = db.session.get(LearningPaths, path_id)
+    assert (path.title, path.description, path.user_id) == ('Python', 'From zero', user_id)
+    courses = Courses.query.filter_by(learning_path_id=path_id).order_by(Courses.id).all()
+    assert [course.title for course in courses] == ['Basics', 'Advanced', 'Extras']
+    assert {course.user_id for course in courses} == {user_id}
+    titles = {course.title: [lesson.title for lesson in Lessons.query.filter_by(course_id=course.id).order_by(Lessons.id)]
+              for course in courses}
+    assert titles == {'Basics': ['Variables', 'Loops'], 'Advanced': ['Generators'], 'Extras': []}
+
+
+def test_failed_tree_leaves_nothing_behind(make_user):
+    user_id = make_user('learner')
+
+    with pytest.raises(IntegrityError):
+        save_learning_path_tree(user_id, 'Python', [('Basics', ['Variables', None])])
+
+    assert LearningPaths.query.count() == 0
+    assert Courses.query.count() == 0
+    assert Lessons.query.count() == 0
+
+
+def test_course_lessons_are_saved_with_one_commit(make_user, commits):
+    user_id = make_user('learner')
+    path_id = save_learning_path_tree(user_id, 'Python', [('Basics', []), ('Advanced', [])])
+    first, second = [course.id for course in Courses.query.filter_by(learning_path_id=path_id).order_by(Courses.id)]
+    commits.clear()
+
+    assert save_course_lessons({first: ['Variables', 'Loops'], second: ['Generators']}) == 3
+    assert len(commits) == 1
+    assert Lessons.query.filter_by(course_id=first).count() == 2
+    assert save_course_lessons({}) == 0
+    assert len(commits) == 1
+
+
+def test_failed_course_lessons_are_rolled_back(make_user):
+    user_id = make_user('learner')
+    path_id = save_learning_path_tree(user_id, 'Python', [('Basics', [])])
+    course_id = Courses.query.filter_by(learning_path_id=path_id).one().id
+
+    with pytest.raises(IntegrityError):
+        save_course_lessons({course_id: ['Variables', None]})
+    assert Lessons.query.count() == 0
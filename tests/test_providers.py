@@ -0,0 +1,222 @@
+import pytest
+from app.services.llm_service import LLMService
+from app.services.providers import (FallbackProvider, HuggingFaceProvider, LLMProvider, ProviderRouter,
+                                    ProvidersUnavailable, StreamInterrupted)
+from app.services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+PARAMETERS = {'max_length': 1000}
+
+
+class FakeProvider(LLMProvider):
+    def __init__(self, name, chunks=(), fail_after=None):
+        self.name = name
+        super().__init__()
+        self.caller.breaker = CircuitBreaker(name, failure_threshold=2, latency_threshold=0, reset_timeout=0)
+        self.chunks = list(chunks)
+        self.fail_after = fail_after
+        self.closed = False
+
+    def generate(self, prompt, parameters):
+        if self.fail_after is not None:
+            raise RuntimeError('backend went away')
+        return ''.join(self.chunks)
+
+    def stream(self, prompt, parameters, read_timeout=None):
+        self.read_timeout = read_timeout
+        try:
+            for number, chunk in enumerate(self.chunks):
+                if number == self.fail_after:
+                    raise RuntimeError('backend went away')
+                yield chunk
+            if self.fail_after is not None and self.fail_after >= len(self.chunks):
+                raise RuntimeError('backend went away')
+        finally:
+            self.closed = True
+
+
+def make_router(*providers):
+    return ProviderRouter(list(providers), FallbackProvider(lambda prompt, max_length: 'fallback'), explore_rate=0)
+
+
+def trip(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=2, latency_threshold=0, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker('test', failure_threshold=2, latency_threshold=0, reset_timeout=0)
+    trip(breaker)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=2, latency_threshold=0, reset_timeout=0)
+    trip(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_stream_falls_through_to_next_provider_before_any_output():
+    broken = FakeProvider('broken', chunks=['never'], fail_after=0)
+    healthy = FakeProvider('healthy', chunks=['a', 'b'])
+    router = make_router(broken, healthy)
+    assert list(router.stream('prompt', PARAMETERS)) == ['a', 'b']
+    assert broken.caller.breaker.get_stats()['consecutive_failures'] == 1
+
+
+def test_stream_falls_back_when_every_provider_fails():
+    router = make_router(FakeProvider('broken', chunks=['x'], fail_after=0))
+    assert ''.join(router.stream('prompt', PARAMETERS)) == 'fallback'
+
+
+def test_generate_raises_when_every_provider_fails():
+    router = make_router(FakeProvider('broken', chunks=['x'], fail_after=0))
+    with pytest.raises(ProvidersUnavailable):
+        router.generate('prompt', PARAMETERS)
+
+
+def test_fallback_answer_is_recorded_as_fallback(monkeypatch):
+    calls = []
+    monkeypatch.setattr('app.services.llm_service.record_llm_call', lambda kind, result, started: calls.append(result))
+    service = LLMService.__new__(LLMService)
+    service.cache = None
+    service.router = make_router(FakeProvider('broken', chunks=['x'], fail_after=0))
+    monkeypatch.setattr(service, '_fallback_generate', lambda prompt, max_length: 'rule-based')
+    assert service.generate_response('prompt') == 'rule-based'
+    service.router = make_router(FakeProvider('healthy', chunks=['ok']))
+    assert service.generate_response('prompt') == 'ok'
+    assert calls == ['fallback', 'ok']
+
+
+def test_fallback_provider_has_no_resilient_caller():
+    assert FallbackProvider(lambda prompt, max_length: '').caller is None
+
+
+def test_failure_after_partial_output_raises():
+    provider = FakeProvider('flaky', chunks=['a', 'b', 'c'], fail_after=2)
+    saved = []
+    stream = make_router(provider).stream('prompt', PARAMETERS, on_success=lambda p, text: saved.append(text))
+    assert next(stream) == 'a'
+    assert next(stream) == 'b'
+    with pytest.raises(StreamInterrupted):
+        next(stream)
+    assert saved == []
+    assert provider.caller.breaker.get_stats()['consecutive_failures'] == 1
+
+
+def test_failure_at_end_of_stream_raises():
+    provider = FakeProvider('flaky', chunks=['a'], fail_after=1)
+    with pytest.raises(StreamInterrupted):
+        list(make_router(provider).stream('prompt', PARAMETERS))
+
+
+def test_client_disconnect_releases_half_open_probe():
+    provider = FakeProvider('probe', chunks=['a', 'b'])
+    breaker = provider.caller.breaker
+    trip(breaker)
+    stream = make_router(provider).stream('prompt', PARAMETERS)
+    assert next(stream) == 'a'
+    assert breaker.state == HALF_OPEN
+    stream.close()
+    assert provider.closed
+    assert breaker.allow()
+
+
+def test_successful_stream_reports_full_text():
+    provider = FakeProvider('ok', chunks=['a', 'b'])
+    saved = []
+    assert list(make_router(provider).stream('prompt', PARAMETERS,
+                                             on_success=lambda p, text: saved.append(text))) == ['a', 'b']
+    assert saved == ['ab']
+    assert provider.caller.breaker.state == CLOSED
+
+
+class FakeResponse:
+    status_code = 200
+    encoding = 'utf-8'
+
+    def __init__(self, body):
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.body)
+
+    def json(self):
+        return self.body
+
+
+class FakeTransport:
+    def __init__(self, body):
+        self.body = body
+        self.payloads = []
+        self.timeouts = []
+
+    def post(self, url, headers=None, json=None, stream=False, timeout=None):
+        self.payloads.append(json)
+        self.timeouts.append(timeout)
+        return FakeResponse(self.body)
+
+
+def test_huggingface_asks_for_the_completion_only():
+    transport = FakeTransport([{'generated_text': 'the answer'}])
+    assert HuggingFaceProvider(transport).generate('prompt', PARAMETERS) == 'the answer'
+    assert transport.payloads[0]['parameters']['return_full_text'] is False
+
+
+def test_huggingface_strips_an_echoed_prompt():
+    transport = FakeTransport([{'generated_text': 'prompt\nthe answer'}])
+    assert HuggingFaceProvider(transport).generate('prompt\n', PARAMETERS) == 'the answer'
+
+
+def test_provider_must_implement_generate():
+    class Incomplete(LLMProvider):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_long_stream_is_judged_by_its_first_chunk(monkeypatch):
+    clock = iter(range(0, 1000, 10))  # Every reading is 10s later
+    monkeypatch.setattr('app.services.providers.time.monotonic', lambda: next(clock))
+    provider = FakeProvider('slow', chunks=['a', 'b', 'c', 'd'])
+    provider.caller.deadline = 1000
+    provider.caller.breaker = CircuitBreaker('slow', failure_threshold=1, latency_threshold=30, reset_timeout=60)
+    assert ''.join(make_router(provider).stream('prompt', PARAMETERS)) == 'abcd'
+    assert provider.caller.breaker.state == CLOSED
+
+
+def test_stream_read_timeout_is_the_deadline():
+    provider = FakeProvider('remote', chunks=['a'])
+    provider.caller.deadline = 12.5
+    list(make_router(provider).stream('prompt', PARAMETERS))
+    assert provider.read_timeout == 12.5
+
+
+def test_huggingface_stream_uses_the_read_timeout():
+    transport = FakeTransport(['data: {"token": {"text": "hi"}, "generated_text": "hi"}'])
+    transport.timeout = (5, 60)
+    provider = HuggingFaceProvider(transport)
+    assert list(provider.stream('prompt', PARAMETERS, read_timeout=12.5)) == ['hi']
+    assert transport.timeouts == [(5, 12.5)]
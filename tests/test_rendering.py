@@ -0,0 +1,65 @@
+import pytest
+
+from app import db
+from app.models.models import LessonBlobs, Lessons
+from app.services import content_store as content_store_module
+from app.services.content_store import blob_hash, content_store
+from app.utils import rendering
+from app.utils.rendering import _separate_lists, render_markdown
+
+
+@pytest.fixture
+def fake_renderer(monkeypatch):
+    calls = []
+
+    def render(text):
+        calls.append(text)
+        return f"<p>{text}</p>"
+
+    monkeypatch.setattr(content_store_module, 'render_markdown', render)
+    return calls
+
+
+def test_lists_under_a_paragraph_get_a_blank_line():
+    assert _separate_lists('Steps:\n- one\n- two\n\nDone') == 'Steps:\n\n- one\n- two\n\nDone'
+    assert _separate_lists('1. one\n2. two') == '1. one\n2. two'
+
+
+def test_nothing_is_rendered_without_the_libraries(monkeypatch):
+    monkeypatch.setattr(rendering, 'markdown', None)
+    assert render_markdown('# Title') is None
+
+
+def test_scripts_and_javascript_links_are_removed():
+    pytest.importorskip('markdown')
+    pytest.importorskip('nh3')
+    html = render_markdown('# Title\n\n<script>alert(1)</script>\n\n[x](javascript:alert(1)) <b onclick="x()">b</b>')
+    assert '<h1>Title</h1>' in html
+    assert 'script' not in html
+    assert 'javascript:' not in html
+    assert 'onclick' not in html
+
+
+def test_html_is_rendered_once_when_the_body_is_stored(app, fake_renderer):
+    lesson = Lessons(title='Variables')
+    lesson.content = '# Variables'
+    db.session.add(lesson)
+    db.session.commit()
+
+    assert content_store.get_html(lesson.content_hash) == '<p># Variables</p>'
+    assert content_store.get_html(lesson.content_hash) == '<p># Variables</p>'
+    assert fake_renderer == ['# Variables']
+
+
+def test_html_from_older_rules_is_rebuilt_and_stored(app, fake_renderer, monkeypatch):
+    lesson = Lessons(title='Variables')
+    lesson.content = '# Variables'
+    db.session.add(lesson)
+    db.session.commit()
+
+    monkeypatch.setattr(content_store_module, 'RENDERER_VERSION', rendering.RENDERER_VERSION + 1)
+    assert content_store.get_html(lesson.content_hash) == '<p># Variables</p>'
+    assert content_store.get_html(lesson.content_hash) == '<p># Variables</p>'
+    assert len(fake_renderer) == 2
+    db.session.expire_all()
+    assert db.session.get(LessonBlobs, blob_hash('# Variables')).html_version == rendering.RENDERER_VERSION + 1
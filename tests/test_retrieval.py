@@ -0,0 +1,74 @@
+from app import db
+from app.models.models import LessonChunks, Lessons
+from app.services.retrieval import chunk_text, index_lesson, lesson_context, top_chunks
+
+LESSON = """# Variables
+
+A variable names a value so later code can refer to it.
+
+# Loops
+
+A for loop repeats a block once for every item of a sequence.
+
+# Functions
+
+A function groups statements under a name and returns a result.
+
+# Exceptions
+
+An exception interrupts the normal flow when an error happens."""
+
+
+def add_lesson(content, legacy=False):
+    lesson = Lessons(title='Basics')
+    if legacy:
+        lesson.legacy_content = content
+    else:
+        lesson.content = content
+    db.session.add(lesson)
+    db.session.commit()
+    return lesson.id
+
+
+def test_headers_start_new_chunks():
+    assert chunk_text(LESSON, max_words=200) == [
+        '# Variables\n\nA variable names a value so later code can refer to it.',
+        '# Loops\n\nA for loop repeats a block once for every item of a sequence.',
+        '# Functions\n\nA function groups statements under a name and returns a result.',
+        '# Exceptions\n\nAn exception interrupts the normal flow when an error happens.',
+    ]
+
+
+def test_oversized_paragraphs_are_cut_on_words():
+    chunks = chunk_text(' '.join(f"w{index}" for index in range(25)), max_words=10)
+    assert [len(chunk.split()) for chunk in chunks] == [10, 10, 5]
+
+
+def test_best_chunks_are_returned_in_lesson_order(app):
+    lesson_id = add_lesson(LESSON)
+    index_lesson(lesson_id, LESSON)
+    db.session.commit()
+
+    chunks = top_chunks(lesson_id, 'how does an exception change the loop?', k=2)
+    assert [chunk.splitlines()[0] for chunk in chunks] == ['# Loops', '# Exceptions']
+    assert lesson_context(lesson_id, 'what does a function return', k=1).startswith('# Functions')
+
+
+def test_unchanged_content_is_not_reindexed(app):
+    lesson_id = add_lesson(LESSON)
+    assert index_lesson(lesson_id, LESSON)
+    db.session.commit()
+
+    assert not index_lesson(lesson_id, LESSON)
+    assert index_lesson(lesson_id, LESSON + '\n\n# Classes\n\nA class bundles data and behaviour.')
+    db.session.commit()
+    assert LessonChunks.query.filter_by(lesson_id=lesson_id).count() == 5
+
+
+def test_legacy_lessons_are_indexed_on_first_question(app):
+    lesson_id = add_lesson(LESSON, legacy=True)
+    assert LessonChunks.query.filter_by(lesson_id=lesson_id).count() == 0
+
+    assert top_chunks(lesson_id, 'variable value', k=1)[0].startswith('# Variables')
+    assert LessonChunks.query.filter_by(lesson_id=lesson_id).count() == 4
+    assert top_chunks(9999, 'anything') == []
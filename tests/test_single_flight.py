@@ -0,0 +1,89 @@
+import threading
+import time
+from app.services.single_flight import SingleFlight
+
+
+def start(target):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(target()))
+    thread.start()
+    return thread, results
+
+
+def wait_for_key(flight, key):
+    while key not in flight.in_flight():
+        time.sleep(0.001)
+
+
+def test_do_waits_for_a_stream_holding_the_key(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    calls = []
+    with flight.lead('lesson:1') as call:
+        thread, results = start(lambda: flight.do('lesson:1', lambda: calls.append(1) or 'own'))
+        time.sleep(0.05)
+        assert thread.is_alive()
+        call.finish('streamed')
+    thread.join(1)
+    assert results == ['streamed']
+    assert calls == []
+
+
+def test_second_stream_does_not_lead(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    with flight.lead('lesson:1') as call:
+        assert call is not None
+        with flight.lead('lesson:1') as second:
+            assert second is None
+    assert flight.in_flight() == []
+
+
+def test_abandoned_stream_lets_waiters_do_the_work(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+
+    def stream():
+        with flight.lead('lesson:1'):
+            yield 'chunk'
+
+    generator = stream()
+    next(generator)
+    wait_for_key(flight, 'lesson:1')
+    thread, results = start(lambda: flight.do('lesson:1', lambda: 'own'))
+    time.sleep(0.05)
+    generator.close()  # Client disconnect
+    thread.join(1)
+    assert results == ['own']
+
+
+def test_lock_files_are_removed(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    assert flight.do('lesson:1', lambda: 'done') == 'done'
+    with flight.lead('lesson:2'):
+        assert len(list(tmp_path.iterdir())) == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_file_lock_still_serializes_processes(tmp_path):
+    # Separate instances stand in for worker processes: only the file lock is shared
+    flights = [SingleFlight(lock_dir=str(tmp_path)) for _ in range(4)]
+    running, peak = [0], [0]
+    guard = threading.Lock()
+
+    def work():
+        with guard:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.002)
+        with guard:
+            running[0] -= 1
+
+    def repeat(flight):
+        for _ in range(25):
+            flight.do('lesson:1', work)
+
+    threads = [threading.Thread(target=repeat, args=(flight,)) for flight in flights]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 1
+    assert list(tmp_path.iterdir()) == []
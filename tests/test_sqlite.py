@@ -0,0 +1,26 @@
+from app import create_app
+from app.models.models import Users
+from app.utils.sqlite import engine_options
+from config.config import Config
+
+OPTIONS = {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30, 'pool_recycle': 3600}
+
+
+def test_engine_options_keep_pool_sizing_for_files():
+    assert engine_options('sqlite:///database.db', OPTIONS) == OPTIONS
+    assert engine_options('postgresql://localhost/masari', OPTIONS) == OPTIONS
+
+
+def test_engine_options_drop_pool_sizing_in_memory():
+    for uri in ('sqlite://', 'sqlite:///:memory:', 'sqlite:///file:test?mode=memory&uri=true'):
+        assert engine_options(uri, OPTIONS) == {'pool_recycle': 3600}
+
+
+def test_create_app_in_memory():
+    class MemoryConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        METRICS_ENABLED = False
+
+    app = create_app(MemoryConfig)
+    with app.app_context():
+        assert Users.query.count() == 0
@@ -0,0 +1,95 @@
+import json
+
+from app import db
+from app.models.models import Lessons
+from app.services import generation
+from app.services.providers import StreamInterrupted
+
+
+def add_lesson(content=None):
+    lesson = Lessons(title='Variables')
+    if content:
+        lesson.content = content
+    db.session.add(lesson)
+    db.session.commit()
+    return lesson.id
+
+
+def read_events(response):
+    """(event, data) pairs of an SSE body; every frame must end with a blank line"""
+    body = response.get_data(as_text=True)
+    assert body.endswith('\n\n')
+    events = []
+    for frame in body[:-2].split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.split('\n'))
+        assert set(fields) == {'event', 'data'}
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def stream(client, lesson_id):
+    return client.post('/api/generate_content/stream',
+                       json={'lesson_id': lesson_id, 'lesson_title': 'Variables', 'course_title': 'Python'})
+
+
+def fake_stream(monkeypatch, chunks, error=None):
+    calls = []
+
+    def stream_response(prompt, max_length=None):
+        calls.append(prompt)
+        yield from chunks
+        if error is not None:
+            raise error
+
+    monkeypatch.setattr(generation.llm_service, 'stream_response', stream_response)
+    return calls
+
+
+def test_chunks_are_framed_as_events_then_saved(client, make_user, monkeypatch):
+    make_user('learner', client)
+    lesson_id = add_lesson()
+    fake_stream(monkeypatch, ['# Variables\n\n', 'A variable names\n\na value.'])
+
+    response = stream(client, lesson_id)
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+
+    # Blank lines inside a chunk are JSON-escaped and cannot split a frame
+    events = read_events(response)
+    assert events[:2] == [('chunk', {'text': '# Variables\n\n'}), ('chunk', {'text': 'A variable names\n\na value.'})]
+    assert events[2][0] == 'done'
+    assert events[2][1]['content'] == '# Variables\n\nA variable names\n\na value.'
+    assert len(events) == 3
+    assert db.session.get(Lessons, lesson_id, populate_existing=True).content == events[2][1]['content']
+
+
+def test_interrupted_stream_ends_with_an_error_event_and_saves_nothing(client, make_user, monkeypatch):
+    make_user('learner', client)
+    lesson_id = add_lesson()
+    fake_stream(monkeypatch, ['# Variables\n\n'], error=StreamInterrupted('upstream closed the stream'))
+
+    events = read_events(stream(client, lesson_id))
+    assert events == [('chunk', {'text': '# Variables\n\n'}), ('error', {'error': 'upstream closed the stream'})]
+    assert db.session.get(Lessons, lesson_id, populate_existing=True).content is None
+
+    # The lesson is not left locked; the next request generates it
+    calls = fake_stream(monkeypatch, ['# Variables'])
+    assert read_events(stream(client, lesson_id))[-1][1]['content'] == '# Variables'
+    assert len(calls) == 1
+
+
+def test_existing_content_is_sent_as_one_chunk(client, make_user, monkeypatch):
+    make_user('learner', client)
+    lesson_id = add_lesson('# Variables')
+    calls = fake_stream(monkeypatch, ['unused'])
+
+    events = read_events(stream(client, lesson_id))
+    assert [event for event, _ in events] == ['chunk', 'done']
+    assert events[0][1] == {'text': '# Variables'}
+    assert calls == []
+
+
+def test_unknown_lesson_is_not_streamed(client, make_user):
+    make_user('learner', client)
+    assert stream(client, 9999).status_code == 404
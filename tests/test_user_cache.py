@@ -0,0 +1,107 @@
+import pytest
+from sqlalchemy import event, update
+
+from app import db
+from app.models.models import Users
+from app.services.user_cache import UserCache, user_cache
+
+
+@pytest.fixture
+def cache(app, monkeypatch):
+    # The global instance: the write listeners drop its entries at commit
+    monkeypatch.setattr(user_cache, 'version_ttl', 60)
+    user_cache.clear()
+    yield user_cache
+    user_cache.clear()
+
+
+def add_user(username='ada'):
+    user = Users(username=username, password='x', name='Ada')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def test_hit_after_first_load(app):
+    cache = UserCache(ttl=60)
+    user_id = add_user()
+    db.session.remove()
+    assert cache.load(user_id).name == 'Ada'
+    db.session.remove()
+    assert cache.load(user_id).name == 'Ada'
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_update_is_seen_by_other_processes(app):
+    # Two caches stand in for two worker processes
+    writer, reader = UserCache(ttl=60), UserCache(ttl=60, version_ttl=0)
+    user_id = add_user()
+    reader.load(user_id)
+    db.session.remove()
+
+    writer.load(user_id).name = 'Grace'
+    db.session.commit()
+    db.session.remove()
+    assert reader.load(user_id).name == 'Grace'
+    assert reader.get_stats()['stale'] == 1
+
+
+def test_bulk_update_invalidates(cache):
+    user_id = add_user()
+    cache.load(user_id)
+    db.session.execute(update(Users).where(Users.id == user_id).values(name='Grace'))
+    db.session.commit()
+    db.session.remove()
+    assert cache.load(user_id).name == 'Grace'
+
+
+def test_rolled_back_update_keeps_the_entry(app):
+    cache = UserCache(ttl=60)
+    user_id = add_user()
+    cache.load(user_id)
+    version = cache.version(user_id)
+    db.session.get(Users, user_id).name = 'Grace'
+    db.session.flush()
+    db.session.rollback()
+    assert cache.version(user_id) == version
+
+
+def count_statements(fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def test_warm_hit_runs_no_sql(app):
+    cache = UserCache(ttl=60, version_ttl=60)
+    user_id = add_user()
+    cache.load(user_id)
+    db.session.remove()
+    assert count_statements(lambda: cache.load(user_id).name) == []
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_version_is_rechecked_after_version_ttl(app):
+    cache = UserCache(ttl=60, version_ttl=0)
+    user_id = add_user()
+    cache.load(user_id)
+    db.session.remove()
+    statements = count_statements(lambda: cache.load(user_id))
+    assert len(statements) == 1 and 'cache_versions' in statements[0]
+
+
+def test_writing_process_forgets_at_commit(cache):
+    user_id = add_user()
+    cache.load(user_id)
+    db.session.get(Users, user_id).name = 'Grace'
+    db.session.commit()
+    db.session.remove()
+    assert cache.load(user_id).name == 'Grace'